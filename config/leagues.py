@@ -1,9 +1,22 @@
+# "zones": plassintervaller (1-indeksert, inkluderende) som rapporteres
+# fra simuleringens posisjonsmatrise, f.eks. europacup- og nedrykksplasser.
+# "tiebreak": rekkefølgen lag med like mange poeng rangeres i, blant
+# points, gd, gf, h2h_points, h2h_gd (se src/models/tiebreak.py). Uten
+# "tiebreak" brukes points → gd → gf. I result-modus (uten mål) brukes bare
+# kriteriene foran det første målkriteriet; ligaer som rangerer på
+# målforskjell før innbyrdes, rangeres da tilfeldig etter poeng.
 LEAGUES = {
     "Premier League": {
         "comp_id": "9",
         "slug": "Premier-League-Stats",
         "comp_id_second_division": "10",
         "slug_second_division": "Championship-Stats",
+        "zones": {
+            "Mesterliga": (1, 4),
+            "Europaliga": (5, 5),
+            "Konferanseliga": (6, 6),
+        },
+        "tiebreak": ("points", "gd", "gf", "h2h_points"),
         "team_name_map": {
             "Manchester Utd": "Manchester United",
             "Wolves": "Wolverhampton Wanderers",
@@ -20,6 +33,12 @@ LEAGUES = {
         "slug": "La-Liga-Stats",
         "comp_id_second_division": "17",
         "slug_second_division": "Segunda-Division-Stats",
+        "zones": {
+            "Mesterliga": (1, 4),
+            "Europaliga": (5, 5),
+            "Konferanseliga": (6, 6),
+        },
+        "tiebreak": ("points", "h2h_points", "h2h_gd", "gd", "gf"),
         "team_name_map": {
             "Atlético Madrid": "Atletico Madrid",
             "Betis": "Real Betis",
@@ -34,6 +53,12 @@ LEAGUES = {
         "slug": "Serie-A-Stats",
         "comp_id_second_division": "18",
         "slug_second_division": "Serie-B-Stats",
+        "zones": {
+            "Mesterliga": (1, 4),
+            "Europaliga": (5, 5),
+            "Konferanseliga": (6, 6),
+        },
+        "tiebreak": ("points", "h2h_points", "h2h_gd", "gd", "gf"),
         "team_name_map": {
             "Inter": "Internazionale",
         },
@@ -43,6 +68,14 @@ LEAGUES = {
         "slug": "Bundesliga-Stats",
         "comp_id_second_division": "33",
         "slug_second_division": "2-Bundesliga-Stats",
+        "zones": {
+            "Mesterliga": (1, 4),
+            "Europaliga": (5, 5),
+            "Konferanseliga": (6, 6),
+            "Nedrykkskvalik": (16, 16),
+            "Direkte nedrykk": (17, 18),
+        },
+        "tiebreak": ("points", "gd", "gf", "h2h_points", "h2h_gd"),
         "team_name_map": {
             "Leverkusen": "Bayer Leverkusen",
             "Eint Frankfurt": "Eintracht Frankfurt",
@@ -56,6 +89,15 @@ LEAGUES = {
         "slug": "Ligue-1-Stats",
         "comp_id_second_division": "60",
         "slug_second_division": "Ligue-2-Stats",
+        "zones": {
+            "Mesterliga": (1, 3),
+            "Mesterliga-kvalik": (4, 4),
+            "Europaliga": (5, 5),
+            "Konferanseliga": (6, 6),
+            "Nedrykkskvalik": (16, 16),
+            "Direkte nedrykk": (17, 18),
+        },
+        "tiebreak": ("points", "gd", "h2h_points", "h2h_gd", "gf"),
         "team_name_map": {
             "Paris S-G": "Paris Saint Germain",
             "Saint-Étienne": "Saint Etienne",
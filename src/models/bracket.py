@@ -0,0 +1,250 @@
+# File: src/models/bracket.py
+"""
+Cup- og sluttspillsimulering med ligaens Poisson-modell.
+
+Braketten defineres i en JSON-fil:
+
+    {
+      "league": "Premier League",
+      "extra_time_factor": 0.333,
+      "rounds": [
+        {"name": "Semifinale", "legs": 2,
+         "ties": [["Arsenal", "Chelsea"], ["Liverpool", "Everton"]]},
+        {"name": "Finale", "legs": 1, "neutral": true}
+      ]
+    }
+
+Første runde lister oppgjørene (første lag har hjemmekamp i første kamp).
+Senere runder setter sammen vinnerne i rekkefølge: vinner av oppgjør 2k
+møter vinner av 2k+1. Ved likt sammenlagt spilles ekstraomganger med
+lambdas skalert med `extra_time_factor` (30 av 90 minutter), deretter
+straffer der hvert lag vinner med sannsynlighet 0.5 (eller
+`penalty_home_prob` for laget med hjemmebane i siste kamp). På nøytral
+bane brukes geometrisk snitt av hjemme- og bortelambda for hvert lag.
+
+Alle lag må finnes i ligaens processed-data: lambdas for alle par beregnes
+én gang med predict_poisson_from_models fra lagenes nyeste features, og
+hver runde trekkes deretter for alle simuleringer samtidig.
+"""
+from __future__ import annotations
+
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from config.leagues import LEAGUES
+from config.settings import DATA_PATH
+from src.models.predict import build_feature_lists, predict_poisson_from_models
+
+EXTRA_TIME_FACTOR = 30 / 90
+_SIDE = re.compile(r"_(home|away)(?=_|$)")
+
+
+def load_bracket(path: str) -> dict:
+    """
+    Leser og sjekker en brakettdefinisjon (se modul-docstring). "league" må
+    være en liga i config/leagues.py, siden modellen og lagenes features
+    hentes derfra.
+    """
+    with open(path, encoding="utf-8") as f:
+        bracket = json.load(f)
+
+    league = bracket.get("league")
+    if league not in LEAGUES:
+        raise ValueError(
+            f"'league' i {path} må være en liga i config/leagues.py "
+            f"({', '.join(LEAGUES)}), fikk {league!r}"
+        )
+
+    rounds = bracket.get("rounds", [])
+    if not rounds or not rounds[0].get("ties"):
+        raise ValueError("Første runde må ha 'ties'")
+    n_ties = len(rounds[0]["ties"])
+    for rnd in rounds:
+        if rnd.get("legs", 1) not in (1, 2):
+            raise ValueError(f"Runde {rnd.get('name')}: 'legs' må være 1 eller 2")
+    if n_ties != 2 ** (len(rounds) - 1):
+        raise ValueError(
+            f"{n_ties} oppgjør i første runde passer ikke med {len(rounds)} runder"
+        )
+    return bracket
+
+
+def bracket_teams(bracket: dict) -> list[str]:
+    """Lagene i braketten, i rekkefølgen de står i første runde."""
+    return [team for tie in bracket["rounds"][0]["ties"] for team in tie]
+
+
+def _team_profiles(df: pd.DataFrame, teams: list[str]) -> dict[str, dict]:
+    """
+    Nyeste features per lag, uten side: {"xg_{side}_roll5": verdi, ...}.
+    Første uspilte kamp brukes hvis laget har en (features er da oppdatert
+    med alle spilte kamper), ellers siste spilte kamp.
+    """
+    side_cols = [c for c in df.columns if _SIDE.search(c)]
+    df = df.sort_values("date", kind="stable")
+    profiles = {}
+    for team in teams:
+        rows = df[(df["home_team"] == team) | (df["away_team"] == team)]
+        if rows.empty:
+            raise KeyError(f"Fant ikke {team} i processed-data")
+        upcoming = rows[rows["result_home"].isna()]
+        row = upcoming.iloc[0] if len(upcoming) else rows.iloc[-1]
+        side = "home" if row["home_team"] == team else "away"
+        profiles[team] = {
+            _SIDE.sub("_{side}", c): row[c]
+            for c in side_cols
+            if _SIDE.search(c).group(1) == side
+        }
+    return profiles
+
+
+def _matchups(profiles: dict[str, dict], teams: list[str]) -> pd.DataFrame:
+    """Én rad per ordnet par (hjemme, borte) med features fra hvert lags profil."""
+    rows = []
+    for home in teams:
+        for away in teams:
+            if home == away:
+                continue
+            row = {"date": pd.NaT, "time": "", "home_team": home, "away_team": away}
+            for template, value in profiles[home].items():
+                row[template.format(side="home")] = value
+            for template, value in profiles[away].items():
+                row[template.format(side="away")] = value
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def bracket_lambdas(
+    league_name: str, teams: list[str], models_dir: str | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Forventede mål for alle ordnede par: (lam_hjemme, lam_borte), hver
+    (n_lag × n_lag) der [i, j] er kampen med lag i hjemme mot lag j.
+    Diagonalen er 0.
+    """
+    key = league_name.lower().replace(" ", "_")
+    path = f"{DATA_PATH}/processed/{key}_processed.csv"
+    df = pd.read_csv(path, parse_dates=["date"])
+    features_home, features_away = build_feature_lists()
+    preds = predict_poisson_from_models(
+        df=_matchups(_team_profiles(df, teams), teams),
+        features_home=features_home,
+        features_away=features_away,
+        league_name=league_name,
+        models_dir=models_dir or f"{DATA_PATH}/models",
+        boost=False,
+    )
+
+    idx = {t: i for i, t in enumerate(teams)}
+    h = preds["home_team"].map(idx).to_numpy()
+    a = preds["away_team"].map(idx).to_numpy()
+    lam_home = np.zeros((len(teams), len(teams)))
+    lam_away = np.zeros((len(teams), len(teams)))
+    lam_home[h, a] = preds["lambda_home"].to_numpy(dtype=float)
+    lam_away[h, a] = preds["lambda_away"].to_numpy(dtype=float)
+    return lam_home, lam_away
+
+
+def _play_tie(
+    first: np.ndarray,
+    second: np.ndarray,
+    lam_home: np.ndarray,
+    lam_away: np.ndarray,
+    rnd: dict,
+    rng: np.random.Generator,
+    extra_time_factor: float,
+    penalty_home_prob: float,
+) -> np.ndarray:
+    """
+    Spiller ett oppgjør per (simulering, oppgjør) samtidig.
+    `first`/`second` er lagindekser (n_sims × n_oppgjør); returnerer vinneren.
+    """
+    if rnd.get("neutral", False):
+        # Ingen hjemmebane: geometrisk snitt av begge retninger
+        lam_1 = np.sqrt(lam_home[first, second] * lam_away[second, first])
+        lam_2 = np.sqrt(lam_away[first, second] * lam_home[second, first])
+    else:
+        lam_1, lam_2 = lam_home[first, second], lam_away[first, second]
+    goals_1 = rng.poisson(lam_1)
+    goals_2 = rng.poisson(lam_2)
+
+    if rnd.get("legs", 1) == 2:
+        # Returkamp: andre lag hjemme
+        lam_1, lam_2 = lam_away[second, first], lam_home[second, first]
+        goals_1 = goals_1 + rng.poisson(lam_1)
+        goals_2 = goals_2 + rng.poisson(lam_2)
+
+    # Ekstraomganger med lambdas fra siste kamp
+    level = goals_1 == goals_2
+    goals_1 = goals_1 + level * rng.poisson(lam_1 * extra_time_factor)
+    goals_2 = goals_2 + level * rng.poisson(lam_2 * extra_time_factor)
+
+    # Straffer: andre lag har hjemmebane i siste kamp (ikke ved nøytral bane)
+    level = goals_1 == goals_2
+    p_second = 0.5
+    if rnd.get("legs", 1) == 2:
+        p_second = penalty_home_prob
+    elif not rnd.get("neutral", False):
+        p_second = 1.0 - penalty_home_prob
+    second_wins_pens = rng.random(first.shape) < p_second
+
+    second_wins = (goals_2 > goals_1) | (level & second_wins_pens)
+    return np.where(second_wins, second, first)
+
+
+def simulate_bracket(
+    bracket: dict,
+    n_sims: int = 10_000,
+    seed: int | None = None,
+    models_dir: str | None = None,
+    lambdas: tuple[np.ndarray, np.ndarray] | None = None,
+) -> pd.DataFrame:
+    """
+    Simulerer braketten `n_sims` ganger.
+
+    `lambdas` (fra bracket_lambdas, i rekkefølgen til bracket_teams) kan
+    gis direkte; ellers beregnes de fra ligaens modell.
+
+    Returnerer DataFrame med Team og P(<runde>) for hver runde laget kan nå
+    (i %) samt P(vinne), sortert på P(vinne).
+    """
+    teams = bracket_teams(bracket)
+    if lambdas is None:
+        lambdas = bracket_lambdas(bracket["league"], teams, models_dir)
+    lam_home, lam_away = lambdas
+    extra_time_factor = float(bracket.get("extra_time_factor", EXTRA_TIME_FACTOR))
+    penalty_home_prob = float(bracket.get("penalty_home_prob", 0.5))
+    rng = np.random.default_rng(seed)
+
+    n_teams = len(teams)
+    rounds = bracket["rounds"]
+    # Lagene som står i første runde, som (n_sims × n_lag) slik at rundene
+    # kan parres likt i alle simuleringer: oppgjør k = kolonne 2k mot 2k+1
+    alive = np.broadcast_to(np.arange(n_teams), (n_sims, n_teams))
+    reach = np.zeros((n_teams, len(rounds) + 1), dtype=np.int64)
+
+    for r, rnd in enumerate(rounds):
+        reach[:, r] = np.bincount(alive.ravel(), minlength=n_teams)
+        alive = _play_tie(
+            alive[:, 0::2],
+            alive[:, 1::2],
+            lam_home,
+            lam_away,
+            rnd,
+            rng,
+            extra_time_factor,
+            penalty_home_prob,
+        )
+    reach[:, -1] = np.bincount(alive.ravel(), minlength=n_teams)
+
+    columns = [
+        f"P({rnd.get('name', f'runde {r + 1}')})" for r, rnd in enumerate(rounds)
+    ]
+    out = pd.DataFrame(
+        100.0 * reach[:, 1:] / n_sims, columns=columns[1:] + ["P(vinne)"]
+    ).round(1)
+    out.insert(0, "Team", teams)
+    return out.sort_values("P(vinne)", ascending=False).reset_index(drop=True)
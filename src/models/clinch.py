@@ -0,0 +1,177 @@
+# File: src/models/clinch.py
+"""
+Matematisk avgjorte plasseringer ("clinch"/eliminasjon) og magiske tall.
+
+Bygger på en forberedt sesongkontekst (se simulate.prepare_season): dagens
+poeng og gjenstående kamper. Alle vurderinger er sikre, dvs. et lag merkes
+bare som avgjort når ingen kombinasjon av gjenstående resultater kan endre
+det. Ved poenglikhet regnes plassen som åpen (tiebreak kan gå begge veier).
+
+    bounds = position_bounds(context)
+    table = clinch_table(context, {"vinne": (1, 1), "nedrykk": (18, 20)})
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_flow
+
+
+def _points_and_games(context: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Dagens poeng og antall gjenstående kamper per lag."""
+    fixtures = context["fixtures"]
+    n_teams = len(context["teams"])
+    games = np.bincount(
+        np.concatenate([fixtures["home_idx"], fixtures["away_idx"]]),
+        minlength=n_teams,
+    )
+    return context["base_points"].astype(np.int64), games.astype(np.int64)
+
+
+def _title_eliminated(context: dict, candidates: np.ndarray) -> np.ndarray:
+    """
+    Maks-flyt-test for om et lag ikke lenger kan ende øverst (alene eller delt).
+
+    Laget t vinner alle sine kamper og får M poeng. Øvrige kamper må så
+    fordeles uten at noe lag passerer M. Hver kamp gir minst 2 poeng totalt
+    (uavgjort 1+1; seier 3+0 gir vinneren mer enn 2+0), så vi slipper 2 poeng
+    per kamp gjennom nettverket kilde → kamp → lag → sluk med kapasitet
+    M - poeng på lag → sluk. Får ikke alle kamper plass, er t sikkert slått.
+    Relaksasjonen er konservativ: den kan overse en eliminasjon, men aldri
+    melde en falsk.
+    """
+    points, games = _points_and_games(context)
+    fixtures = context["fixtures"]
+    home_idx, away_idx = fixtures["home_idx"], fixtures["away_idx"]
+    n_teams = len(points)
+    eliminated = np.zeros(n_teams, dtype=bool)
+
+    for t in np.flatnonzero(candidates):
+        best = points[t] + 3 * games[t]
+        room = best - points
+        if (np.delete(room, t) < 0).any():
+            eliminated[t] = True
+            continue
+
+        others = (home_idx != t) & (away_idx != t)
+        h, a = home_idx[others], away_idx[others]
+        n_games = len(h)
+        if n_games == 0:
+            continue
+
+        # Noder: 0 = kilde, 1..G = kamper, G+1..G+N = lag, G+N+1 = sluk
+        game_nodes = np.arange(1, n_games + 1)
+        sink = n_games + n_teams + 1
+        team_nodes = n_games + 1 + np.arange(n_teams)
+        rows = np.concatenate([np.zeros(n_games), game_nodes, game_nodes, team_nodes])
+        cols = np.concatenate(
+            [game_nodes, n_games + 1 + h, n_games + 1 + a, np.full(n_teams, sink)]
+        )
+        caps = np.concatenate([np.full(3 * n_games, 2), np.maximum(room, 0)])
+        graph = csr_matrix(
+            (caps.astype(np.int32), (rows.astype(np.int32), cols.astype(np.int32))),
+            shape=(sink + 1, sink + 1),
+        )
+        flow = maximum_flow(graph, 0, sink).flow_value
+        eliminated[t] = flow < 2 * n_games
+
+    return eliminated
+
+
+def position_bounds(context: dict) -> pd.DataFrame:
+    """
+    Beste og dårligste mulige sluttplass per lag (1-indeksert).
+
+    Et lag j er sikkert over t hvis j allerede har flere poeng enn t kan nå,
+    og kan havne over t hvis j kan nå t sin nåværende poengsum. Beste plass
+    1 skjerpes med maks-flyt-testen i _title_eliminated.
+
+    Returnerer DataFrame (indeks Team) med Poeng nå, Kamper igjen,
+    Maks poeng, Beste plass og Dårligste plass.
+    """
+    points, games = _points_and_games(context)
+    max_points = points + 3 * games
+
+    # [t, j]: j alltid over t / j kan nå (eller passere) t
+    always_above = points[None, :] > max_points[:, None]
+    can_reach = max_points[None, :] >= points[:, None]
+    np.fill_diagonal(can_reach, False)
+
+    best = 1 + always_above.sum(axis=1)
+    worst = 1 + can_reach.sum(axis=1)
+    best[_title_eliminated(context, best == 1)] = 2
+
+    return pd.DataFrame(
+        {
+            "Poeng nå": points,
+            "Kamper igjen": games,
+            "Maks poeng": max_points,
+            "Beste plass": best,
+            "Dårligste plass": np.maximum(worst, best),
+        },
+        index=pd.Index(context["teams"], name="Team"),
+    )
+
+
+def zone_status(bounds: pd.DataFrame, first: int, last: int) -> pd.Series:
+    """
+    Status per lag for sonen first..last: "sikret", "ute" eller "åpen".
+    """
+    best, worst = bounds["Beste plass"], bounds["Dårligste plass"]
+    status = pd.Series("åpen", index=bounds.index)
+    status[(best >= first) & (worst <= last)] = "sikret"
+    status[(best > last) | (worst < first)] = "ute"
+    return status
+
+
+def magic_numbers(context: dict, k: int) -> pd.Series:
+    """
+    Magisk tall for topp k: poeng laget må ta for å være sikret plass 1..k
+    uansett resultater i andre kamper. Antar at konkurrentene tar maks
+    poeng (også mot laget selv), så tallet er en øvre grense. 0 betyr
+    allerede sikret; et tall over 3 × gjenstående kamper kan ikke nås på
+    egen hånd.
+    """
+    points, games = _points_and_games(context)
+    max_points = points + 3 * games
+    n_teams = len(points)
+    out = np.zeros(n_teams, dtype=np.int64)
+    if k < n_teams:
+        for t in range(n_teams):
+            rivals = np.sort(np.delete(max_points, t))[::-1]
+            out[t] = max(0, rivals[k - 1] - points[t] + 1)
+    return pd.Series(out, index=pd.Index(context["teams"], name="Team"))
+
+
+def clinch_table(context: dict, zones: dict[str, tuple[int, int]]) -> pd.DataFrame:
+    """
+    Oversikt over avgjorte soner og magiske tall.
+
+    Kolonner: Team, Poeng nå, Kamper igjen, Maks poeng, Beste plass,
+    Dårligste plass, Status(<sone>) per sone, og
+      - Magisk tall(<sone>)       for soner fra plass 1 (poeng til sikret)
+      - Magisk tall(unngå <sone>) for soner som går til sist (poeng til trygg)
+    """
+    bounds = position_bounds(context)
+    n_teams = len(bounds)
+    out = bounds.copy()
+    for name, (first, last) in zones.items():
+        out[f"Status({name})"] = zone_status(bounds, first, last)
+    for name, (first, last) in zones.items():
+        if first == 1:
+            out[f"Magisk tall({name})"] = magic_numbers(context, last)
+        elif last == n_teams:
+            out[f"Magisk tall(unngå {name})"] = magic_numbers(context, first - 1)
+    return out.reset_index()
+
+
+def decided_mask(
+    bounds: pd.DataFrame, zones: dict[str, tuple[int, int]]
+) -> np.ndarray:
+    """(n_lag × n_soner)-maske: True der lagets sone er matematisk avgjort."""
+    cols = [
+        zone_status(bounds, first, last).to_numpy() != "åpen"
+        for first, last in zones.values()
+    ]
+    return np.column_stack(cols) if cols else np.zeros((len(bounds), 0), dtype=bool)
@@ -0,0 +1,274 @@
+# File: src/models/form.py
+"""
+Dynamisk form i sesongsimuleringen.
+
+I statisk modus predikeres hver gjenstående kamp én gang fra dagens
+rullerende features (xg_roll5, gf_roll10, ...). Her oppdateres formen
+runde for runde med simulerte resultater:
+
+  - hvert lag har en ringbuffer med de siste kampenes gf, ga, xg og
+    xg_conceded (per simulering); xG for simulerte kamper er kampens lambda
+  - før hver runde regnes rullerende snitt fra bufferne, og lambdas for
+    rundens kamper beregnes samlet med en lineær prediktor på log-skala
+  - etter runden skrives de simulerte målene inn i bufferne
+
+Modellen er log λ = intercept + coef · (x - mean) / scale. Foldet blir det
+log λ = b + w · x med w = coef / scale. Alt som ikke er form (team-dummies,
+is_home, sesongsnitt) er konstant per kamp og samles i et kampledd c, slik at
+log λ = c + w_form · x_form, der c kalibreres mot den statiske prediksjonen.
+"""
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.models.fused import folded_linear_predictor
+
+FORM_STATS = ("gf", "ga", "xg", "xg_conceded")
+
+# Angrepsstatistikk tas fra laget selv, defensiv fra motstanderen
+# (samme oppsett som build_feature_lists i predict.py)
+_OWN_STATS = ("gf", "xg")
+_FORM_FEATURE = re.compile(r"^(xg_conceded|xg|gf|ga)_roll(\d+)$")
+
+
+def _form_features(feature_names: list[str]) -> list[tuple[int, int, int, bool]]:
+    """
+    Finner formfeatures i modellen: (kolonne, statistikk, vindu, eget lag?).
+    """
+    out = []
+    for col, name in enumerate(feature_names):
+        m = _FORM_FEATURE.match(name)
+        if m:
+            stat, window = m.group(1), int(m.group(2))
+            out.append((col, FORM_STATS.index(stat), window, stat in _OWN_STATS))
+    return out
+
+
+def _row_column(stat: str, window: int, own: bool, home: bool) -> str:
+    """Kolonnen i processed-data som gir featuren for hjemme-/bortelagets rad."""
+    side = "home" if own == home else "away"
+    return f"{stat}_{side}_roll{window}"
+
+
+def _team_history(played: pd.DataFrame, teams: list[str], size: int) -> np.ndarray:
+    """
+    Siste `size` kamper per lag (eldst først, NaN der historikken er kortere):
+    array (n_lag × n_stats × size), statistikk i rekkefølgen FORM_STATS.
+    """
+    home = pd.DataFrame(
+        {
+            "date": played["date"],
+            "team": played["home_team"],
+            "gf": played["gf_home"],
+            "ga": played["gf_away"],
+            "xg": played["xg_home"],
+            "xg_conceded": played["xg_away"],
+        }
+    )
+    away = pd.DataFrame(
+        {
+            "date": played["date"],
+            "team": played["away_team"],
+            "gf": played["gf_away"],
+            "ga": played["gf_home"],
+            "xg": played["xg_away"],
+            "xg_conceded": played["xg_home"],
+        }
+    )
+    long = pd.concat([home, away], ignore_index=True).sort_values(
+        "date", kind="stable"
+    )
+
+    history = np.full((len(teams), len(FORM_STATS), size), np.nan)
+    for i, team in enumerate(teams):
+        last = long.loc[long["team"] == team, list(FORM_STATS)].tail(size)
+        if len(last):
+            history[i, :, size - len(last) :] = last.to_numpy(dtype=float).T
+    return history
+
+
+def prepare_form(
+    history: pd.DataFrame,
+    remaining: pd.DataFrame,
+    preds: pd.DataFrame,
+    teams: list[str],
+    model,
+    scaler,
+) -> dict:
+    """
+    Bygger starttilstand og kampledd for dynamisk form.
+
+    Parametre:
+      - history:   alle spilte kamper (alle sesonger) med gf/xg per side
+      - remaining: gjenstående kamper med dagens feature-kolonner og 'round'
+      - preds:     statiske prediksjoner for `remaining` (samme rekkefølge)
+      - model, scaler: fra load_models_for_league
+
+    Returnerer dict med ringbuffer-historikk, runde per kamp, formvekter og
+    kampledd (offset_home/offset_away) på log-skala.
+    """
+    w_all, _ = folded_linear_predictor(model, scaler)
+    spec = _form_features(list(scaler.feature_names_in_))
+    size = max((window for _, _, window, _ in spec), default=1)
+    remaining = remaining.reset_index(drop=True)
+
+    def offset(lam: pd.Series, home: bool) -> np.ndarray:
+        # c = log λ_statisk - w_form · x_form(i dag)
+        eta = np.log(lam.to_numpy(dtype=float))
+        for col, stat, window, own in spec:
+            name = _row_column(FORM_STATS[stat], window, own, home)
+            x = remaining[name].fillna(0).to_numpy(dtype=float)
+            eta = eta - w_all[col] * x
+        return eta
+
+    key = "round" if "round" in remaining.columns else "date"
+    rounds = pd.factorize(remaining[key], sort=True)[0]
+
+    return {
+        "history": _team_history(history, teams, size),
+        "rounds": rounds.astype(np.int32),
+        "weights": np.array([w_all[col] for col, *_ in spec]),
+        "features": [(stat, window, own) for _, stat, window, own in spec],
+        "offset_home": offset(preds["lambda_home"], home=True),
+        "offset_away": offset(preds["lambda_away"], home=False),
+    }
+
+
+def _init_state(history: np.ndarray, n_sims: int, windows: set[int]) -> dict:
+    """
+    Ringbuffer med løpende summer per vindu.
+
+    `buffer` er (n_lag × plass × statistikk × n_sims) med eldste kamp først;
+    simuleringsaksen ligger sist slik at ett lags verdier er sammenhengende
+    i minnet. `pos` er neste skriveposisjon per lag (lik for alle
+    simuleringer, siden terminlisten er den samme). For hvert vindu holdes
+    summen (per simulering) og antall ikke-NaN verdier (NaN finnes bare i
+    historikken), slik at et nytt resultat oppdaterer snittet i O(1).
+    """
+    hist = history.transpose(0, 2, 1)  # lag × plass × statistikk
+    size = hist.shape[1]
+    valid = ~np.isnan(hist)
+    state = {
+        "buffer": np.repeat(hist[..., None], n_sims, axis=3),
+        "pos": np.zeros(hist.shape[0], dtype=np.int64),
+        "sums": {},
+        "counts": {},
+    }
+    for window in windows:
+        recent = slice(size - window, size)
+        total = np.where(valid, hist, 0.0)[:, recent].sum(axis=1)
+        state["sums"][window] = np.repeat(total[..., None], n_sims, axis=2)
+        state["counts"][window] = valid[:, recent].sum(axis=1)
+    return state
+
+
+def _push(state: dict, teams: np.ndarray, values: np.ndarray) -> None:
+    """
+    Skriver én kamp per lag i `teams` (unike) inn i ringbufferen.
+    `values` er (len(teams) × statistikk × n_sims) i rekkefølgen FORM_STATS.
+    """
+    buffer, pos = state["buffer"], state["pos"]
+    size = buffer.shape[1]
+    for window, sums in state["sums"].items():
+        # Verdien som faller ut av vinduet (NaN kun fra historikken)
+        leaving = buffer[teams, (pos[teams] - window) % size]
+        gone = ~np.isnan(leaving[..., 0])
+        sums[teams] += values - np.where(np.isnan(leaving), 0.0, leaving)
+        state["counts"][window][teams] += 1 - gone
+    buffer[teams, pos[teams] % size] = values
+    pos[teams] += 1
+
+
+def _form_means(
+    state: dict, teams: np.ndarray, stat: int, window: int
+) -> np.ndarray:
+    """Rullerende snitt (n_sims × len(teams)); uten data blir snittet 0."""
+    n = state["counts"][window][teams, stat]
+    total = state["sums"][window][teams, stat].T
+    return np.divide(total, n, out=np.zeros_like(total), where=n > 0)
+
+
+def _poisson_from_uniforms(u: np.ndarray, lam: np.ndarray) -> np.ndarray:
+    """
+    Invers Poisson-CDF når lambda varierer per element (samme form som `u`):
+    den kumulative tabellen bygges ledd for ledd (p_k = p_{k-1} · λ / k), og
+    mål = antall terskler u overstiger. Stopper når alle u er dekket eller
+    leddene er under flyttallsoppløsningen.
+    """
+    goals = np.zeros(u.shape, dtype=np.int8)
+    p = np.exp(-lam)
+    cdf = p.copy()
+    for k in range(1, 128):
+        above = u > cdf
+        if not above.any() or p.max() < 1e-17:
+            break
+        goals += above
+        p = p * lam / k
+        cdf += p
+    return goals
+
+
+def simulate_form_scorelines(
+    form: dict,
+    home_idx: np.ndarray,
+    away_idx: np.ndarray,
+    n_sims: int,
+    rng: np.random.Generator,
+    u_home: np.ndarray | None = None,
+    u_away: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Trekker mål runde for runde med lambdas fra oppdatert form.
+    Med `u_home`/`u_away` (n_sims × n_kamper) brukes invers Poisson-CDF i
+    stedet for `rng` (felles tilfeldige tall / antitetiske par).
+    Returnerer (mål hjemme, mål borte) som int8 (n_sims × n_kamper).
+    """
+    windows = {window for _, window, _ in form["features"]}
+    state = _init_state(form["history"], n_sims, windows)
+
+    n_fixtures = len(home_idx)
+    goals_home = np.empty((n_sims, n_fixtures), dtype=np.int8)
+    goals_away = np.empty((n_sims, n_fixtures), dtype=np.int8)
+
+    for r in np.unique(form["rounds"]):
+        cols = np.flatnonzero(form["rounds"] == r)
+        h, a = home_idx[cols], away_idx[cols]
+
+        shape = (n_sims, len(cols))
+        eta_h = np.broadcast_to(form["offset_home"][cols], shape).copy()
+        eta_a = np.broadcast_to(form["offset_away"][cols], shape).copy()
+        for w, (stat, window, own) in zip(form["weights"], form["features"]):
+            eta_h += w * _form_means(state, h if own else a, stat, window)
+            eta_a += w * _form_means(state, a if own else h, stat, window)
+        lam_h, lam_a = np.exp(eta_h), np.exp(eta_a)
+
+        if u_home is not None:
+            g_h = _poisson_from_uniforms(u_home[:, cols], lam_h)
+            g_a = _poisson_from_uniforms(u_away[:, cols], lam_a)
+        else:
+            g_h = np.minimum(rng.poisson(lam_h), 127)
+            g_a = np.minimum(rng.poisson(lam_a), 127)
+        goals_home[:, cols] = g_h
+        goals_away[:, cols] = g_a
+
+        # Skriv runden inn i bufferne: gf, ga, xg (= lambda), xg_conceded
+        teams = np.concatenate([h, a])
+        values = np.stack(
+            [
+                np.concatenate([g_h, g_a], axis=1),
+                np.concatenate([g_a, g_h], axis=1),
+                np.concatenate([lam_h, lam_a], axis=1),
+                np.concatenate([lam_a, lam_h], axis=1),
+            ]
+        ).transpose(2, 0, 1)  # lag × statistikk × n_sims
+        if len(np.unique(teams)) == len(teams):
+            _push(state, teams, values)
+        else:
+            # Utsatte kamper: et lag kan spille flere ganger i samme runde
+            for j in range(len(teams)):
+                _push(state, teams[j : j + 1], values[j : j + 1])
+
+    return goals_home, goals_away
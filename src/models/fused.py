@@ -0,0 +1,169 @@
+# File: src/models/fused.py
+"""
+Lightweight predictor for the fused linear artifact ({league}_fused.npz)
+written by train_league (see train.fused_predictor).
+
+The StandardScaler is folded into the Poisson coefficients, so a lambda is
+exp(intercept + x · weights + is_home · home_weight + att[team] + def[opponent])
+on unscaled features. Nothing here imports sklearn or scipy: loading the
+artifact and predicting only needs NumPy (and pandas for the input frame).
+
+    predictor = load_fused_predictor("Premier League", "data/models")
+    lam_home, lam_away = fused_lambdas(predictor, df, features_home, features_away)
+
+predict.predict_poisson_from_models uses this artifact when it is current
+(see predict.load_fused_for_league); it also works without the joblib files.
+"""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def folded_linear_predictor(model, scaler) -> tuple[np.ndarray, float]:
+    """
+    Fold a StandardScaler into a linear model: log λ = b + w · x on unscaled
+    features (order as scaler.feature_names_in_), with w = coef / scale and
+    b = intercept - w · mean. Zero or missing scales count as 1.
+    """
+    n = len(model.coef_)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+    w = model.coef_ / np.where(scale == 0, 1.0, scale)
+    return w, float(model.intercept_ - w @ mean)
+
+
+def load_fused_predictor(league_name: str, models_dir: str = "models") -> dict:
+    """
+    Read {league}_fused.npz. Returns dict with intercept, features (column
+    names without _home/_away), weights, home_weight, teams and att/def
+    weights per team, plus team_index (team → row in att/def). The last
+    row of att/def is 0 and is used for teams the model has not seen.
+    model_hash is the sha256 of the model files it was folded from (None
+    for artifacts written before it was stored).
+    """
+    key = league_name.lower().replace(" ", "_")
+    path = os.path.join(models_dir, f"{key}_fused.npz")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Fused predictor not found for league: {league_name}")
+    with np.load(path) as data:
+        teams = [str(t) for t in data["teams"]]
+        return {
+            "intercept": float(data["intercept"]),
+            "features": [str(f) for f in data["features"]],
+            "weights": data["weights"].astype(float),
+            "home_weight": float(data["home_weight"]),
+            "teams": teams,
+            "team_index": {t: i for i, t in enumerate(teams)},
+            "att": np.append(data["att"].astype(float), 0.0),
+            "def": np.append(data["def"].astype(float), 0.0),
+            "model_hash": str(data["model_hash"]) if "model_hash" in data else None,
+        }
+
+
+def _feature_matrix(
+    predictor: dict, df: pd.DataFrame, features: list[str]
+) -> np.ndarray:
+    """Unscaled inputs in the predictor's column order; missing columns are 0."""
+    by_name = {c.replace("_home", "").replace("_away", ""): c for c in features}
+    present = [k for k, name in enumerate(predictor["features"]) if name in by_name]
+    X = np.zeros((len(df), len(predictor["features"])))
+    columns = [by_name[predictor["features"][k]] for k in present]
+    X[:, present] = df[columns].to_numpy(dtype=float)
+    return np.nan_to_num(X, nan=0.0)
+
+
+def team_indices(predictor: dict, teams) -> np.ndarray:
+    """Rows in att/def for `teams`; unseen teams get the zero row."""
+    unknown = len(predictor["teams"])
+    index = predictor["team_index"]
+    return np.array([index.get(t, unknown) for t in teams], dtype=np.intp)
+
+
+def lambdas_from_arrays(
+    predictor: dict,
+    X_home: np.ndarray,
+    X_away: np.ndarray,
+    home: np.ndarray,
+    away: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Core of the predictor on plain arrays: X_home/X_away are unscaled
+    features (n × len(features)) and home/away rows from team_indices.
+    """
+    att, def_, w = predictor["att"], predictor["def"], predictor["weights"]
+    base = predictor["intercept"]
+    eta_home = base + X_home @ w + predictor["home_weight"] + att[home] + def_[away]
+    eta_away = base + X_away @ w + att[away] + def_[home]
+    return np.exp(eta_home), np.exp(eta_away)
+
+
+def fused_lambdas(
+    predictor: dict,
+    df: pd.DataFrame,
+    features_home: list[str],
+    features_away: list[str],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Expected goals (lambda_home, lambda_away) for every match in `df`,
+    matching model.predict(scaler.transform(...)) in predict.py.
+    """
+    return lambdas_from_arrays(
+        predictor,
+        _feature_matrix(predictor, df, features_home),
+        _feature_matrix(predictor, df, features_away),
+        team_indices(predictor, df["home_team"]),
+        team_indices(predictor, df["away_team"]),
+    )
+
+
+def poisson_pmf(lam: np.ndarray, max_goals: int) -> np.ndarray:
+    """
+    (n × max_goals+1) Poisson PMF via logs, without scipy. Also used by
+    predict.score_matrices; λ = 0 puts all mass on 0 goals.
+    """
+    goals = np.arange(max_goals + 1)
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(goals[1:]))])
+    lam = np.asarray(lam, dtype=float)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_term = np.where(goals == 0, 0.0, goals * np.log(lam))
+    return np.exp(log_term - lam - log_fact)
+
+
+def predict_fused(
+    predictor: dict,
+    df: pd.DataFrame,
+    features_home: list[str],
+    features_away: list[str],
+    max_goals: int = 10,
+    boost: bool = True,
+) -> pd.DataFrame:
+    """
+    Same output as predict.predict_poisson_from_models (date, time, teams,
+    1X2 probabilities and lambdas), computed from the fused artifact.
+    """
+    df = df.reset_index(drop=True)
+    lambda_home, lambda_away = fused_lambdas(
+        predictor, df, features_home, features_away
+    )
+    lam_h, lam_a = lambda_home, lambda_away
+    if boost:
+        # Same boosting factor as predict_poisson_from_models
+        alpha = 0.3
+        ratio = lambda_home / lambda_away
+        lam_h = lambda_home * ratio**alpha
+        lam_a = lambda_away * (1 / ratio) ** alpha
+
+    scores = (
+        poisson_pmf(lam_h, max_goals)[:, :, None]
+        * poisson_pmf(lam_a, max_goals)[:, None, :]
+    )
+    out = df[["date", "time", "home_team", "away_team"]].copy()
+    out["prob_home"] = np.tril(scores, -1).sum(axis=(1, 2))
+    out["prob_draw"] = np.trace(scores, axis1=1, axis2=2)
+    out["prob_away"] = np.triu(scores, 1).sum(axis=(1, 2))
+    out["lambda_home"] = lambda_home
+    out["lambda_away"] = lambda_away
+    return out
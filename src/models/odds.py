@@ -2,12 +2,37 @@
 import pandas as pd
 import numpy as np
 from scipy.stats import poisson
+from config.settings import DATA_PATH
 from src.models.predict import (
+    build_feature_lists,
     load_models_for_league,
     compute_match_outcome_probabilities,
-    _add_team_dummies
+    outcome_probabilities,
+    score_matrices,
+    _scaled_design,
 )  # :contentReference[oaicite:0]{index=0}
 
+# Markeder som price_markets kan prise
+MARKETS = ("1x2", "double_chance", "btts", "over_under", "correct_score")
+OVER_UNDER_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+# Riktig resultat prises for 0..CORRECT_SCORE_MAX mål per lag, resten er "Annet"
+CORRECT_SCORE_MAX = 5
+
+
+def _lambda_arrays(
+    df: pd.DataFrame,
+    features_home: list[str],
+    features_away: list[str],
+    league: str,
+    models_dir: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(lam_h, lam_a) for alle kampene i df med én modellkjøring."""
+    model, scaler = load_models_for_league(league, models_dir)
+    df = df.reset_index(drop=True)
+    X_scaled = _scaled_design(df, features_home, features_away, scaler)
+    lambdas = np.asarray(model.predict(X_scaled), dtype=float)
+    return lambdas[: len(df)], lambdas[len(df) :]
+
 
 def _get_lambdas(
     df: pd.DataFrame,
@@ -20,36 +45,8 @@ def _get_lambdas(
     Laster modell + scaler og returnerer (lam_h, lam_a) for én kamp,
     ved å align’e X_all etter scaler.feature_names_in_, med team-dummies.
     """
-    # 1) Last inn modell og scaler
-    model, scaler = load_models_for_league(league, models_dir)
-
-    # --- Bygg feature-matriser ---
-    # 2) Hjemme-features
-    Xh = df[features_home].copy()
-    Xh.columns = [c.replace("_home", "").replace("_away", "") for c in Xh.columns]
-    Xh["is_home"] = 1
-    Xh = Xh.fillna(0)
-
-    # 3) Borte-features
-    Xa = df[features_away].copy()
-    Xa.columns = [c.replace("_away", "").replace("_home", "") for c in Xa.columns]
-    Xa["is_home"] = 0
-    Xa = Xa.fillna(0)
-    
-    # 4) Legg på team-dummies akkurat som i predict_poisson_from_models
-    dum_h, dum_a = _add_team_dummies(df, df)
-    Xh = pd.concat([Xh, dum_h], axis=1)
-    Xa = pd.concat([Xa, dum_a], axis=1)
-
-    # 5) Slå sammen, fyll missing og reindex mot scaler
-    X_all = pd.concat([Xh, Xa], ignore_index=True).fillna(0)
-    X_all = X_all.reindex(columns=scaler.feature_names_in_, fill_value=0)
-
-    # 6) Skaler og prediker lambdas
-    X_scaled = scaler.transform(X_all)
-    lambdas = model.predict(X_scaled)
-
-    return lambdas[0], lambdas[1]
+    lam_h, lam_a = _lambda_arrays(df, features_home, features_away, league, models_dir)
+    return lam_h[0], lam_a[0]
 
 
 def calculate_hub_odds(
@@ -168,3 +165,147 @@ def calculate_over_under_odds(
             },
         ]
     )
+
+
+def _market_frame(
+    market: str, selections: list[str], lines: list, probs: np.ndarray
+) -> pd.DataFrame:
+    """Long-format rader for ett marked: probs er (n_kamper × n_valg)."""
+    n_matches, n_sel = probs.shape
+    return pd.DataFrame(
+        {
+            "match": np.repeat(np.arange(n_matches), n_sel),
+            "market": market,
+            "selection": np.tile(selections, n_matches),
+            "line": np.tile(np.asarray(lines, dtype=float), n_matches),
+            "probability": probs.ravel(),
+        }
+    )
+
+
+def _check_lines(lines, max_goals: int) -> None:
+    """
+    Over/Under prises bare for halve linjer innenfor resultatmatrisen:
+    en hel linje har push (total == linjen) som ikke er Over eller Under,
+    og linjer fra 2 * max_goals og opp har ingen Over-masse i matrisen.
+    """
+    arr = np.asarray(lines, dtype=float)
+    if arr.ndim != 1 or arr.size == 0:
+        raise ValueError("lines må være en ikke-tom liste med linjer")
+    not_half = arr[(arr - np.floor(arr)) != 0.5]
+    if not_half.size:
+        raise ValueError(
+            "Over/Under-linjer må være halve mål (0.5, 1.5, ...), "
+            f"fikk {list(not_half)}"
+        )
+    outside = arr[(arr < 0) | (arr >= 2 * max_goals)]
+    if outside.size:
+        raise ValueError(
+            f"Over/Under-linjer må ligge mellom 0.5 og {2 * max_goals - 0.5} "
+            f"(max_goals={max_goals}), fikk {list(outside)}"
+        )
+
+
+def price_markets(
+    df: pd.DataFrame,
+    league: str,
+    markets: tuple[str, ...] = MARKETS,
+    features_home: list[str] | None = None,
+    features_away: list[str] | None = None,
+    models_dir: str | None = None,
+    lines: tuple[float, ...] = OVER_UNDER_LINES,
+    max_goals: int = 10,
+    boost: bool = False,
+) -> pd.DataFrame:
+    """
+    Priser alle valgte markeder for alle kampene i `df` i én omgang:
+    lambdas beregnes med én modellkjøring, og hver kamp får én
+    resultatmatrise (se predict.score_matrices) som alle markedene leses fra.
+
+    Markeder (`markets`):
+      - 1x2:           Hjemmeseier / Uavgjort / Borteseier
+      - double_chance: 1X / 12 / X2
+      - btts:          Ja / Nei (begge lag scorer)
+      - over_under:    Over / Under for hver linje i `lines`; bare halve
+                       linjer (0.5, 1.5, ...) under 2 * max_goals, ellers
+                       ValueError (hele linjer ville gitt push)
+      - correct_score: "i-j" for 0..CORRECT_SCORE_MAX mål per lag, pluss "Annet"
+
+    Med `boost=True` brukes samme alpha-justering av lambdas som i
+    predict_poisson_from_models, for alle markeder. Feature-listene er som i
+    simuleringen hvis de ikke gis.
+
+    Returnerer long-format DataFrame med én rad per (kamp, marked, valg):
+    date, time, home_team, away_team, market, selection, line (NaN utenom
+    over_under), probability og fair_odds (1 / probability).
+    """
+    unknown = [m for m in markets if m not in MARKETS]
+    if unknown:
+        raise ValueError(f"Ukjente markeder: {unknown}")
+    if "over_under" in markets:
+        _check_lines(lines, max_goals)
+    if features_home is None or features_away is None:
+        features_home, features_away = build_feature_lists()
+    if models_dir is None:
+        models_dir = f"{DATA_PATH}/models"
+
+    df = df.reset_index(drop=True)
+    lam_h, lam_a = _lambda_arrays(df, features_home, features_away, league, models_dir)
+    if boost:
+        alpha = 0.3
+        ratio = lam_h / lam_a
+        lam_h, lam_a = lam_h * ratio**alpha, lam_a * (1 / ratio) ** alpha
+    scores = score_matrices(lam_h, lam_a, max_goals)
+    p_h, p_d, p_a = outcome_probabilities(scores)
+
+    frames = []
+    for market in markets:
+        if market == "1x2":
+            selections = ["Hjemmeseier", "Uavgjort", "Borteseier"]
+            probs = np.column_stack([p_h, p_d, p_a])
+            market_lines = [np.nan] * 3
+        elif market == "double_chance":
+            selections = ["1X", "12", "X2"]
+            probs = np.column_stack([p_h + p_d, p_h + p_a, p_d + p_a])
+            market_lines = [np.nan] * 3
+        elif market == "btts":
+            p_yes = scores[:, 1:, 1:].sum(axis=(1, 2))
+            selections = ["Ja", "Nei"]
+            probs = np.column_stack([p_yes, 1 - p_yes])
+            market_lines = [np.nan] * 2
+        elif market == "over_under":
+            # Masse per totalt antall mål, deretter kumulativt for alle linjer
+            goals = np.add.outer(np.arange(max_goals + 1), np.arange(max_goals + 1))
+            per_total = np.stack(
+                [scores[:, goals == k].sum(axis=1) for k in range(2 * max_goals + 1)],
+                axis=1,
+            )
+            cum = np.cumsum(per_total, axis=1)
+            under = cum[:, np.floor(np.asarray(lines, dtype=float)).astype(int)]
+            selections = [s for _ in lines for s in ("Over", "Under")]
+            probs = np.stack([1 - under, under], axis=2).reshape(len(df), -1)
+            market_lines = [line for line in lines for _ in range(2)]
+        else:
+            top = min(CORRECT_SCORE_MAX, max_goals) + 1
+            exact = scores[:, :top, :top].reshape(len(df), -1)
+            selections = [f"{i}-{j}" for i in range(top) for j in range(top)]
+            selections.append("Annet")
+            rest = np.clip(1 - exact.sum(axis=1), 0.0, 1.0)
+            probs = np.column_stack([exact, rest])
+            market_lines = [np.nan] * len(selections)
+        frames.append(_market_frame(market, selections, market_lines, probs))
+
+    out = pd.concat(frames, ignore_index=True).sort_values("match", kind="stable")
+    fixtures = df[["date", "time", "home_team", "away_team"]]
+    out = pd.concat(
+        [
+            fixtures.iloc[out["match"]].reset_index(drop=True),
+            out.reset_index(drop=True),
+        ],
+        axis=1,
+    ).drop(columns="match")
+    with np.errstate(divide="ignore"):
+        out["fair_odds"] = np.where(
+            out["probability"] > 0, 1 / out["probability"], np.nan
+        )
+    return out
@@ -1,8 +1,42 @@
+import hashlib
 import os
-import joblib
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
-from scipy.stats import poisson
+
+from src.models.fused import fused_lambdas, load_fused_predictor, poisson_pmf
+
+# Rolling windows behind the model features; keep in sync with the
+# predictions page
+STAT_WINDOWS = {"xg": [5, 10], "gf": [5, 10], "ga": [5, 10]}
+
+# Process-wide cache of loaded model artifacts (see _cached_load)
+MODEL_CACHE_SIZE = 16
+_MODEL_CACHE: OrderedDict = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def build_feature_lists() -> tuple[list[str], list[str]]:
+    """
+    Home and away feature columns used by the pipeline: attacking stats
+    for the team itself, defensive stats for its opponent.
+    """
+    features_home = (
+        [f"xg_home_roll{w}" for w in STAT_WINDOWS["xg"]]
+        + [f"gf_home_roll{w}" for w in STAT_WINDOWS["gf"]]
+        + [f"xg_conceded_away_roll{w}" for w in STAT_WINDOWS["xg"]]
+        + [f"ga_away_roll{w}" for w in STAT_WINDOWS["ga"]]
+        + ["avg_goals_for_home", "avg_goals_against_away"]
+    )
+    features_away = (
+        [f"xg_away_roll{w}" for w in STAT_WINDOWS["xg"]]
+        + [f"gf_away_roll{w}" for w in STAT_WINDOWS["gf"]]
+        + [f"xg_conceded_home_roll{w}" for w in STAT_WINDOWS["xg"]]
+        + [f"ga_home_roll{w}" for w in STAT_WINDOWS["ga"]]
+        + ["avg_goals_for_away", "avg_goals_against_home"]
+    )
+    return features_home, features_away
 
 def _add_team_dummies(df_home, df_away):
     att_home = pd.get_dummies(df_home["home_team"], prefix="att")
@@ -13,18 +47,246 @@ def _add_team_dummies(df_home, df_away):
     Xa = pd.concat([att_away, def_away], axis=1)
     return Xh.align(Xa, join="outer", axis=1, fill_value=0)
 
+def _file_stamps(paths: tuple[str, ...]) -> tuple:
+    return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, paths))
+
+
+def _cached_load(paths: tuple[str, ...], loader, attempts: int = 3):
+    """
+    Return loader() for the artifact files in `paths`, cached per process.
+    Entries are keyed by the absolute paths and validated against each
+    file's mtime and size, so artifacts rewritten by train_league are
+    reloaded on the next call. The least recently used entry is evicted
+    beyond MODEL_CACHE_SIZE.
+
+    The stamps are read before and after loading; if a file changed in
+    between (rewritten mid-load), the load is retried, so a value is never
+    cached under a stamp it was not loaded from. If the files keep changing
+    for `attempts` loads, the last value is returned without caching it.
+    """
+    key = tuple(os.path.abspath(p) for p in paths)
+    for _ in range(attempts):
+        stamp = _file_stamps(paths)
+        with _MODEL_CACHE_LOCK:
+            cached = _MODEL_CACHE.get(key)
+            if cached is not None and cached[0] == stamp:
+                _MODEL_CACHE.move_to_end(key)
+                return cached[1]
+
+        value = loader()
+        if _file_stamps(paths) != stamp:
+            continue
+        with _MODEL_CACHE_LOCK:
+            _MODEL_CACHE[key] = (stamp, value)
+            _MODEL_CACHE.move_to_end(key)
+            while len(_MODEL_CACHE) > MODEL_CACHE_SIZE:
+                _MODEL_CACHE.popitem(last=False)
+        return value
+    return value
+
+
+def clear_model_cache() -> None:
+    """Drop all cached model artifacts."""
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE.clear()
+
+
+def _model_files(league_name: str, models_dir: str) -> tuple[str, str]:
+    key = league_name.lower().replace(" ", "_")
+    return (
+        os.path.join(models_dir, f"{key}_model.joblib"),
+        os.path.join(models_dir, f"{key}_scaler.joblib"),
+    )
+
+
+def _model_paths(league_name: str, models_dir: str) -> tuple[str, str]:
+    """Paths of the saved model and scaler; FileNotFoundError if either is missing."""
+    paths = _model_files(league_name, models_dir)
+    if not all(os.path.exists(p) for p in paths):
+        raise FileNotFoundError(f"Model or scaler not found for league: {league_name}")
+    return paths
+
+
+def model_sha256(league_name: str, models_dir: str = "models") -> str:
+    """
+    sha256 over the saved model and scaler files. Stored with artifacts
+    derived from them (the coefficient ensemble) to detect a mismatch.
+    """
+    digest = hashlib.sha256()
+    for path in _model_paths(league_name, models_dir):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
 def load_models_for_league(league_name: str, models_dir: str = "models") -> tuple:
     """
     Load a single Poisson model and scaler for a league.
+    Cached per process and reloaded when the files change (see _cached_load).
+    """
+    # joblib (and the sklearn classes it unpickles) is only needed here, so
+    # serving from the fused predictor works without either installed
+    import joblib
+
+    model_path, scaler_path = _model_paths(league_name, models_dir)
+    return _cached_load(
+        (model_path, scaler_path),
+        lambda: (joblib.load(model_path), joblib.load(scaler_path)),
+    )
+
+
+def _current_fused(
+    league_name: str, models_dir: str, model_paths: tuple[str, ...]
+) -> dict | None:
+    predictor = load_fused_predictor(league_name, models_dir)
+    if not model_paths:
+        return predictor
+    current = predictor["model_hash"] == model_sha256(league_name, models_dir)
+    return predictor if current else None
+
+
+def load_fused_for_league(league_name: str, models_dir: str = "models") -> dict | None:
+    """
+    The league's fused predictor ({league}_fused.npz, see src/models/fused.py),
+    or None when there is none or it is stale.
+
+    The artifact stands on its own: without the model and scaler files
+    (a deployment that ships only fused.npz) it is used as is. When they
+    exist, its model_hash must match them (see model_sha256), so a retrain
+    that did not rewrite fused.npz falls back to the pickled pair. The
+    check runs once per change of the files; the result is cached like
+    load_models_for_league.
     """
     key = league_name.lower().replace(" ", "_")
-    model_path = os.path.join(models_dir, f"{key}_model.joblib")
-    scaler_path = os.path.join(models_dir, f"{key}_scaler.joblib")
-    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-        raise FileNotFoundError(f"Model or scaler not found for league: {league_name}")
-    model = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
-    return model, scaler
+    path = os.path.join(models_dir, f"{key}_fused.npz")
+    if not os.path.exists(path):
+        return None
+    model_paths = _model_files(league_name, models_dir)
+    if not all(os.path.exists(p) for p in model_paths):
+        model_paths = ()
+    return _cached_load(
+        (path, *model_paths),
+        lambda: _current_fused(league_name, models_dir, model_paths),
+    )
+
+
+def _load_ensemble_arrays(path: str, league_name: str, models_dir: str) -> dict:
+    with np.load(path) as data:
+        stored = str(data["model_hash"]) if "model_hash" in data else None
+        ensemble = {"intercept": data["intercept"], "coef": data["coef"]}
+    if stored != model_sha256(league_name, models_dir):
+        raise ValueError(
+            f"Coefficient ensemble for {league_name} was not drawn from the "
+            "current model; retrain with train_league(n_ensemble=...)"
+        )
+    # Shared through the cache: keep the arrays read-only
+    for arr in ensemble.values():
+        arr.flags.writeable = False
+    return ensemble
+
+
+def load_coefficient_ensemble(league_name: str, models_dir: str = "models") -> dict:
+    """
+    Load the coefficient ensemble saved by train_league(n_ensemble=...).
+    Returns dict with `intercept` (n_draws,) and `coef` (n_draws × n_features),
+    cached like load_models_for_league.
+
+    Raises ValueError if the ensemble's `model_hash` does not match the
+    current model and scaler files (see model_sha256), e.g. after a retrain
+    that stopped before the ensemble was rewritten.
+    """
+    key = league_name.lower().replace(" ", "_")
+    path = os.path.join(models_dir, f"{key}_ensemble.npz")
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Coefficient ensemble not found for league: {league_name}"
+        )
+    paths = (path, *_model_paths(league_name, models_dir))
+    return dict(
+        _cached_load(
+            paths, lambda: _load_ensemble_arrays(path, league_name, models_dir)
+        )
+    )
+
+
+def _scaled_design(
+    df: pd.DataFrame, features_home: list[str], features_away: list[str], scaler
+) -> np.ndarray:
+    """
+    Scaled model input for `df`: home-team rows first, then away-team rows
+    (2 * len(df) × n_features), columns as in scaler.feature_names_in_.
+    """
+    # Prepare home-team inputs
+    Xh = df[features_home].copy()
+    Xh.columns = [c.replace("_home", "").replace("_away", "") for c in Xh.columns]
+    Xh["is_home"] = 1
+    Xh = Xh.fillna(0)
+
+    # Prepare away-team inputs
+    Xa = df[features_away].copy()
+    Xa.columns = [c.replace("_home", "").replace("_away", "") for c in Xa.columns]
+    Xa["is_home"] = 0
+    Xa = Xa.fillna(0)
+
+    dum_h, dum_a = _add_team_dummies(df, df)
+    Xh = pd.concat([Xh, dum_h], axis=1)
+    Xa = pd.concat([Xa, dum_a], axis=1)
+
+    # Combine and scale
+    X_all = pd.concat([Xh, Xa], ignore_index=True)
+    X_all = X_all.reindex(columns=scaler.feature_names_in_, fill_value=0)
+    return scaler.transform(X_all)
+
+
+def ensemble_lambdas(
+    df: pd.DataFrame,
+    features_home: list[str],
+    features_away: list[str],
+    league_name: str,
+    models_dir: str = "models",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lambdas for every match in `df` under every coefficient draw in the
+    league's ensemble, computed as one matrix product over all draws.
+    Returns (lambda_home, lambda_away), each (len(df) × n_draws).
+    """
+    _, scaler = load_models_for_league(league_name, models_dir)
+    ensemble = load_coefficient_ensemble(league_name, models_dir)
+    df = df.reset_index(drop=True)
+    X_scaled = np.asarray(
+        _scaled_design(df, features_home, features_away, scaler), dtype=float
+    )
+    lambdas = np.exp(X_scaled @ ensemble["coef"].T + ensemble["intercept"])
+    return lambdas[: len(df)], lambdas[len(df) :]
+
+
+def score_matrices(lam_home, lam_away, max_goals: int = 10) -> np.ndarray:
+    """
+    Batched scoreline probabilities for independent Poisson goals.
+    Takes lambdas as scalars or 1-D arrays and returns an
+    (n_matches × max_goals+1 × max_goals+1) tensor where [m, i, j] is
+    P(home scores i, away scores j) in match m, built as the outer product
+    of the two vectorized PMF vectors.
+    """
+    lam_home = np.atleast_1d(np.asarray(lam_home, dtype=float))
+    lam_away = np.atleast_1d(np.asarray(lam_away, dtype=float))
+    pmf_home = poisson_pmf(lam_home, max_goals)
+    pmf_away = poisson_pmf(lam_away, max_goals)
+    return pmf_home[:, :, None] * pmf_away[:, None, :]
+
+
+def outcome_probabilities(
+    scores: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Home win, draw and away win probabilities from score_matrices output,
+    as masked reductions over the last two axes (below, on and above the
+    diagonal). Returns three arrays of shape (n_matches,).
+    """
+    prob_home = np.tril(scores, -1).sum(axis=(-2, -1))
+    prob_draw = np.trace(scores, axis1=-2, axis2=-1)
+    prob_away = np.triu(scores, 1).sum(axis=(-2, -1))
+    return prob_home, prob_draw, prob_away
 
 
 def compute_match_outcome_probabilities(
@@ -33,14 +295,10 @@ def compute_match_outcome_probabilities(
     """
     Compute probabilities of home win, draw, and away win from Poisson lambdas.
     """
-    prob_matrix = np.zeros((max_goals + 1, max_goals + 1))
-    for i in range(max_goals + 1):
-        for j in range(max_goals + 1):
-            prob_matrix[i, j] = poisson.pmf(i, lam_h) * poisson.pmf(j, lam_a)
-    prob_home = np.tril(prob_matrix, -1).sum()
-    prob_draw = np.trace(prob_matrix)
-    prob_away = np.triu(prob_matrix, 1).sum()
-    return prob_home, prob_draw, prob_away
+    prob_home, prob_draw, prob_away = outcome_probabilities(
+        score_matrices(lam_h, lam_a, max_goals)
+    )
+    return prob_home[0], prob_draw[0], prob_away[0]
 
 
 def predict_poisson_from_models(
@@ -51,6 +309,7 @@ def predict_poisson_from_models(
     models_dir: str = "models",
     max_goals: int = 10,
     boost: bool = True,
+    fused: bool = True,
 ) -> pd.DataFrame:
     """
     Predict match outcome probabilities using a single Poisson model.
@@ -62,66 +321,47 @@ def predict_poisson_from_models(
       - league_name: league identifier for loading the model
       - models_dir: directory with saved models
       - max_goals: max goals to consider for Poisson
+      - fused: use the fused predictor when it is current, falling back to
+        the pickled model and scaler otherwise (see load_fused_for_league)
 
     Returns:
       - DataFrame with date, teams, lambdas, and win/draw probabilities
     """
-    model, scaler = load_models_for_league(league_name, models_dir)
-
     df = df.reset_index(drop=True)
+    predictor = load_fused_for_league(league_name, models_dir) if fused else None
+    if predictor is not None:
+        # Unscaled features straight into the folded weights, no dummies
+        lambda_home, lambda_away = fused_lambdas(
+            predictor, df, features_home, features_away
+        )
+    else:
+        model, scaler = load_models_for_league(league_name, models_dir)
+        X_scaled = _scaled_design(df, features_home, features_away, scaler)
 
-    # Prepare home-team inputs
-    Xh = df[features_home].copy()
-    Xh.columns = [c.replace("_home", "").replace("_away", "") for c in Xh.columns]
-    Xh["is_home"] = 1
-    Xh = Xh.fillna(0)
+        # Predict lambdas
+        lambdas = np.asarray(model.predict(X_scaled), dtype=float)
+        lambda_home = lambdas[: len(df)]
+        lambda_away = lambdas[len(df) :]
 
-    # Prepare away-team inputs
-    Xa = df[features_away].copy()
-    Xa.columns = [c.replace("_home", "").replace("_away", "") for c in Xa.columns]
-    Xa["is_home"] = 0
-    Xa = Xa.fillna(0)
-    
-    dum_h, dum_a = _add_team_dummies(df, df)
-    Xh = pd.concat([Xh, dum_h], axis=1)
-    Xa = pd.concat([Xa, dum_a], axis=1)
+    if boost:
+        # Boosting factor to adjust probabilities
+        alpha = 0.3
+        ratio = lambda_home / lambda_away
+        lam_h = lambda_home * ratio**alpha
+        lam_a = lambda_away * (1 / ratio) ** alpha
+    else:
+        lam_h = lambda_home
+        lam_a = lambda_away
+    # One batched score tensor for all matches
+    prob_home, prob_draw, prob_away = outcome_probabilities(
+        score_matrices(lam_h, lam_a, max_goals)
+    )
 
-    # Combine and scale
-    X_all = pd.concat([Xh, Xa], ignore_index=True)
-    X_all = X_all.reindex(columns=scaler.feature_names_in_, fill_value=0)
-    X_scaled = scaler.transform(X_all)
-
-    # Predict lambdas
-    lambdas = model.predict(X_scaled)
-    lambda_home = lambdas[: len(df)]
-    lambda_away = lambdas[len(df) :]
-
-    # Build results
-    records = []
-    for idx, row in df.iterrows():
-        if boost:
-            # Boosting factor to adjust probabilities
-            alpha = 0.3
-            ratio = lambda_home[idx] / lambda_away[idx]
-            X = ratio ** alpha
-            Y = (1 / ratio) ** alpha
-            lam_h = lambda_home[idx] * X
-            lam_a = lambda_away[idx] * Y
-        else:
-            lam_h = lambda_home[idx]
-            lam_a = lambda_away[idx]
-        p_h, p_d, p_a = compute_match_outcome_probabilities(lam_h, lam_a, max_goals)
-        records.append(
-            {
-                "date": row["date"],
-                "time": row["time"],
-                "home_team": row["home_team"],
-                "away_team": row["away_team"],
-                "prob_home": p_h,
-                "prob_draw": p_d,
-                "prob_away": p_a,
-                "lambda_home": lambda_home[idx],
-                "lambda_away": lambda_away[idx],
-            }
-        )
-    return pd.DataFrame(records)
+    # Build results as whole columns
+    out = df[["date", "time", "home_team", "away_team"]].copy()
+    out["prob_home"] = prob_home
+    out["prob_draw"] = prob_draw
+    out["prob_away"] = prob_away
+    out["lambda_home"] = lambda_home
+    out["lambda_away"] = lambda_away
+    return out
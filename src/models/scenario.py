@@ -0,0 +1,274 @@
+# File: src/models/scenario.py
+"""
+Hva-om-scenarier: lås resultatet i utvalgte gjenstående kamper og få
+oppdaterte sannsynligheter for vinne/topp N/nedrykk.
+
+    what_if("Premier League", {("Arsenal", "Chelsea"): "B"})
+
+Svaret hentes fra lagrede simuleringer (simulate_season(store_outcomes=True))
+der det er mulig, i denne rekkefølgen:
+  1. betinget:   behold simuleringene der de låste kampene endte som angitt
+  2. omvektet:   for sjeldne scenarier, bytt ut utfallet i de låste kampene i
+                 alle lagrede simuleringer og ranger på nytt. Kampene trekkes
+                 uavhengig, så dette gir samme fordeling som betingingen,
+                 men med alle simuleringene som utvalg. Gjelder bare lagre i
+                 result-modus uten koeffisient-ensemble (der deler kampene i
+                 samme ENSEMBLE_BLOCK ett trekk og er ikke uavhengige), og
+                 bare ligaer der innbyrdes ikke brukes i result-modus (se
+                 tiebreak.available_rules): Premier League, Bundesliga og
+                 Ligue 1, men ikke La Liga og Serie A, der innbyrdes poeng
+                 følger rett etter poeng og ikke kan regnes fra lageret.
+  3. resimulert: ellers simuleres bare de ulåste kampene på nytt, med samme
+                 sesong, modus, CRN-frø og antitetiske par som det lagrede
+                 kjøret (standard result-modus når lageret mangler).
+                 Et lager i scoreline-modus kan bare betinges: H/U/B sier
+                 ingenting om målene, som teller i tiebreak, så resimulering
+                 gir ValueError.
+
+Et lager for en annen sesong, eller med andre data/modeller enn i dag
+(fingerprints, se simulate.data_fingerprints), gir ValueError i stedet for
+et svar betinget på utdaterte simuleringer.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.models.sim_query import load_outcomes
+from src.models.tiebreak import available_rules, uses_head_to_head
+from src.models.simulate import (
+    _rank_teams,
+    _position_counts,
+    _table_from_counts,
+    data_fingerprints,
+    prepare_season,
+    simulate_counts,
+)
+
+# Kamputfall som i simulate.py: 0 = hjemmeseier, 1 = uavgjort, 2 = borteseier
+RESULT_CODES = {"H": 0, "U": 1, "B": 2}
+HOME_POINTS = np.array([3, 1, 0], dtype=np.int64)
+AWAY_POINTS = np.array([0, 1, 3], dtype=np.int64)
+
+
+def _pinned_codes(pinned: dict[tuple[str, str], str]) -> dict[tuple[str, str], int]:
+    codes = {}
+    for fixture, result in pinned.items():
+        if result not in RESULT_CODES:
+            raise ValueError(f"Ukjent resultat {result!r} for {fixture}; bruk H/U/B")
+        codes[tuple(fixture)] = RESULT_CODES[result]
+    return codes
+
+
+def pin_results(
+    context: dict, pinned: dict[tuple[str, str], str], mode: str = "result"
+) -> dict:
+    """
+    Ny sesongkontekst der de låste kampene regnes som spilt: poengene legges
+    til base_points (og innbyrdes poeng, hvis ligaen bruker dem) og kampene
+    fjernes fra fixtures.
+
+    Bare for `mode="result"`: i de andre modusene teller mål i tiebreak
+    (målforskjell, scorede, innbyrdes målforskjell), og et låst H/U/B gir
+    ingen mål å legge til, så det gir ValueError.
+    """
+    if mode != "result":
+        raise ValueError(
+            f"Låste H/U/B-resultater kan ikke simuleres i mode={mode!r}: "
+            "målene i de låste kampene er ukjente, men teller i tiebreak"
+        )
+    codes = _pinned_codes(pinned)
+    fixtures = context["fixtures"]
+    teams = context["teams"]
+    names = [
+        (teams[h], teams[a]) for h, a in zip(fixtures["home_idx"], fixtures["away_idx"])
+    ]
+    missing = [f for f in codes if f not in names]
+    if missing:
+        raise KeyError(f"Ikke gjenstående kamper: {missing}")
+
+    base_points = context["base_points"].copy()
+    h2h = context["h2h_points"].copy() if "h2h_points" in context else None
+    keep = np.ones(len(names), dtype=bool)
+    for j, fixture in enumerate(names):
+        if fixture in codes:
+            code = codes[fixture]
+            h, a = fixtures["home_idx"][j], fixtures["away_idx"][j]
+            base_points[h] += HOME_POINTS[code]
+            base_points[a] += AWAY_POINTS[code]
+            if h2h is not None:
+                h2h[h, a] += HOME_POINTS[code]
+                h2h[a, h] += AWAY_POINTS[code]
+            keep[j] = False
+
+    out = {
+        **context,
+        "fixtures": {k: v[keep] for k, v in fixtures.items()},
+        "base_points": base_points,
+    }
+    if h2h is not None:
+        out["h2h_points"] = h2h
+    return out
+
+
+def _from_store(
+    outcomes: dict,
+    codes: dict[tuple[str, str], int],
+    min_samples: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, str] | None:
+    """
+    Posisjonsmatrise fra lagrede simuleringer, eller None hvis lageret ikke
+    kan svare (mangler kamputfall/kamper, eller for få treff i scoreline-modus).
+    """
+    stored = outcomes["outcomes"]
+    fixtures = outcomes["fixtures"]
+    if stored is None or any(f not in fixtures for f in codes):
+        return None
+
+    n_teams = len(outcomes["teams"])
+    cols = np.array([fixtures.index(f) for f in codes], dtype=np.intp)
+    wanted = np.array(list(codes.values()), dtype=np.int8)
+    match = (stored[:, cols] == wanted).all(axis=1)
+
+    if np.count_nonzero(match) >= min_samples:
+        ranks = np.asarray(outcomes["ranks"][match], dtype=np.int64)
+        order = np.argsort(ranks, axis=1)
+        return _position_counts(order, n_teams), "betinget"
+
+    # Målforskjell og innbyrdes historikk er ikke lagret, så omvekting krever
+    # tilfeldig tiebreak. Med ensemble deler kampene i en ENSEMBLE_BLOCK
+    # samme koeffisienttrekk, så utfallene kan ikke byttes ut enkeltvis.
+    meta = outcomes["meta"]
+    if meta.get("mode", "result") != "result" or len(stored) == 0:
+        return None
+    if meta.get("ensemble"):
+        return None
+    if uses_head_to_head(available_rules(tuple(meta.get("tiebreak", ())), False)):
+        return None
+
+    team_idx = {t: i for i, t in enumerate(outcomes["teams"])}
+    points = np.array(outcomes["points"], dtype=np.int64)
+    for col, (home, away), code in zip(cols, codes, wanted):
+        old = stored[:, col]
+        points[:, team_idx[home]] += HOME_POINTS[code] - HOME_POINTS[old]
+        points[:, team_idx[away]] += AWAY_POINTS[code] - AWAY_POINTS[old]
+    order = _rank_teams(points, rng)
+    return _position_counts(order, n_teams), "omvektet"
+
+
+def _check_store(
+    meta: dict, league_name: str, season: str | None, models_dir: str | None
+) -> None:
+    """
+    ValueError hvis lageret gjelder en annen sesong enn `season`, eller hvis
+    processed-data/modellfilene er endret siden det ble skrevet. Lagre uten
+    fingerprints (eldre format) kan ikke kontrolleres og godtas.
+    """
+    if season is not None and season != meta["season"]:
+        raise ValueError(
+            f"Lagrede simuleringer gjelder {meta['season']}, ikke {season}"
+        )
+    stored = meta.get("fingerprints")
+    if stored is None:
+        return
+    current = data_fingerprints(league_name, models_dir, meta.get("ensemble", False))
+    if stored != current:
+        keys = set(stored) | set(current)
+        changed = sorted(k for k in keys if stored.get(k) != current.get(k))
+        raise ValueError(
+            f"Lagrede simuleringer for {league_name} er utdatert ({changed} er "
+            "endret); kjør simuleringen på nytt med store_outcomes"
+        )
+
+
+def what_if(
+    league_name: str,
+    pinned: dict[tuple[str, str], str],
+    top_n: int = 5,
+    relegation_spots: int = 3,
+    min_samples: int = 1000,
+    sim_dir: str | None = None,
+    n_sims: int = 10_000,
+    seed: int | None = None,
+    season: str | None = None,
+    models_dir: str | None = None,
+) -> dict:
+    """
+    Sannsynligheter gitt låste resultater.
+
+    Parametre:
+      - pinned:      {(hjemmelag, bortelag): "H" | "U" | "B"}
+      - min_samples: minste antall lagrede simuleringer som må matche
+                     scenarioet for å betinge direkte
+      - season:      må stemme med lageret hvis det finnes (ellers ValueError)
+      - n_sims/seed/models_dir: brukes bare ved resimulering
+
+    Finnes et lager, resimuleres det med lagerets sesong, modus, CRN-frø,
+    antitetiske par og ensemble. Resimulering støttes bare i result-modus:
+    i scoreline og dynamic gir et låst H/U/B ingen mål (og ingen formtilstand)
+    å bygge videre på, så det gir ValueError (se pin_results).
+
+    Returnerer dict med:
+      - table:     som run_simulations (P(vinne), P(topp N), P(nedrykk))
+      - positions: DataFrame (lag × plass 1..N) med antall per plass
+      - method:    "betinget", "omvektet" eller "resimulert"
+      - n_sims:    antall simuleringer svaret bygger på
+    """
+    codes = _pinned_codes(pinned)
+    rng = np.random.default_rng(seed)
+
+    result = None
+    meta = {}
+    try:
+        outcomes = load_outcomes(league_name, sim_dir)
+    except FileNotFoundError:
+        outcomes = None
+    if outcomes is not None:
+        meta = outcomes["meta"]
+        _check_store(meta, league_name, season, models_dir)
+        result = _from_store(outcomes, codes, min_samples, rng)
+
+    if result is not None:
+        counts, method = result
+        teams = outcomes["teams"]
+    else:
+        mode = meta.get("mode", "result")
+        if mode != "result":
+            raise ValueError(
+                "For få lagrede simuleringer matcher scenarioet, og lageret er "
+                f"i mode={mode!r}, som ikke kan resimuleres med låste H/U/B; "
+                "senk min_samples eller lagre et kjør i result-modus"
+            )
+        context = pin_results(
+            prepare_season(
+                league_name,
+                season=meta.get("season", season),
+                models_dir=models_dir,
+                ensemble=meta.get("ensemble", False),
+            ),
+            pinned,
+            mode,
+        )
+        counts = simulate_counts(
+            context,
+            n_sims,
+            seed=seed,
+            mode=mode,
+            crn_seed=meta.get("crn_seed"),
+            antithetic=meta.get("antithetic", False),
+        )["positions"]
+        method = "resimulert"
+        teams = context["teams"]
+
+    positions = pd.DataFrame(
+        counts,
+        index=pd.Index(teams, name="Team"),
+        columns=range(1, len(teams) + 1),
+    )
+    return {
+        "table": _table_from_counts(positions, int(top_n), int(relegation_spots)),
+        "positions": positions,
+        "method": method,
+        "n_sims": int(counts[0].sum()),
+    }
@@ -0,0 +1,194 @@
+# File: src/models/sim_query.py
+"""
+Spørringer mot lagrede simuleringsutfall (se simulate_season(store_outcomes=True)).
+
+Hver liga har en minnemappet tensor med sluttplass (int8) og sluttpoeng (int16)
+per simulering og lag. Spørsmål besvares som vektoriserte boolske reduksjoner
+over simuleringsaksen, uten å simulere på nytt:
+
+    out = load_outcomes("Premier League")
+    p = probability(finishes_above(out, "Arsenal", "Liverpool"))
+    down = in_positions(out, promoted, 18, 20).sum(axis=1) >= 2
+    lev = match_leverage(out, {"vinne": (1, 1), "nedrykk": (18, 20)})
+"""
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.models.simulate import _store_paths
+
+
+def load_outcomes(league_name: str, sim_dir: str | None = None) -> dict:
+    """
+    Åpner lagret tensor for ligaen (read-only, minnemappet).
+
+    Returnerer dict med:
+      - teams:  lagnavn i kolonnerekkefølge
+      - ranks:  (n_sims × n_lag) int8, sluttplass 1..N
+      - points: (n_sims × n_lag) int16, sluttpoeng
+      - outcomes: (n_sims × n_kamper) int8, kamputfall 0=H/1=U/2=B
+                  (None for lagre som er eldre enn kamputfallene)
+      - fixtures: gjenstående kamper som [hjemmelag, bortelag]
+      - meta:   innholdet i {liga}_tensor.json
+    """
+    paths = _store_paths(league_name, sim_dir)
+    with open(paths["meta"], encoding="utf-8") as f:
+        meta = json.load(f)
+
+    # Filene kan ha flere rader enn brukt (adaptiv stopp); kun n_sims er gyldige
+    n = int(meta["n_sims"])
+    outcomes = None
+    if os.path.exists(paths["outcomes"]):
+        outcomes = np.load(paths["outcomes"], mmap_mode="r")[:n]
+    return {
+        "teams": meta["teams"],
+        "ranks": np.load(paths["ranks"], mmap_mode="r")[:n],
+        "points": np.load(paths["points"], mmap_mode="r")[:n],
+        "outcomes": outcomes,
+        "fixtures": [tuple(f) for f in meta.get("fixtures", [])],
+        "meta": meta,
+    }
+
+
+def _team_columns(outcomes: dict, teams: str | list[str]) -> np.ndarray:
+    names = [teams] if isinstance(teams, str) else list(teams)
+    index = {t: i for i, t in enumerate(outcomes["teams"])}
+    missing = [t for t in names if t not in index]
+    if missing:
+        raise KeyError(f"Ukjente lag: {missing}")
+    return np.array([index[t] for t in names], dtype=np.intp)
+
+
+def in_positions(
+    outcomes: dict, teams: str | list[str], first: int, last: int | None = None
+) -> np.ndarray:
+    """
+    Maske for at lag ender på plass first..last (1-indeksert, inkluderende).
+    Ett lag gir (n_sims,), en liste gir (n_sims × len(teams)).
+    """
+    last = first if last is None else last
+    cols = _team_columns(outcomes, teams)
+    ranks = outcomes["ranks"][:, cols]
+    mask = (ranks >= first) & (ranks <= last)
+    return mask[:, 0] if isinstance(teams, str) else mask
+
+
+def finishes_above(outcomes: dict, team_a: str, team_b: str) -> np.ndarray:
+    """Maske for at `team_a` ender over `team_b` i tabellen."""
+    a, b = _team_columns(outcomes, [team_a, team_b])
+    return outcomes["ranks"][:, a] < outcomes["ranks"][:, b]
+
+
+def points_at_least(outcomes: dict, team: str, points: int) -> np.ndarray:
+    """Maske for at laget ender med minst `points` poeng."""
+    col = _team_columns(outcomes, team)[0]
+    return outcomes["points"][:, col] >= points
+
+
+def probability(mask: np.ndarray) -> float:
+    """Andel simuleringer der masken er sann."""
+    return float(np.mean(mask)) if mask.size else float("nan")
+
+
+def joint_probability(*masks: np.ndarray) -> float:
+    """P(A og B og ...) for masker over samme simuleringer."""
+    return probability(np.logical_and.reduce(masks))
+
+
+def conditional_probability(event: np.ndarray, given: np.ndarray) -> float:
+    """P(event | given); NaN hvis betingelsen aldri inntreffer."""
+    n_given = int(np.count_nonzero(given))
+    if n_given == 0:
+        return float("nan")
+    return float(np.count_nonzero(event & given) / n_given)
+
+
+def match_leverage(
+    outcomes: dict,
+    zones: dict[str, tuple[int, int]],
+    chunk_size: int = 10_000,
+) -> pd.DataFrame:
+    """
+    Hvor mye hver gjenstående kamp flytter hvert lags sannsynlighet for hver
+    sone: sving = P(sone | hjemmeseier) - P(sone | borteseier).
+
+    Alt regnes i én passering over simuleringene: med O = kamputfall
+    (n_sims × n_kamper) og Z = soneindikatorer (n_sims × n_lag·n_soner) gir
+    (O == k).T @ Z antall treff per (kamp, lag, sone) gitt utfall k.
+    Blokker à `chunk_size` rader holder minnebruken nede.
+
+    Returnerer lang DataFrame med kolonnene home_team, away_team, Team, Sone,
+    P(H), P(B) og Sving (alle i %), sortert etter absolutt sving.
+    """
+    stored = outcomes.get("outcomes")
+    if stored is None:
+        raise ValueError(
+            "Lageret mangler kamputfall; simuler på nytt med store_outcomes"
+        )
+
+    teams = outcomes["teams"]
+    fixtures = outcomes["fixtures"]
+    n_sims, n_fixtures = stored.shape
+    n_teams, n_zones = len(teams), len(zones)
+
+    hits = np.zeros((2, n_fixtures, n_teams * n_zones))
+    games = np.zeros((2, n_fixtures))
+    for start in range(0, n_sims, chunk_size):
+        o = np.asarray(stored[start : start + chunk_size])
+        ranks = np.asarray(outcomes["ranks"][start : start + chunk_size])
+        z = np.concatenate(
+            [(ranks >= first) & (ranks <= last) for first, last in zones.values()],
+            axis=1,
+        ).astype(np.float32)
+        for i, code in enumerate((0, 2)):
+            mask = (o == code).astype(np.float32)
+            hits[i] += mask.T @ z
+            games[i] += mask.sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = 100.0 * hits / games[:, :, None]
+    # Akse 2 er sone-major: [sone0: lag0..lagN, sone1: ...]
+    p = p.reshape(2, n_fixtures, n_zones, n_teams)
+
+    f_idx, z_idx, t_idx = np.meshgrid(
+        np.arange(n_fixtures), np.arange(n_zones), np.arange(n_teams), indexing="ij"
+    )
+    p_home = p[0].ravel()
+    p_away = p[1].ravel()
+    out = pd.DataFrame(
+        {
+            "home_team": [fixtures[f][0] for f in f_idx.ravel()],
+            "away_team": [fixtures[f][1] for f in f_idx.ravel()],
+            "Team": np.asarray(teams)[t_idx.ravel()],
+            "Sone": np.asarray(list(zones))[z_idx.ravel()],
+            "P(H)": np.round(p_home, 1),
+            "P(B)": np.round(p_away, 1),
+            "Sving": np.round(p_home - p_away, 1),
+        }
+    )
+    order = np.argsort(-np.abs(out["Sving"].fillna(0.0).to_numpy()), kind="stable")
+    return out.iloc[order].reset_index(drop=True)
+
+
+def match_importance(leverage: pd.DataFrame, top: int | None = None) -> pd.DataFrame:
+    """
+    Rangerer kampene etter største absolutte sving for ett lag i én sone
+    ("viktigste kamper"). Returnerer home_team, away_team, Sving totalt
+    (sum av absolutt sving over alle lag og soner) og største enkeltsving
+    (Team, Sone, Sving). Totalen inneholder også Monte Carlo-støy fra lag
+    kampen ikke påvirker, og brukes derfor ikke til rangeringen.
+    """
+    lev = leverage.assign(abs_swing=leverage["Sving"].abs().fillna(0.0))
+    keys = ["home_team", "away_team"]
+    biggest = lev.loc[
+        lev.groupby(keys)["abs_swing"].idxmax(), keys + ["Team", "Sone", "Sving"]
+    ]
+    total = lev.groupby(keys, as_index=False)["abs_swing"].sum()
+    out = total.rename(columns={"abs_swing": "Sving totalt"}).merge(biggest, on=keys)
+    order = np.argsort(-out["Sving"].abs().to_numpy(), kind="stable")
+    out = out.iloc[order].reset_index(drop=True)
+    return out if top is None else out.head(top)
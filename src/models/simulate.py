@@ -1,38 +1,63 @@
 # File: src/models/simulate.py
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+from typing import Callable, NamedTuple
+
 import numpy as np
 import pandas as pd
-from typing import Tuple
+from scipy.stats import poisson
 
+from config.leagues import LEAGUES
 from config.settings import DATA_PATH
-from src.models.predict import predict_poisson_from_models
 
+from src.models.clinch import clinch_table, decided_mask, position_bounds
+from src.models.form import prepare_form, simulate_form_scorelines
+from src.models.tiebreak import (
+    DEFAULT_TIEBREAK,
+    head_to_head_base,
+    league_tiebreak,
+    tiebreak_keys,
+    uses_head_to_head,
+)
+from src.models.predict import (
+    build_feature_lists,
+    ensemble_lambdas,
+    load_models_for_league,
+    predict_poisson_from_models,
+)
 
-# Hold disse i sync med øvrige sider (predictions/oddschecker)
-STAT_WINDOWS = {"xg": [5, 10], "gf": [5, 10], "ga": [5, 10]}
 
+# Antall simuleringer som holdes i minnet samtidig (se simulate_counts)
+DEFAULT_CHUNK_SIZE = 10_000
 
-def _build_feature_lists() -> Tuple[list[str], list[str]]:
-    """
-    Bygger feature-lister konsistent med øvrig pipeline.
-    Offensivt for laget som angriper, defensivt for motstander.
-    """
-    features_home = (
-        [f"xg_home_roll{w}" for w in STAT_WINDOWS["xg"]]
-        + [f"gf_home_roll{w}" for w in STAT_WINDOWS["gf"]]
-        + [f"xg_conceded_away_roll{w}" for w in STAT_WINDOWS["xg"]]
-        + [f"ga_away_roll{w}" for w in STAT_WINDOWS["ga"]]
-        + ["avg_goals_for_home", "avg_goals_against_away"]
-    )
-    features_away = (
-        [f"xg_away_roll{w}" for w in STAT_WINDOWS["xg"]]
-        + [f"gf_away_roll{w}" for w in STAT_WINDOWS["gf"]]
-        + [f"xg_conceded_home_roll{w}" for w in STAT_WINDOWS["xg"]]
-        + [f"ga_home_roll{w}" for w in STAT_WINDOWS["ga"]]
-        + ["avg_goals_for_away", "avg_goals_against_home"]
-    )
-    return features_home, features_away
+SIM_MODES = ("result", "scoreline", "dynamic")
+
+# Antall simuleringer som deler én koeffisientrekke fra ensemblet (partall,
+# slik at antitetiske par aldri deles)
+ENSEMBLE_BLOCK = 100
+
+# Versjon av shard-formatet (se save_shard); shards med ulik versjon slås ikke sammen
+SHARD_FORMAT = 1
+
+# Metadata som må være lik i alle shards som slås sammen (se merge_shards)
+_SHARD_MATCH_KEYS = (
+    "format",
+    "league",
+    "season",
+    "teams",
+    "tiebreak",
+    "mode",
+    "crn",
+    "antithetic",
+    "ensemble",
+    "fingerprints",
+)
 
 
 def _latest_season_str(seasons: pd.Series) -> str:
@@ -99,68 +124,438 @@ def _current_points(played: pd.DataFrame) -> pd.Series:
     )
 
 
-def _simulate_once(
-    preds: pd.DataFrame,
-    base_points: pd.Series,
+def _current_goals(played: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returnerer scorede (gf) og innslupne (ga) mål per lag fra spilte kamper.
+    Kamper uten registrert score teller som 0-0.
+    """
+    gh = played["gf_home"].fillna(0) if "gf_home" in played.columns else 0
+    ga = played["gf_away"].fillna(0) if "gf_away" in played.columns else 0
+
+    home = pd.DataFrame({"team": played["home_team"], "gf": gh, "ga": ga})
+    away = pd.DataFrame({"team": played["away_team"], "gf": ga, "ga": gh})
+    return (
+        pd.concat([home, away])
+        .groupby("team")[["gf", "ga"]]
+        .sum()
+        .astype(int)
+        .sort_index()
+    )
+
+
+def _fixture_arrays(preds: pd.DataFrame, teams: list[str]) -> dict[str, np.ndarray]:
+    """
+    Gjør `preds` om til rene NumPy-arrays for den vektoriserte motoren.
+    Lag erstattes med heltallsindekser inn i `teams`, og 1X2-sannsynlighetene
+    normaliseres og lagres kumulativt (terskler for H og H+U).
+    """
+    team_index = {t: i for i, t in enumerate(teams)}
+    home_idx = preds["home_team"].map(team_index).to_numpy(dtype=np.intp)
+    away_idx = preds["away_team"].map(team_index).to_numpy(dtype=np.intp)
+
+    p = preds[["prob_home", "prob_draw", "prob_away"]].to_numpy(dtype=float)
+    # Beskyttelse mot NaN/inf/negativ sum: fall tilbake til jevnt
+    bad = ~np.isfinite(p).all(axis=1) | (p.sum(axis=1) <= 0)
+    p[bad] = 1.0
+    p = p / p.sum(axis=1, keepdims=True)
+
+    fixtures = {
+        "home_idx": home_idx,
+        "away_idx": away_idx,
+        "cum_probs": np.cumsum(p, axis=1)[:, :2],
+    }
+    if {"lambda_home", "lambda_away"}.issubset(preds.columns):
+        fixtures["lam_home"] = preds["lambda_home"].to_numpy(dtype=float)
+        fixtures["lam_away"] = preds["lambda_away"].to_numpy(dtype=float)
+    return fixtures
+
+
+def _cum_probs_from_lambdas(
+    lam_home: np.ndarray, lam_away: np.ndarray, max_goals: int = 10
+) -> np.ndarray:
+    """
+    Kumulative 1X2-terskler (som i _fixture_arrays) fra lambdas med vilkårlig
+    form, f.eks. (n_kamper × n_trekk). Returnerer form + (2,).
+    """
+    k = np.arange(max_goals + 1)
+    p_h = poisson.pmf(k, lam_home[..., None])
+    p_a = poisson.pmf(k, lam_away[..., None])
+    # P(hjemme vinner) = Σ_i P(H=i)·P(B<i), tilsvarende for borte
+    p_home = (p_h * (np.cumsum(p_a, axis=-1) - p_a)).sum(axis=-1)
+    p_away = (p_a * (np.cumsum(p_h, axis=-1) - p_h)).sum(axis=-1)
+    p_draw = (p_h * p_a).sum(axis=-1)
+    p = np.stack([p_home, p_draw, p_away], axis=-1)
+    p = p / p.sum(axis=-1, keepdims=True)
+    return np.cumsum(p, axis=-1)[..., :2]
+
+
+def _draw_outcomes(
+    cum_probs: np.ndarray, n_sims: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Trekker utfall for alle simuleringer og kamper på én gang.
+    Returnerer int8-matrise (n_sims × n_kamper) med 0=H, 1=U, 2=B.
+    """
+    return _outcomes_from_uniforms(rng.random((n_sims, cum_probs.shape[0])), cum_probs)
+
+
+def _outcomes_from_uniforms(u: np.ndarray, cum_probs: np.ndarray) -> np.ndarray:
+    """Invers CDF: uniforme tall (n_sims × n_kamper) → utfallskoder 0/1/2."""
+    outcomes = (u >= cum_probs[:, 0]).astype(np.int8)
+    outcomes += u >= cum_probs[:, 1]
+    return outcomes
+
+
+def _scorelines_from_uniforms(u: np.ndarray, lam: np.ndarray) -> np.ndarray:
+    """
+    Invers Poisson-CDF: uniforme tall (n_sims × n_kamper) → mål (int8).
+    Bygger én kumulativ tabell per kamp og slår opp med searchsorted, som
+    gir samme mål som poisson.ppf uten å evaluere CDF-en per tall.
+    """
+    lam_max = float(lam.max()) if len(lam) else 0.0
+    max_goals = min(int(lam_max + 10 * np.sqrt(lam_max)) + 10, 127)
+    cdf = poisson.cdf(np.arange(max_goals + 1), lam[:, None])
+    goals = np.empty(u.shape, dtype=np.int8)
+    for j in range(len(lam)):
+        goals[:, j] = np.searchsorted(cdf[j], u[:, j])
+    return goals
+
+
+def _fixture_keys(season: str, preds: pd.DataFrame) -> np.ndarray:
+    """Stabil kamp-ID (sesong, hjemmelag, bortelag) for felles tilfeldige tall."""
+    return np.array(
+        [
+            zlib.crc32(f"{season}|{h}|{a}".encode())
+            for h, a in zip(preds["home_team"], preds["away_team"])
+        ],
+        dtype=np.uint64,
+    )
+
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(z: np.ndarray) -> np.ndarray:
+    """SplitMix64-mikser på uint64-arrays (overflyt er ønsket: mod 2^64)."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _crn_uniforms(
+    keys: np.ndarray, crn_seed: int, start: int, n: int, stream: int = 0
+) -> np.ndarray:
+    """
+    Felles tilfeldige tall (common random numbers): kolonne j er en
+    tellerbasert SplitMix64-strøm nøklet på (crn_seed, kamp-ID, strøm),
+    lest fra posisjon `start`. Alle kamper og posisjoner regnes ut samtidig,
+    og simulering i får alltid samme tall for samme kamp, uavhengig av
+    shards, blokker og hvilke andre kamper som gjenstår.
+    """
+    seed_word = np.array([int(crn_seed) & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64)
+    fixture = (np.asarray(keys, dtype=np.uint64) << np.uint64(8)) | np.uint64(stream)
+    base = _splitmix64(_splitmix64(seed_word) ^ _splitmix64(fixture))
+    counter = np.arange(start + 1, start + n + 1, dtype=np.uint64)[:, None]
+    z = _splitmix64(base[None, :] + counter * _GOLDEN)
+    return (z >> np.uint64(11)) * 2.0**-53
+
+
+def _uniforms(
+    context: dict,
+    n_sims: int,
     rng: np.random.Generator,
-    relegation_spots: int,
-    top_n: int,
-) -> tuple[set[str], set[str], set[str]]:
+    sim_offset: int,
+    crn_seed: int | None,
+    antithetic: bool,
+    stream: int = 0,
+) -> np.ndarray:
     """
-    Én simulering: trekker utfall for hver gjenstående kamp og rangerer lagene.
-    `preds` har kolonner: home_team, away_team, prob_home, prob_draw, prob_away.
-    Returnerer (champions, topN, relegated) som sett av lagnavn.
+    Uniforme tall (n_sims × n_kamper) for simuleringene sim_offset..sim_offset+n.
+    Med `crn_seed` brukes faste strømmer per kamp-ID (se _crn_uniforms).
+    Med `antithetic` deler simulering 2k og 2k+1 tall: u og 1 - u.
     """
-    points = base_points.copy()
+    keys = context["fixtures"]["keys"]
+    idx = np.arange(sim_offset, sim_offset + n_sims)
+    first = idx[0] // 2 if antithetic else idx[0]
+    n_base = idx[-1] // 2 - first + 1 if antithetic else n_sims
 
-    for _, row in preds.iterrows():
-        p = np.array(
-            [row["prob_home"], row["prob_draw"], row["prob_away"]], dtype=float
+    if crn_seed is not None:
+        base = _crn_uniforms(keys, crn_seed, int(first), int(n_base), stream)
+    else:
+        base = rng.random((int(n_base), len(keys)))
+
+    if not antithetic:
+        return base
+    u = base[idx // 2 - first]
+    flip = idx % 2 == 1
+    u[flip] = 1.0 - u[flip]
+    return u
+
+
+def _draw_scorelines(
+    lam_home: np.ndarray,
+    lam_away: np.ndarray,
+    n_sims: int,
+    rng: np.random.Generator,
+    block: int = 8192,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Trekker hjemme- og bortemål fra Poisson(lambda) for alle simuleringer.
+    Trekkes i blokker rett inn i int8-matriser (n_sims × n_kamper), slik at
+    int64-mellomresultatet fra rng.poisson aldri blir større enn én blokk.
+    """
+    n_matches = lam_home.shape[0]
+    goals_home = np.empty((n_sims, n_matches), dtype=np.int8)
+    goals_away = np.empty((n_sims, n_matches), dtype=np.int8)
+    for start in range(0, n_sims, block):
+        stop = min(start + block, n_sims)
+        size = (stop - start, n_matches)
+        goals_home[start:stop] = np.minimum(rng.poisson(lam_home, size=size), 127)
+        goals_away[start:stop] = np.minimum(rng.poisson(lam_away, size=size), 127)
+    return goals_home, goals_away
+
+
+def _outcomes_from_scorelines(
+    goals_home: np.ndarray, goals_away: np.ndarray
+) -> np.ndarray:
+    """Utfallskoder (0=H, 1=U, 2=B) fra trukne scorelines."""
+    outcomes = (goals_home <= goals_away).astype(np.int8)
+    outcomes += goals_home < goals_away
+    return outcomes
+
+
+def _team_sums(
+    home_values: np.ndarray,
+    away_values: np.ndarray,
+    home_idx: np.ndarray,
+    away_idx: np.ndarray,
+    n_teams: int,
+) -> np.ndarray:
+    """
+    Summerer en per-kamp-størrelse (f.eks. mål) til lagene (n_sims × n_lag)
+    med scatter-add via bincount på flate (simulering, lag)-indekser.
+    """
+    n_sims = home_values.shape[0]
+    size = n_sims * n_teams
+
+    offset = (np.arange(n_sims, dtype=np.int32) * n_teams)[:, None]
+    home_slot = offset + home_idx.astype(np.int32)
+    away_slot = offset + away_idx.astype(np.int32)
+
+    totals = np.bincount(home_slot.ravel(), weights=home_values.ravel(), minlength=size)
+    totals += np.bincount(away_slot.ravel(), weights=away_values.ravel(), minlength=size)
+    return totals.reshape(n_sims, n_teams).astype(np.int16)
+
+
+def _points_from_outcomes(
+    outcomes: np.ndarray,
+    home_idx: np.ndarray,
+    away_idx: np.ndarray,
+    base_points: np.ndarray,
+) -> np.ndarray:
+    """
+    Summerer poeng per simulering og lag (n_sims × n_lag).
+    Hver (simulering, lag) får en flat indeks slik at seire og uavgjorte
+    kan telles med én bincount i stedet for en Python-løkke.
+    """
+    n_sims = outcomes.shape[0]
+    n_teams = base_points.shape[0]
+    size = n_sims * n_teams
+
+    offset = (np.arange(n_sims, dtype=np.int32) * n_teams)[:, None]
+    home_slot = offset + home_idx.astype(np.int32)
+    away_slot = offset + away_idx.astype(np.int32)
+
+    wins = np.bincount(home_slot[outcomes == 0], minlength=size)
+    wins += np.bincount(away_slot[outcomes == 2], minlength=size)
+    draws = np.bincount(home_slot[outcomes == 1], minlength=size)
+    draws += np.bincount(away_slot[outcomes == 1], minlength=size)
+
+    points = (3 * wins + draws).reshape(n_sims, n_teams)
+    return points + base_points[None, :]
+
+
+def _rank_teams(
+    points: np.ndarray,
+    rng: np.random.Generator,
+    tiebreakers: tuple[np.ndarray, ...] = (),
+) -> np.ndarray:
+    """
+    Rangerer lagene i hver simulering (høyest først) etter poeng og deretter
+    hver matrise i `tiebreakers` (f.eks. målforskjell, scorede mål).
+    Gjenværende likhet brytes tilfeldig.
+    Returnerer lagindekser sortert etter plassering (n_sims × n_lag).
+    """
+    # Tilfeldig startrekkefølge, deretter stabil sortering fra minst
+    # til mest signifikante nøkkel (som np.lexsort, men radvis).
+    order = np.argsort(rng.random(points.shape), axis=1)
+    for key in reversed((points, *tiebreakers)):
+        ranked = np.take_along_axis(key, order, axis=1)
+        idx = np.argsort(-ranked, axis=1, kind="stable")
+        order = np.take_along_axis(order, idx, axis=1)
+    return order
+
+
+def _decided_places(bounds: pd.DataFrame) -> np.ndarray:
+    """
+    Sluttplass (0-indeksert) for lag der beste og dårligste mulige plass er
+    like (se clinch.position_bounds), -1 for lag med åpen plass.
+    """
+    best = bounds["Beste plass"].to_numpy()
+    fixed = best == bounds["Dårligste plass"].to_numpy()
+    return np.where(fixed, best - 1, -1).astype(np.intp)
+
+
+def _rank_open_teams(
+    context: dict,
+    points: np.ndarray,
+    rng: np.random.Generator,
+    tiebreakers: tuple[np.ndarray, ...] = (),
+) -> np.ndarray:
+    """
+    Som _rank_teams, men lag med avgjort sluttplass (context["decided_places"])
+    står fast på plassen sin. Et slikt lag er sikkert over eller sikkert under
+    hvert annet lag, så bare de åpne lagene rangeres, inn på de ledige plassene.
+    """
+    places = context.get("decided_places")
+    if places is None or not (places >= 0).any():
+        return _rank_teams(points, rng, tiebreakers)
+
+    n_sims, n_teams = points.shape
+    fixed = places >= 0
+    order = np.empty((n_sims, n_teams), dtype=np.intp)
+    order[:, places[fixed]] = np.flatnonzero(fixed)
+    open_teams = np.flatnonzero(~fixed)
+    if len(open_teams):
+        local = _rank_teams(
+            points[:, open_teams], rng, tuple(k[:, open_teams] for k in tiebreakers)
         )
-        if not np.all(np.isfinite(p)) or p.sum() <= 0:
-            # Beskyttelse mot NaN/inf/negativ sum: fall tilbake til jevnt
-            p = np.array([1.0, 1.0, 1.0])
-        p = p / p.sum()
-
-        outcome = rng.choice([0, 1, 2], p=p)  # 0=H, 1=U, 2=B
-        if outcome == 0:
-            points[row["home_team"]] = points.get(row["home_team"], 0) + 3
-        elif outcome == 1:
-            points[row["home_team"]] = points.get(row["home_team"], 0) + 1
-            points[row["away_team"]] = points.get(row["away_team"], 0) + 1
-        else:
-            points[row["away_team"]] = points.get(row["away_team"], 0) + 3
+        open_places = np.setdiff1d(np.arange(n_teams), places[fixed])
+        order[:, open_places] = open_teams[local]
+    return order
 
-    # Tie-break: jitter for deterministisk rangering ved poenglikhet
-    teams = points.index.to_list()
-    jitter = rng.uniform(0, 1e-6, size=len(teams))
-    scores = points.values + jitter
-    order = np.argsort(-scores)  # høyest først
-    ranked = [teams[i] for i in order]
 
-    champion = {ranked[0]}
-    topN = set(ranked[:top_n])
-    relegated = set(ranked[-relegation_spots:]) if relegation_spots > 0 else set()
-    return champion, topN, relegated
+def _position_counts(order: np.ndarray, n_teams: int) -> np.ndarray:
+    """
+    Teller sluttplasseringer: returnerer (n_lag × n_lag)-matrise der
+    [lag, plass] er antall simuleringer laget endte på plassen (0-indeksert).
+    """
+    n_sims = order.shape[0]
+    position = np.broadcast_to(np.arange(n_teams), (n_sims, n_teams))
+    flat = order.ravel() * n_teams + position.ravel()
+    return np.bincount(flat, minlength=n_teams * n_teams).reshape(n_teams, n_teams)
 
 
-def run_simulations(
+def zone_probabilities(
+    positions: pd.DataFrame, zones: dict[str, tuple[int, int]]
+) -> pd.DataFrame:
+    """
+    Sannsynlighet (i %) for å ende i hver sone, som snitt av posisjonsmatrisen.
+
+    Parametre:
+      - positions: tellematrise med lag som indeks og plass 1..N som kolonner
+      - zones: {navn: (fra_plass, til_plass)} med 1-indekserte, inkluderende plasser
+
+    Returnerer DataFrame med kolonnene Team og P(<navn>) per sone.
+    """
+    counts = positions.to_numpy()
+    n_sims = counts[0].sum()
+    out = pd.DataFrame({"Team": positions.index})
+    for name, (first, last) in zones.items():
+        hits = counts[:, first - 1 : last].sum(axis=1)
+        out[f"P({name})"] = np.round(100.0 * hits / n_sims, 1)
+    return out
+
+
+def league_zones(league_name: str) -> dict[str, tuple[int, int]]:
+    """Sonene (plassintervaller) som er satt for ligaen i config/leagues.py."""
+    return LEAGUES.get(league_name, {}).get("zones", {})
+
+
+def _table_zones(
+    n_teams: int, top_n: int, relegation_spots: int
+) -> dict[str, tuple[int, int]]:
+    """Sonene i den klassiske simuleringstabellen (vinne/topp N/nedrykk)."""
+    return {
+        "vinne": (1, 1),
+        f"topp {top_n}": (1, top_n),
+        "nedrykk": (n_teams - relegation_spots + 1, n_teams),
+    }
+
+
+def _table_from_counts(
+    positions: pd.DataFrame, top_n: int, relegation_spots: int
+) -> pd.DataFrame:
+    """
+    Bygger den klassiske simuleringstabellen (vinne/topp N/nedrykk) fra
+    posisjonsmatrisen.
+    """
+    zones = _table_zones(positions.shape[1], top_n, relegation_spots)
+    out = zone_probabilities(positions, zones)
+    return out.sort_values("P(vinne)", ascending=False).reset_index(drop=True)
+
+
+def _file_sha256(path: str) -> str | None:
+    """sha256 av filinnholdet, eller None hvis filen ikke finnes."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def data_fingerprints(
+    league_name: str, models_dir: str | None = None, ensemble: bool = False
+) -> dict[str, str | None]:
+    """
+    sha256 av filene en simulering bygger på: processed-data, modell og
+    scaler (og koeffisient-ensemblet med `ensemble=True`). Shards fra ulike
+    maskiner slås bare sammen når disse er like (se merge_shards).
+    """
+    if models_dir is None:
+        models_dir = f"{DATA_PATH}/models"
+    key = league_name.lower().replace(" ", "_")
+    files = {
+        "processed": f"{DATA_PATH}/processed/{key}_processed.csv",
+        "model": os.path.join(models_dir, f"{key}_model.joblib"),
+        "scaler": os.path.join(models_dir, f"{key}_scaler.joblib"),
+    }
+    if ensemble:
+        files["ensemble"] = os.path.join(models_dir, f"{key}_ensemble.npz")
+    return {name: _file_sha256(path) for name, path in files.items()}
+
+
+def prepare_season(
     league_name: str,
-    n_sims: int = 1000,
     season: str | None = None,
-    top_n: int = 5,
-    relegation_spots: int = 3,
     models_dir: str | None = None,
-    seed: int | None = None,
-) -> pd.DataFrame:
+    dynamic: bool = False,
+    ensemble: bool = False,
+) -> dict:
     """
-    Kjør Monte Carlo-simulering for valgt liga/sesong.
+    Leser processed-data, låser spilte resultater og predikerer gjenstående
+    kamper én gang. Resultatet inneholder kun lister og NumPy-arrays, slik at
+    det kan sendes billig til simulerings-workers.
 
-    Returnerer DataFrame med kolonner:
-      - Team
-      - P(vinne)   (i %)
-      - P(topp N)  (i %)
-      - P(nedrykk) (i %)
+    Returnerer dict med:
+      - league, season, teams
+      - fixtures:  arrays fra _fixture_arrays (lagindekser, kumulative 1X2, lambdas);
+                   med `ensemble=True` også lam_home_draws/lam_away_draws
+                   (n_kamper × n_trekk) og cum_probs_draws (n_kamper × n_trekk × 2)
+                   fra koeffisient-ensemblet (se train.coefficient_ensemble)
+      - base_points, base_gf, base_ga: int-arrays per lag fra spilte kamper
+      - tiebreak:  ligaens tiebreak-regler (se src/models/tiebreak.py); med
+                   innbyrdes kriterier også h2h_points/h2h_gd (n_lag × n_lag)
+                   fra spilte kamper
+      - fingerprints: sha256 av processed-data og modellfilene
+                   (se data_fingerprints), til kontroll av shards
+      - decided_places: sluttplass (0-indeksert) for lag der plassen er
+                   matematisk avgjort, ellers -1 (se _decided_places); disse
+                   lagene rangeres ikke i simuleringen
+      - form:      kun med `dynamic=True`; tilstand for mode="dynamic"
+                   (se src/models/form.py)
     """
     # --- Les processed ---
     key = league_name.lower().replace(" ", "_")
@@ -175,68 +570,1195 @@ def run_simulations(
     played = df_season[df_season["result_home"].notna()].copy()
     remaining = df_season[df_season["result_home"].isna()].copy()
 
-    # --- Startpoeng (låser historikk) ---
-    base_points = _current_points(played)
-
     # --- Alle lag (for å sikre komplett output) ---
-    all_teams = pd.Index(
-        sorted(set(df_season["home_team"]).union(df_season["away_team"]))
-    )
-
-    # --- Håndter sesong ferdig ---
-    if remaining.empty:
-        out = pd.DataFrame({"Team": all_teams})
-        out["P(vinne)"] = 0.0
-        out[f"P(topp {top_n})"] = 0.0
-        out["P(nedrykk)"] = 0.0
-        if not base_points.empty:
-            leader = base_points.reindex(all_teams).fillna(0).idxmax()
-            out.loc[out["Team"] == leader, "P(vinne)"] = 100.0
-        return out.sort_values("P(vinne)", ascending=False).reset_index(drop=True)
+    teams = sorted(set(df_season["home_team"]).union(df_season["away_team"]))
 
     # --- Bygg features og prediker sannsynligheter for gjenstående kamper (én gang) ---
-    features_home, features_away = _build_feature_lists()
+    pred_cols = [
+        "home_team",
+        "away_team",
+        "prob_home",
+        "prob_draw",
+        "prob_away",
+        "lambda_home",
+        "lambda_away",
+    ]
     if models_dir is None:
         models_dir = f"{DATA_PATH}/models"
+    if remaining.empty:
+        # Sesong ferdig: ingen kamper å trekke, tabellen er endelig
+        preds = pd.DataFrame(columns=pred_cols)
+    else:
+        features_home, features_away = build_feature_lists()
 
-    preds = predict_poisson_from_models(
-        df=remaining,
-        features_home=features_home,
-        features_away=features_away,
-        league_name=league_name,
-        models_dir=models_dir,
-        max_goals=10,
-        boost=False,
-    )[["home_team", "away_team", "prob_home", "prob_draw", "prob_away"]]
+        preds = predict_poisson_from_models(
+            df=remaining,
+            features_home=features_home,
+            features_away=features_away,
+            league_name=league_name,
+            models_dir=models_dir,
+            max_goals=10,
+            boost=False,
+        )[pred_cols]
+
+    # --- Startpoeng og mål (låser historikk) ---
+    base_points = _current_points(played).reindex(teams).fillna(0)
+    goals = _current_goals(played).reindex(teams).fillna(0)
+
+    fixtures = _fixture_arrays(preds, teams)
+    fixtures["keys"] = _fixture_keys(season, preds)
+    if ensemble and not remaining.empty:
+        # Alle trekk på én gang: ett matriseprodukt for alle gjenstående kamper
+        lam_home, lam_away = ensemble_lambdas(
+            remaining, features_home, features_away, league_name, models_dir
+        )
+        fixtures["lam_home_draws"] = lam_home
+        fixtures["lam_away_draws"] = lam_away
+        fixtures["cum_probs_draws"] = _cum_probs_from_lambdas(lam_home, lam_away)
+
+    context = {
+        "league": league_name,
+        "season": season,
+        "teams": teams,
+        "fixtures": fixtures,
+        "base_points": base_points.to_numpy(dtype=np.int64),
+        "base_gf": goals["gf"].to_numpy(dtype=np.int16),
+        "base_ga": goals["ga"].to_numpy(dtype=np.int16),
+        "tiebreak": league_tiebreak(league_name),
+        "fingerprints": data_fingerprints(league_name, models_dir, ensemble),
+    }
+    context["decided_places"] = _decided_places(position_bounds(context))
+    if uses_head_to_head(context["tiebreak"]):
+        h2h = head_to_head_base(played, teams)
+        context["h2h_points"] = h2h["points"]
+        context["h2h_gd"] = h2h["gd"]
+    if dynamic:
+        # Formhistorikk på tvers av sesonger, som de rullerende featurene
+        model, scaler = load_models_for_league(league_name, models_dir)
+        context["form"] = prepare_form(
+            df[df["gf_home"].notna()].sort_values("date", kind="stable"),
+            remaining,
+            preds,
+            teams,
+            model,
+            scaler,
+        )
+    return context
+
+
+def shard_seeds(
+    league_name: str, seed: int | None, n_shards: int
+) -> list[np.random.SeedSequence]:
+    """
+    Uavhengige, reproduserbare RNG-strømmer per shard.
+    Ligaen inngår i spawn-nøkkelen slik at samme `seed` gir ulike strømmer
+    per liga, og shard i får alltid samme strøm uansett antall workers.
+    """
+    key = league_name.lower().replace(" ", "_")
+    root = np.random.SeedSequence(seed, spawn_key=(zlib.crc32(key.encode()),))
+    return root.spawn(int(n_shards))
+
+
+def shard_sizes(n_sims: int, n_shards: int) -> list[int]:
+    """Fordeler n_sims så jevnt som mulig på n_shards (deterministisk)."""
+    n_shards = max(1, min(int(n_shards), int(n_sims)))
+    base, extra = divmod(int(n_sims), n_shards)
+    return [base + 1 if i < extra else base for i in range(n_shards)]
+
+
+class SharedArray(NamedTuple):
+    """Peker til en array i en shared_memory-blokk (se share_context)."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def share_context(context: dict) -> tuple[dict, list[shared_memory.SharedMemory]]:
+    """
+    Legger alle NumPy-arrays i konteksten (også i nestede dicts, f.eks.
+    fixtures og form) i multiprocessing.shared_memory-blokker, slik at
+    workers slipper å få kamparrays, lambdas og startpoeng picklet inn i
+    hver oppgave.
+
+    Returnerer (delt kontekst, blokker): den delte konteksten har
+    SharedArray i stedet for arrays og er liten å sende (se
+    call_with_shared_context). Eieren må kalle release_shared(blokker)
+    når workerne er ferdige. Worker-prosessene må startes etter
+    multiprocessing.resource_tracker (se simulate_all._executor); ellers
+    får hver worker sin egen tracker som frigir blokkene når den avslutter.
+    """
+    blocks = []
+
+    def share(value):
+        if isinstance(value, dict):
+            return {k: share(v) for k, v in value.items()}
+        if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+            return value
+        if not value.nbytes:
+            return value
+        shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        blocks.append(shm)
+        np.ndarray(value.shape, value.dtype, buffer=shm.buf)[...] = value
+        return SharedArray(shm.name, value.shape, value.dtype.str)
+
+    try:
+        return share(context), blocks
+    except BaseException:
+        release_shared(blocks)
+        raise
+
+
+def attach_context(shared: dict) -> tuple[dict, list[shared_memory.SharedMemory]]:
+    """
+    Kobler til blokkene fra share_context uten kopiering. Arrayene er
+    skrivebeskyttet, siden alle workers leser de samme bytene.
+    Returnerer (kontekst, blokker); blokkene lukkes når konteksten er sluppet.
+    """
+    blocks = []
+
+    def attach(value):
+        if isinstance(value, dict):
+            return {k: attach(v) for k, v in value.items()}
+        if not isinstance(value, SharedArray):
+            return value
+        shm = shared_memory.SharedMemory(name=value.name)
+        blocks.append(shm)
+        arr = np.ndarray(value.shape, np.dtype(value.dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        return arr
+
+    return attach(shared), blocks
+
+
+def release_shared(blocks: list[shared_memory.SharedMemory]) -> None:
+    """Lukker og frigir blokkene fra share_context (kalles av eieren)."""
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+def call_with_shared_context(func: Callable, shared: dict, *args, **kwargs):
+    """
+    Worker-inngang: kobler til den delte konteksten og kaller
+    func(kontekst, *args, **kwargs), f.eks. simulate_counts. Bare de små
+    tellematrisene sendes tilbake.
+    """
+    context, blocks = attach_context(shared)
+    try:
+        return func(context, *args, **kwargs)
+    finally:
+        del context
+        for shm in blocks:
+            shm.close()
+
+
+def _ranks_from_order(order: np.ndarray) -> np.ndarray:
+    """Sluttplass (1-indeksert) per lag fra rekkefølgematrisen, som int8."""
+    ranks = np.empty(order.shape, dtype=np.int8)
+    np.put_along_axis(
+        ranks, order, np.arange(1, order.shape[1] + 1, dtype=np.int8)[None, :], axis=1
+    )
+    return ranks
+
+
+def _store_paths(league_name: str, sim_dir: str | None = None) -> dict[str, str]:
+    if sim_dir is None:
+        sim_dir = f"{DATA_PATH}/processed/simulations"
+    key = league_name.lower().replace(" ", "_")
+    return {
+        "ranks": os.path.join(sim_dir, f"{key}_ranks.npy"),
+        "points": os.path.join(sim_dir, f"{key}_points.npy"),
+        "outcomes": os.path.join(sim_dir, f"{key}_outcomes.npy"),
+        "meta": os.path.join(sim_dir, f"{key}_tensor.json"),
+    }
+
+
+def _fixture_names(context: dict) -> list[list[str]]:
+    """Gjenstående kamper som [hjemmelag, bortelag], i kolonnerekkefølge."""
+    fixtures = context.get("fixtures")
+    if fixtures is None:
+        return []
+    teams = context["teams"]
+    return [
+        [teams[h], teams[a]]
+        for h, a in zip(fixtures["home_idx"], fixtures["away_idx"])
+    ]
+
+
+def create_outcome_store(
+    context: dict,
+    n_rows: int,
+    sim_dir: str | None = None,
+    mode: str = "result",
+    crn_seed: int | None = None,
+    antithetic: bool = False,
+) -> dict[str, str]:
+    """
+    Oppretter minnemappede .npy-filer for sluttplass (int8) og sluttpoeng
+    (int16), begge (n_rows × n_lag), og kamputfall (int8, 0=H/1=U/2=B,
+    n_rows × n_kamper), pluss en JSON med lag, kamper og metadata.
+    simulate_counts skriver rad for rad inn i filene via `store`.
+    """
+    paths = _store_paths(context["league"], sim_dir)
+    os.makedirs(os.path.dirname(paths["ranks"]), exist_ok=True)
+    n_teams = len(context["teams"])
+    n_fixtures = len(_fixture_names(context))
+    for name, dtype, width in (
+        ("ranks", np.int8, n_teams),
+        ("points", np.int16, n_teams),
+        ("outcomes", np.int8, n_fixtures),
+    ):
+        arr = np.lib.format.open_memmap(
+            paths[name], mode="w+", dtype=dtype, shape=(int(n_rows), width)
+        )
+        arr.flush()
+        del arr
+    write_outcome_meta(paths, context, n_rows, mode, crn_seed, antithetic)
+    return paths
+
+
+def write_outcome_meta(
+    store: dict[str, str],
+    context: dict,
+    n_sims: int,
+    mode: str = "result",
+    crn_seed: int | None = None,
+    antithetic: bool = False,
+) -> None:
+    """
+    Skriver metadata for lagret tensor; `n_sims` er antall gyldige rader.
+    Simuleringsinnstillingene og fingerprints lagres slik at
+    scenario.what_if kan resimulere likt og avvise et utdatert lager.
+    """
+    meta = {
+        "league": context["league"],
+        "season": context["season"],
+        "teams": list(context["teams"]),
+        "fixtures": _fixture_names(context),
+        "n_sims": int(n_sims),
+        "mode": mode,
+        "tiebreak": list(context.get("tiebreak", DEFAULT_TIEBREAK)),
+        "crn_seed": None if crn_seed is None else int(crn_seed),
+        "antithetic": bool(antithetic),
+        "ensemble": "cum_probs_draws" in context.get("fixtures", {}),
+        "fingerprints": context.get("fingerprints"),
+    }
+    with open(store["meta"], "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def _ensemble_blocks(
+    n_draws: int,
+    n_sims: int,
+    rng: np.random.Generator,
+    sim_offset: int,
+    crn_seed: int | None,
+) -> list[tuple[int, int, int]]:
+    """
+    Deler simuleringene sim_offset..sim_offset+n_sims i blokker på globale
+    grenser (multipler av ENSEMBLE_BLOCK) og velger ett ensemble-trekk per
+    blokk. Returnerer (start, stopp, trekk) med start/stopp relativt til blokken.
+    Med `crn_seed` avhenger trekket bare av (crn_seed, global blokkindeks).
+    """
+    idx = np.arange(sim_offset, sim_offset + n_sims)
+    block = idx // ENSEMBLE_BLOCK
+    starts = np.flatnonzero(np.r_[True, block[1:] != block[:-1]])
+    stops = np.r_[starts[1:], n_sims]
+    if crn_seed is not None:
+        seed_word = int(crn_seed) & 0xFFFFFFFFFFFFFFFF
+        draws = [
+            np.random.default_rng([seed_word, int(block[i])]).integers(n_draws)
+            for i in starts
+        ]
+    else:
+        draws = rng.integers(n_draws, size=len(starts))
+    return [(int(a), int(b), int(d)) for a, b, d in zip(starts, stops, draws)]
+
+
+def _with_draw(fixtures: dict, draw: int) -> dict:
+    """Kamp-arrays der 1X2 og lambdas er byttet ut med ensemble-trekk `draw`."""
+    out = {k: v for k, v in fixtures.items() if not k.endswith("_draws")}
+    out["cum_probs"] = fixtures["cum_probs_draws"][:, draw]
+    out["lam_home"] = fixtures["lam_home_draws"][:, draw]
+    out["lam_away"] = fixtures["lam_away_draws"][:, draw]
+    return out
+
+
+def _simulate_chunk(
+    context: dict,
+    n_sims: int,
+    rng: np.random.Generator,
+    mode: str,
+    sim_offset: int = 0,
+    crn_seed: int | None = None,
+    antithetic: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simulerer én blokk på `n_sims` sesonger.
+    Returnerer (rekkefølge, poeng, kamputfall): de to første (n_sims × n_lag),
+    kamputfall (n_sims × n_kamper) med koder 0=H/1=U/2=B.
+
+    Har konteksten et koeffisient-ensemble, simuleres hver blokk à
+    ENSEMBLE_BLOCK med sitt eget trekk (ikke i mode="dynamic", der
+    kampleddene er kalibrert mot punktestimatet).
+    """
+    fixtures = context["fixtures"]
+    if "cum_probs_draws" in fixtures and mode != "dynamic":
+        n_draws = fixtures["cum_probs_draws"].shape[1]
+        parts = [
+            _simulate_chunk(
+                {**context, "fixtures": _with_draw(fixtures, draw)},
+                stop - start,
+                rng,
+                mode,
+                sim_offset + start,
+                crn_seed,
+                antithetic,
+            )
+            for start, stop, draw in _ensemble_blocks(
+                n_draws, n_sims, rng, sim_offset, crn_seed
+            )
+        ]
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    home_idx, away_idx = fixtures["home_idx"], fixtures["away_idx"]
+    n_teams = len(context["teams"])
+    controlled = crn_seed is not None or antithetic
+
+    if mode in ("scoreline", "dynamic"):
+        u_home = u_away = None
+        if controlled:
+            args = (context, n_sims, rng, sim_offset, crn_seed, antithetic)
+            u_home = _uniforms(*args, stream=0)
+            u_away = _uniforms(*args, stream=1)
+
+        if mode == "dynamic":
+            goals_home, goals_away = simulate_form_scorelines(
+                context["form"], home_idx, away_idx, n_sims, rng, u_home, u_away
+            )
+        elif controlled:
+            goals_home = _scorelines_from_uniforms(u_home, fixtures["lam_home"])
+            goals_away = _scorelines_from_uniforms(u_away, fixtures["lam_away"])
+        else:
+            goals_home, goals_away = _draw_scorelines(
+                fixtures["lam_home"], fixtures["lam_away"], n_sims, rng
+            )
+        outcomes = _outcomes_from_scorelines(goals_home, goals_away)
+        gf = context["base_gf"] + _team_sums(
+            goals_home, goals_away, home_idx, away_idx, n_teams
+        )
+        ga = context["base_ga"] + _team_sums(
+            goals_away, goals_home, home_idx, away_idx, n_teams
+        )
+        goals, totals = (goals_home, goals_away), (gf, ga)
+    elif controlled:
+        u = _uniforms(context, n_sims, rng, sim_offset, crn_seed, antithetic)
+        outcomes = _outcomes_from_uniforms(u, fixtures["cum_probs"])
+        goals = totals = None
+    else:
+        outcomes = _draw_outcomes(fixtures["cum_probs"], n_sims, rng)
+        goals = totals = None
+
+    points = _points_from_outcomes(
+        outcomes, home_idx, away_idx, context["base_points"]
+    )
+    tiebreakers = tiebreak_keys(context, points, outcomes, goals, totals)
+    return _rank_open_teams(context, points, rng, tiebreakers), points, outcomes
+
+
+def _points_width(context: dict) -> int:
+    """Antall mulige sluttpoengsummer 0..maks (maks = beste lags tak)."""
+    fixtures = context["fixtures"]
+    n_teams = len(context["teams"])
+    if not n_teams:
+        return 1
+    games = np.bincount(
+        np.concatenate([fixtures["home_idx"], fixtures["away_idx"]]),
+        minlength=n_teams,
+    )
+    return int((context["base_points"] + 3 * games).max()) + 1
+
+
+def _points_histogram(points: np.ndarray, width: int) -> np.ndarray:
+    """(n_lag × width) antall simuleringer per [lag, sluttpoeng]."""
+    n_teams = points.shape[1]
+    slots = np.arange(n_teams) * width + points
+    return np.bincount(slots.ravel(), minlength=n_teams * width).reshape(
+        n_teams, width
+    )
+
+
+def _empty_counts(n_teams: int, width: int) -> dict:
+    return {
+        "n_sims": 0,
+        "positions": np.zeros((n_teams, n_teams), dtype=np.int64),
+        "points_sum": np.zeros(n_teams, dtype=np.int64),
+        "points_sq": np.zeros(n_teams, dtype=np.int64),
+        "points_hist": np.zeros((n_teams, width), dtype=np.int64),
+    }
+
+
+def merge_counts(parts: list[dict]) -> dict:
+    """Slår sammen aggregater fra flere shards/batcher (ren summering)."""
+    parts = list(parts)
+    merged = dict(parts[0])
+    for part in parts[1:]:
+        for k in merged:
+            merged[k] = merged[k] + part[k]
+    return merged
 
-    # --- Init aggregering ---
-    teams = sorted(set(all_teams))
-    champ_count = {t: 0 for t in teams}
-    topN_count = {t: 0 for t in teams}
-    releg_count = {t: 0 for t in teams}
 
+def simulate_counts(
+    context: dict,
+    n_sims: int,
+    seed: int | np.random.SeedSequence | None = None,
+    mode: str = "result",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    store: dict[str, str] | None = None,
+    sim_offset: int = 0,
+    crn_seed: int | None = None,
+    antithetic: bool = False,
+) -> dict:
+    """
+    Simulerer resten av sesongen `n_sims` ganger fra en forberedt kontekst
+    (se prepare_season) og returnerer løpende aggregater.
+
+    Simuleringene strømmes i blokker à `chunk_size`: hver blokk trekkes,
+    foldes inn i aggregatene og kastes, slik at minnebruken avhenger av
+    chunk_size og ikke av n_sims.
+
+    Med `store` (fra create_outcome_store) skrives sluttplass, sluttpoeng og
+    kamputfall for hver simulering også til de minnemappede filene, fra rad
+    `sim_offset`. Shards kan dermed skrive til hver sin del av samme fil.
+
+    Variansreduksjon:
+      - crn_seed:   felles tilfeldige tall per kamp-ID (se _crn_uniforms), slik
+                    at to kjøringer med samme crn_seed bare skiller seg der
+                    sannsynlighetene faktisk har endret seg
+      - antithetic: simulering 2k og 2k+1 bruker u og 1 - u
+    `sim_offset` er global indeks for første simulering, slik at shards
+    henter sin del av de faste strømmene.
+
+    `mode`:
+      - "result":    trekker H/U/B fra prob_home/prob_draw/prob_away;
+                     ved poenglikhet brukes bare innbyrdes poeng (hvis ligaen
+                     har det), ellers tilfeldig
+      - "scoreline": trekker mål fra lambda_home/lambda_away og rangerer
+                     etter ligaens tiebreak-regler (standard: poeng →
+                     målforskjell → scorede mål, se src/models/tiebreak.py)
+      - "dynamic":   som scoreline, men lambdas beregnes på nytt hver runde
+                     fra simulert form (krever prepare_season(dynamic=True))
+
+    Returnerer dict (kan slås sammen på tvers av shards med merge_counts):
+      - n_sims:     antall simuleringer
+      - positions:  (n_lag × n_lag) antall simuleringer per [lag, plass]
+      - points_sum: sum av sluttpoeng per lag
+      - points_sq:  sum av kvadrerte sluttpoeng per lag
+      - points_hist: (n_lag × poeng 0..maks) antall simuleringer per sluttpoeng,
+                     eksakt histogram siden poengsummene er små heltall
+    """
+    if mode not in SIM_MODES:
+        raise ValueError(f"Ukjent simuleringsmodus: {mode}")
+    if mode == "dynamic" and "form" not in context:
+        raise ValueError("mode='dynamic' krever prepare_season(..., dynamic=True)")
+
+    n_teams = len(context["teams"])
+    width = _points_width(context)
     rng = np.random.default_rng(seed)
+    counts = _empty_counts(n_teams, width)
 
-    # --- Monte Carlo ---
-    for _ in range(int(n_sims)):
-        champion, topN, relegated = _simulate_once(
-            preds=preds,
-            base_points=base_points,
-            rng=rng,
-            relegation_spots=int(relegation_spots),
+    if store is not None:
+        ranks_out = np.load(store["ranks"], mmap_mode="r+")
+        points_out = np.load(store["points"], mmap_mode="r+")
+        outcomes_out = np.load(store["outcomes"], mmap_mode="r+")
+
+    for start in range(0, int(n_sims), int(chunk_size)):
+        n = min(int(chunk_size), int(n_sims) - start)
+        order, points, outcomes = _simulate_chunk(
+            context, n, rng, mode, sim_offset + start, crn_seed, antithetic
+        )
+
+        if store is not None:
+            rows = slice(sim_offset + start, sim_offset + start + n)
+            ranks_out[rows] = _ranks_from_order(order)
+            points_out[rows] = points
+            outcomes_out[rows] = outcomes
+
+        points = points.astype(np.int64)
+        counts["n_sims"] += n
+        counts["positions"] += _position_counts(order, n_teams)
+        counts["points_sum"] += points.sum(axis=0)
+        counts["points_sq"] += (points * points).sum(axis=0)
+        counts["points_hist"] += _points_histogram(points, width)
+
+    if store is not None:
+        ranks_out.flush()
+        points_out.flush()
+        outcomes_out.flush()
+        del ranks_out, points_out, outcomes_out
+
+    return counts
+
+
+def simulate_shard(
+    context: dict,
+    n_sims: int,
+    shard_index: int = 0,
+    n_shards: int = 1,
+    seed: int | None = None,
+    mode: str = "result",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    crn: bool = False,
+    antithetic: bool = False,
+) -> tuple[dict, dict]:
+    """
+    Simulerer shard `shard_index` av `n_shards`, hver på `n_sims`
+    simuleringer, uten delt tilstand med de andre shardene: RNG-strømmen er
+    shard_seeds(liga, seed, n_shards)[shard_index] og simuleringsindeksene
+    (for CRN) starter på shard_index · n_sims. Shardene kan dermed kjøres på
+    hver sin maskin og slås sammen med merge_shards.
+
+    Returnerer (counts, meta) der meta beskriver strømmen, til save_shard.
+    """
+    ss = shard_seeds(context["league"], seed, n_shards)[shard_index]
+    crn_seed = (seed if seed is not None else 0) if crn else None
+    sim_offset = int(shard_index) * int(n_sims)
+    counts = simulate_counts(
+        context,
+        n_sims,
+        seed=ss,
+        mode=mode,
+        chunk_size=chunk_size,
+        sim_offset=sim_offset,
+        crn_seed=crn_seed,
+        antithetic=antithetic,
+    )
+    meta = {
+        "mode": mode,
+        "seed": seed,
+        # Entropien identifiserer strømmen også når seed=None
+        "entropy": str(ss.entropy),
+        "spawn_key": [int(k) for k in ss.spawn_key],
+        "shard_index": int(shard_index),
+        "n_shards": int(n_shards),
+        "sim_offset": sim_offset,
+        "crn": bool(crn),
+        "antithetic": bool(antithetic),
+        "ensemble": "lam_home_draws" in context["fixtures"],
+    }
+    return counts, meta
+
+
+def save_shard(path: str, context: dict, counts: dict, meta: dict) -> str:
+    """
+    Lagrer en shard som .npz: aggregatene fra simulate_counts, det
+    season_result trenger av konteksten (startpoeng og kampindekser) og
+    metadata som JSON (liga, sesong, lag, strøm og fingerprints).
+    """
+    meta = {
+        "format": SHARD_FORMAT,
+        "league": context["league"],
+        "season": context["season"],
+        "teams": list(context["teams"]),
+        "tiebreak": list(context.get("tiebreak", DEFAULT_TIEBREAK)),
+        "fingerprints": context.get("fingerprints", {}),
+        "n_sims": int(counts["n_sims"]),
+        **meta,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            positions=counts["positions"],
+            points_sum=counts["points_sum"],
+            points_sq=counts["points_sq"],
+            points_hist=counts["points_hist"],
+            base_points=context["base_points"],
+            home_idx=context["fixtures"]["home_idx"],
+            away_idx=context["fixtures"]["away_idx"],
+            meta=np.array(json.dumps(meta, ensure_ascii=False)),
+        )
+    return path
+
+
+def load_shard(path: str) -> tuple[dict, dict, dict]:
+    """
+    Leser en shard fra save_shard. Returnerer (counts, meta, context) der
+    context bare har det season_result trenger.
+    """
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        counts = {
+            "n_sims": int(meta["n_sims"]),
+            "positions": data["positions"],
+            "points_sum": data["points_sum"],
+            "points_sq": data["points_sq"],
+            "points_hist": data["points_hist"],
+        }
+        context = {
+            "league": meta["league"],
+            "season": meta["season"],
+            "teams": meta["teams"],
+            "tiebreak": tuple(meta["tiebreak"]),
+            "fingerprints": meta["fingerprints"],
+            "base_points": data["base_points"],
+            "fixtures": {
+                "home_idx": data["home_idx"],
+                "away_idx": data["away_idx"],
+            },
+        }
+    return counts, meta, context
+
+
+def merge_shards(paths: list[str]) -> tuple[dict, dict, list[dict]]:
+    """
+    Slår sammen shards fra save_shard til (context, counts, metas) for
+    season_result.
+
+    Kaster ValueError hvis shardene ikke hører sammen: ulik liga, sesong,
+    lag, modus, variansreduksjon eller fingerprints (processed-data eller
+    modeller endret mellom kjøringene), eller hvis samme RNG-strøm (eller
+    med CRN: samme frø og simuleringsindekser) er med flere ganger.
+    """
+    if not paths:
+        raise ValueError("Ingen shards å slå sammen")
+    loaded = [load_shard(path) for path in paths]
+    _, first, context = loaded[0]
+
+    streams, ranges = {}, []
+    for path, (counts, meta, _) in zip(paths, loaded):
+        for key in _SHARD_MATCH_KEYS:
+            if meta.get(key) != first.get(key):
+                raise ValueError(
+                    f"{path}: '{key}' matcher ikke {paths[0]} "
+                    f"({meta.get(key)!r} vs {first.get(key)!r})"
+                )
+        stream = (meta["entropy"], tuple(meta["spawn_key"]))
+        if stream in streams:
+            raise ValueError(f"{path}: samme RNG-strøm som {streams[stream]}")
+        streams[stream] = path
+        # CRN-frøet er seed (0 uten seed), se simulate_shard
+        start = meta["sim_offset"]
+        crn_seed = meta["seed"] or 0
+        ranges.append((crn_seed, start, start + counts["n_sims"], path))
+
+    if first["crn"]:
+        # Med CRN bestemmer frø og simuleringsindeks tallene: overlapp = duplikater
+        ranges.sort(key=lambda r: r[:3])
+        for prev, cur in zip(ranges, ranges[1:]):
+            if prev[0] == cur[0] and cur[1] < prev[2]:
+                raise ValueError(
+                    f"{cur[3]}: overlappende CRN-simuleringer med {prev[3]}"
+                )
+
+    counts = merge_counts(counts for counts, _, _ in loaded)
+    return context, counts, [meta for _, meta, _ in loaded]
+
+
+def _expected_table(
+    counts: dict,
+    teams: list[str],
+    quantiles: tuple[float, ...] = (0.05, 0.5, 0.95),
+) -> pd.DataFrame:
+    """
+    Forventet sluttabell fra de strømmede histogrammene: forventede poeng og
+    plass, og kvantilbånd for begge (eksakte, siden poeng og plass er små
+    heltall som telles fullt ut).
+    """
+    n_sims = counts["n_sims"]
+    points_p = counts["points_hist"] / n_sims
+    rank_p = counts["positions"] / n_sims
+    places = np.arange(1, rank_p.shape[1] + 1)
+
+    table = pd.DataFrame({"Team": teams})
+    table["Forv. poeng"] = np.round(points_p @ np.arange(points_p.shape[1]), 2)
+    for q in quantiles:
+        table[f"Poeng {100 * q:g}%"] = _pmf_quantile(points_p, q)
+    table["Forv. plass"] = np.round(rank_p @ places, 2)
+    for q in quantiles:
+        table[f"Plass {100 * q:g}%"] = _pmf_quantile(rank_p, q) + 1
+    return table.sort_values("Forv. plass", kind="stable").reset_index(drop=True)
+
+
+def season_result(
+    context: dict,
+    counts: dict,
+    top_n: int = 5,
+    relegation_spots: int = 3,
+) -> dict:
+    """
+    Pakker (eventuelt sammenslåtte) aggregater inn i resultat-dict.
+
+    Returnerer dict med:
+      - season:    simulert sesong
+      - n_sims:    antall simuleringer
+      - positions: DataFrame (lag × plass 1..N) med antall simuleringer per plass
+      - points:    DataFrame per lag med snitt (mean) og standardavvik (std) for sluttpoeng
+      - table:     samme tabell som run_simulations
+      - expected:  forventet sluttabell med 5/50/95 %-bånd for poeng og plass
+      - clinch:    matematisk avgjorte soner og magiske tall (se clinch.clinch_table)
+                   for tabellsonene og sonene i config/leagues.py
+    """
+    n_teams = len(context["teams"])
+    n_sims = int(counts["n_sims"])
+    index = pd.Index(context["teams"], name="Team")
+
+    positions = pd.DataFrame(
+        counts["positions"], index=index, columns=range(1, n_teams + 1)
+    )
+    mean = counts["points_sum"] / n_sims
+    var = np.maximum(counts["points_sq"] / n_sims - mean**2, 0.0)
+    points = pd.DataFrame({"mean": mean, "std": np.sqrt(var)}, index=index)
+    zones = {
+        **_table_zones(n_teams, int(top_n), int(relegation_spots)),
+        **league_zones(context["league"]),
+    }
+
+    return {
+        "season": context["season"],
+        "n_sims": n_sims,
+        "positions": positions,
+        "points": points,
+        "table": _table_from_counts(positions, int(top_n), int(relegation_spots)),
+        "expected": _expected_table(counts, context["teams"]),
+        "clinch": clinch_table(context, zones),
+    }
+
+
+def save_simulation(
+    league: str, season: str, n_sims: int, df_out: pd.DataFrame, suffix: str = "sim"
+) -> str:
+    """
+    Skriver en resultattabell til data/processed/simulations/{liga}_{suffix}.csv
+    med League, Season, N_sims og GeneratedAtUTC først. Returnerer stien.
+    """
+    out_dir = f"{DATA_PATH}/processed/simulations"
+    os.makedirs(out_dir, exist_ok=True)
+    key = league.lower().replace(" ", "_")
+    out_path = f"{out_dir}/{key}_{suffix}.csv"
+    df_save = df_out.copy()
+    df_save.insert(0, "League", league)
+    df_save.insert(1, "Season", season)
+    df_save.insert(2, "N_sims", n_sims)
+    df_save.insert(
+        3, "GeneratedAtUTC", datetime.now(timezone.utc).isoformat(timespec="seconds")
+    )
+    df_save.to_csv(out_path, index=False)
+    return out_path
+
+
+def save_season_result(league: str, res: dict) -> list[str]:
+    """
+    Skriver season_result-output som {liga}_sim.csv (tabell + sonene i
+    config/leagues.py), _positions, _expected og _clinch. Brukes både av
+    simulate_all og reduce_shards. Returnerer stiene i den rekkefølgen.
+    """
+    season, n_sims = res["season"], res["n_sims"]
+    # Soner fra config/leagues.py er bare snitt av posisjonsmatrisen
+    table = res["table"]
+    zones = league_zones(league)
+    if zones:
+        table = table.merge(
+            zone_probabilities(res["positions"], zones), on="Team", how="left"
+        )
+    return [
+        save_simulation(league, season, n_sims, table),
+        save_simulation(
+            league, season, n_sims, res["positions"].reset_index(), suffix="positions"
+        ),
+        # Forventet sluttabell med kvantilbånd for poeng og plass
+        save_simulation(league, season, n_sims, res["expected"], suffix="expected"),
+        # Matematisk avgjorte soner og magiske tall (se src/models/clinch.py)
+        save_simulation(league, season, n_sims, res["clinch"], suffix="clinch"),
+    ]
+
+
+def _reported_zones(
+    context: dict, top_n: int, relegation_spots: int
+) -> dict[str, tuple[int, int]]:
+    """
+    Alle soner som rapporteres i *_sim.csv: tabellsonene (uten nedrykk når
+    ligaen ikke har nedrykksplasser) og sonene i config/leagues.py.
+    """
+    zones = _table_zones(len(context["teams"]), top_n, relegation_spots)
+    if relegation_spots <= 0:
+        del zones["nedrykk"]
+    return {**zones, **league_zones(context["league"])}
+
+
+def _max_standard_error(
+    counts: dict,
+    zones: dict[str, tuple[int, int]],
+    decided: np.ndarray | None = None,
+) -> float:
+    """
+    Største standardfeil (i prosentpoeng) blant P(sone) for alle lag og
+    alle `zones` (se _reported_zones). Bruker (x+1)/(n+2) slik at en sone
+    som ennå ikke er truffet ikke får standardfeil 0 etter første batch.
+
+    `decided` (n_lag × n_soner, se clinch.decided_mask) markerer lag/soner
+    som er matematisk avgjort; de er eksakte og teller ikke med.
+    """
+    positions, n_sims = counts["positions"], counts["n_sims"]
+    if not zones:
+        return 0.0
+    hits = np.column_stack(
+        [positions[:, first - 1 : last].sum(axis=1) for first, last in zones.values()]
+    )
+    open_ = np.ones_like(hits, dtype=bool) if decided is None else ~decided
+    if not open_.any():
+        return 0.0
+    p = (hits[open_] + 1.0) / (n_sims + 2.0)
+    return float(100.0 * np.sqrt(p * (1.0 - p) / n_sims).max())
+
+
+def simulate_adaptive(
+    context: dict,
+    target_se: float,
+    top_n: int = 5,
+    relegation_spots: int = 3,
+    seed: int | np.random.SeedSequence | None = None,
+    mode: str = "result",
+    batch_size: int = 1000,
+    max_sims: int = 100_000,
+    store: dict[str, str] | None = None,
+    crn_seed: int | None = None,
+    antithetic: bool = False,
+) -> dict:
+    """
+    Simulerer i batcher til standardfeilen på alle rapporterte sannsynligheter
+    (P(vinne), P(topp N), P(nedrykk) og sonene i config/leagues.py, se
+    _reported_zones) er ≤ `target_se` prosentpoeng, eller
+    til `max_sims` er nådd. Hver batch får sin egen strøm spawnet fra `seed`.
+    Lag/soner som er matematisk avgjort (se clinch.position_bounds) er
+    eksakte og holder ikke simuleringen i gang.
+
+    `store` må være opprettet med plass til `max_sims` rader; metadata
+    oppdateres med antallet som faktisk ble brukt.
+
+    Returnerer aggregater som simulate_counts; `n_sims` er antallet brukt.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        root = seed
+    else:
+        root = np.random.SeedSequence(seed)
+    n_teams = len(context["teams"])
+    counts = _empty_counts(n_teams, _points_width(context))
+    zones = _reported_zones(context, top_n, relegation_spots)
+    decided = decided_mask(position_bounds(context), zones)
+
+    while counts["n_sims"] < max_sims:
+        n = min(int(batch_size), int(max_sims) - counts["n_sims"])
+        batch = simulate_counts(
+            context,
+            n,
+            seed=root.spawn(1)[0],
+            mode=mode,
+            store=store,
+            sim_offset=counts["n_sims"],
+            crn_seed=crn_seed,
+            antithetic=antithetic,
+        )
+        counts = merge_counts([counts, batch])
+        if _max_standard_error(counts, zones, decided) <= target_se:
+            break
+
+    if store is not None:
+        write_outcome_meta(
+            store, context, counts["n_sims"], mode, crn_seed, antithetic
+        )
+    return counts
+
+
+def points_pmf(context: dict) -> np.ndarray:
+    """
+    Eksakt fordeling av sluttpoeng per lag, uten simulering.
+
+    Hver gjenstående kamp gir laget 0/1/3 poeng med sannsynlighet fra
+    prob_home/prob_draw/prob_away, uavhengig av andre kamper. Sluttpoeng er
+    dermed en konvolusjon av per-kamp-fordelingene, forskjøvet med dagens poeng.
+
+    Returnerer (n_lag × (maks_poeng + 1))-matrise der [lag, k] = P(k poeng).
+    """
+    fixtures = context["fixtures"]
+    base = context["base_points"].astype(int)
+    cum = fixtures["cum_probs"]
+    p_home = cum[:, 0]
+    p_draw = cum[:, 1] - cum[:, 0]
+    p_away = 1.0 - cum[:, 1]
+
+    n_teams = len(context["teams"])
+    width = _points_width(context)
+
+    # Start med all masse på dagens poengsum
+    pmf = np.zeros((n_teams, width))
+    pmf[np.arange(n_teams), base] = 1.0
+
+    # Én kamp om gangen: P'(k) = P(tap)·P(k) + P(U)·P(k-1) + P(seier)·P(k-3)
+    for h, a, ph, pd_, pa in zip(
+        fixtures["home_idx"], fixtures["away_idx"], p_home, p_draw, p_away
+    ):
+        for team, win, loss in ((h, ph, pa), (a, pa, ph)):
+            row = pmf[team]
+            new = loss * row
+            new[1:] += pd_ * row[:-1]
+            new[3:] += win * row[:-3]
+            pmf[team] = new
+    return pmf
+
+
+def _pmf_quantile(pmf: np.ndarray, q: float) -> np.ndarray:
+    """Minste k per rad med P(X ≤ k) ≥ q."""
+    cdf = np.cumsum(pmf, axis=1)
+    return (cdf < q - 1e-12).sum(axis=1)
+
+
+def exact_points_distribution(
+    league_name: str,
+    season: str | None = None,
+    models_dir: str | None = None,
+    quantiles: tuple[float, ...] = (0.05, 0.5, 0.95),
+) -> dict:
+    """
+    Analytisk motor ved siden av run_simulations: eksakt sluttpoengfordeling,
+    forventede poeng og kvantiler for hvert lag, uten tilfeldighet.
+    Plasseringsavhengige størrelser (vinne/topp N/nedrykk) krever fortsatt
+    Monte Carlo.
+
+    Returnerer dict med:
+      - pmf:   DataFrame (lag × poeng 0..maks) med sannsynligheter
+      - table: DataFrame med Team, Poeng nå, Forv. poeng og Poeng q% per kvantil
+    """
+    context = prepare_season(league_name, season=season, models_dir=models_dir)
+    pmf = points_pmf(context)
+    teams = pd.Index(context["teams"], name="Team")
+    support = np.arange(pmf.shape[1])
+
+    table = pd.DataFrame({"Team": teams})
+    table["Poeng nå"] = context["base_points"]
+    table["Forv. poeng"] = np.round(pmf @ support, 2)
+    for q in quantiles:
+        table[f"Poeng {100 * q:g}%"] = _pmf_quantile(pmf, q)
+
+    return {
+        "pmf": pd.DataFrame(pmf, index=teams, columns=support),
+        "table": table.sort_values("Forv. poeng", ascending=False).reset_index(
+            drop=True
+        ),
+    }
+
+
+def _decided_counts(context: dict, n_sims: int) -> dict:
+    """
+    Aggregater for en sesong der alle sluttplasser er matematisk avgjort:
+    hvert lag får sin plass i alle `n_sims`, og poengsnitt/-spredning tas
+    eksakt fra points_pmf i stedet for å simuleres.
+    """
+    n_teams = len(context["teams"])
+    counts = _empty_counts(n_teams, _points_width(context))
+    counts["n_sims"] = int(n_sims)
+    counts["positions"][np.arange(n_teams), context["decided_places"]] = n_sims
+
+    pmf = points_pmf(context)
+    k = np.arange(pmf.shape[1])
+    counts["points_sum"] = n_sims * (pmf @ k)
+    counts["points_sq"] = n_sims * (pmf @ k**2)
+    counts["points_hist"] = n_sims * pmf
+    return counts
+
+
+def simulate_season(
+    league_name: str,
+    n_sims: int = 1000,
+    season: str | None = None,
+    top_n: int = 5,
+    relegation_spots: int = 3,
+    models_dir: str | None = None,
+    seed: int | None = None,
+    mode: str = "result",
+    shards: int = 1,
+    target_se: float | None = None,
+    max_sims: int = 100_000,
+    batch_size: int = 1000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    store_outcomes: bool = False,
+    sim_dir: str | None = None,
+    crn: bool = False,
+    antithetic: bool = False,
+    ensemble: bool = False,
+    shard_out: str | None = None,
+    shard_index: int = 0,
+    n_shards: int = 1,
+) -> dict:
+    """
+    Kjør Monte Carlo-simulering for valgt liga/sesong og tell sluttplassering
+    for hvert lag i én og samme kjøring. Se simulate_counts for `mode`.
+
+    `shards` deler simuleringene i uavhengige blokker med egne RNG-strømmer
+    (se shard_seeds); resultatet er identisk med å kjøre de samme shardene
+    parallelt i simulate_all.py.
+
+    Med `target_se` (prosentpoeng) ignoreres `n_sims` og `shards`: det
+    simuleres i batcher à `batch_size` til alle rapporterte sannsynligheter
+    har standardfeil ≤ target_se, maks `max_sims` (se simulate_adaptive).
+    Antall simuleringer som faktisk ble brukt står i `n_sims`.
+
+    `chunk_size` styrer hvor mange simuleringer som holdes i minnet samtidig
+    (se simulate_counts).
+
+    Med `store_outcomes=True` lagres sluttplass/-poeng for hver simulering
+    som {liga}_ranks.npy / {liga}_points.npy i `sim_dir` (default
+    data/processed/simulations), til bruk i src.models.sim_query.
+
+    Lag med matematisk avgjort sluttplass (se clinch.position_bounds) står
+    fast på plassen sin og rangeres ikke, så sonene deres blir eksakt 0/100 %.
+    Er alle sluttplasser avgjort, hoppes Monte Carlo over og resultatet er
+    eksakt (gjelder ikke med `store_outcomes`, som trenger én rad per
+    simulering).
+
+    Med `crn=True` brukes felles tilfeldige tall per kamp (frø `seed`, ellers 0):
+    to kjøringer med ulike modeller/data kan da sammenlignes direkte, fordi
+    forskjellen bare skyldes endrede sannsynligheter og ikke ny støy.
+    `antithetic=True` simulerer i par (u, 1 - u) for lavere varians.
+
+    Med `ensemble=True` tas usikkerheten i modellkoeffisientene med: hver
+    blokk à ENSEMBLE_BLOCK simuleringer bruker ett trekk fra ligaens
+    koeffisient-ensemble (train_league(n_ensemble=...)) i stedet for
+    punktestimatet, slik at sannsynlighetene ikke blir for skråsikre.
+
+    Med `shard_out` kjøres bare shard `shard_index` av `n_shards` (n_sims
+    simuleringer, se simulate_shard), og aggregatene lagres dit som .npz med
+    seed-metadata og fingerprints. Shards fra flere maskiner slås sammen med
+    src/scripts/reduce_shards.py. Resultatet gjelder da bare denne sharden.
+
+    Returnerer dict som beskrevet i season_result.
+    """
+    if mode not in SIM_MODES:
+        raise ValueError(f"Ukjent simuleringsmodus: {mode}")
+    if shard_out is not None and (target_se is not None or store_outcomes):
+        raise ValueError("shard_out kan ikke kombineres med target_se eller lagring")
+
+    context = prepare_season(
+        league_name,
+        season=season,
+        models_dir=models_dir,
+        dynamic=mode == "dynamic",
+        ensemble=ensemble,
+    )
+    crn_seed = (seed if seed is not None else 0) if crn else None
+
+    if shard_out is not None:
+        counts, meta = simulate_shard(
+            context,
+            n_sims,
+            shard_index=shard_index,
+            n_shards=n_shards,
+            seed=seed,
+            mode=mode,
+            chunk_size=chunk_size,
+            crn=crn,
+            antithetic=antithetic,
+        )
+        save_shard(shard_out, context, counts, meta)
+        return season_result(context, counts, top_n, relegation_spots)
+
+    if (context["decided_places"] >= 0).all() and not store_outcomes:
+        counts = _decided_counts(context, n_sims)
+        return season_result(context, counts, top_n, relegation_spots)
+
+    store = None
+    if store_outcomes:
+        n_rows = max_sims if target_se is not None else n_sims
+        store = create_outcome_store(
+            context, n_rows, sim_dir, mode, crn_seed, antithetic
+        )
+
+    if target_se is not None:
+        counts = simulate_adaptive(
+            context,
+            target_se,
             top_n=int(top_n),
+            relegation_spots=int(relegation_spots),
+            seed=shard_seeds(league_name, seed, 1)[0],
+            mode=mode,
+            batch_size=batch_size,
+            max_sims=max_sims,
+            store=store,
+            crn_seed=crn_seed,
+            antithetic=antithetic,
         )
-        for t in champion:
-            champ_count[t] += 1
-        for t in topN:
-            topN_count[t] += 1
-        for t in relegated:
-            releg_count[t] += 1
-
-    # --- Til tabell (prosent) ---
-    out = pd.DataFrame({"Team": teams})
-    out["P(vinne)"] = [round(100.0 * champ_count[t] / n_sims, 1) for t in teams]
-    out[f"P(topp {top_n})"] = [round(100.0 * topN_count[t] / n_sims, 1) for t in teams]
-    out["P(nedrykk)"] = [round(100.0 * releg_count[t] / n_sims, 1) for t in teams]
+        return season_result(context, counts, top_n, relegation_spots)
 
-    return out.sort_values("P(vinne)", ascending=False).reset_index(drop=True)
+    sizes = shard_sizes(n_sims, shards)
+    seeds = shard_seeds(league_name, seed, len(sizes))
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    counts = merge_counts(
+        simulate_counts(
+            context,
+            n,
+            seed=ss,
+            mode=mode,
+            chunk_size=chunk_size,
+            store=store,
+            sim_offset=int(offset),
+            crn_seed=crn_seed,
+            antithetic=antithetic,
+        )
+        for n, ss, offset in zip(sizes, seeds, offsets)
+    )
+    return season_result(context, counts, top_n, relegation_spots)
+
+
+def run_simulations(
+    league_name: str,
+    n_sims: int = 1000,
+    season: str | None = None,
+    top_n: int = 5,
+    relegation_spots: int = 3,
+    models_dir: str | None = None,
+    seed: int | None = None,
+    mode: str = "result",
+    target_se: float | None = None,
+    max_sims: int = 100_000,
+    crn: bool = False,
+    antithetic: bool = False,
+    ensemble: bool = False,
+    shard_out: str | None = None,
+    shard_index: int = 0,
+    n_shards: int = 1,
+) -> pd.DataFrame:
+    """
+    Kjør Monte Carlo-simulering for valgt liga/sesong.
+    Se simulate_season for `mode`, adaptiv stopp med `target_se`,
+    variansreduksjon med `crn`/`antithetic`, parameterusikkerhet med
+    `ensemble` og shard-artefakter for flere maskiner med `shard_out`.
+
+    Returnerer DataFrame med kolonner:
+      - Team
+      - P(vinne)   (i %)
+      - P(topp N)  (i %)
+      - P(nedrykk) (i %)
+    Antall simuleringer som ble brukt ligger i `out.attrs["n_sims"]`.
+    """
+    res = simulate_season(
+        league_name=league_name,
+        n_sims=n_sims,
+        season=season,
+        top_n=top_n,
+        relegation_spots=relegation_spots,
+        models_dir=models_dir,
+        seed=seed,
+        mode=mode,
+        target_se=target_se,
+        max_sims=max_sims,
+        crn=crn,
+        antithetic=antithetic,
+        ensemble=ensemble,
+        shard_out=shard_out,
+        shard_index=shard_index,
+        n_shards=n_shards,
+    )
+    out = res["table"]
+    out.attrs["n_sims"] = res["n_sims"]
+    return out
@@ -0,0 +1,169 @@
+# File: src/models/tiebreak.py
+"""
+Tiebreak-regler per liga for den vektoriserte simulatoren.
+
+Reglene settes som "tiebreak" i config/leagues.py, f.eks.
+    ("points", "h2h_points", "h2h_gd", "gd", "gf")   # La Liga / Serie A
+    ("points", "gd", "gf", "h2h_points")            # Premier League
+
+Kriterier:
+  - points:     poeng (alltid først)
+  - gd, gf:     målforskjell og scorede mål totalt
+  - h2h_points: poeng i innbyrdes kamper mellom lagene som fortsatt er likt
+                etter kriteriene foran (minitabell)
+  - h2h_gd:     målforskjell i de samme innbyrdes kampene
+
+Minitabellene regnes for alle simuleringer samtidig med innbyrdes-matriser
+(n_sims × n_lag × n_lag): raden for lag i summeres over lagene j som er likt
+med i på alle tidligere kriterier. Gruppen avgjøres én gang per kriterium;
+reglene om å starte minitabellen på nytt når bare noen av lagene skilles,
+er ikke modellert.
+
+Uten mål (mode="result") brukes bare kriteriene foran det første
+målkriteriet (se available_rules): en liga som rangerer på målforskjell før
+innbyrdes, rangeres da tilfeldig etter poeng, slik som før innbyrdes
+kriterier fantes, i stedet for at innbyrdes poeng rykker fram til andreplass.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from config.leagues import LEAGUES
+
+TIEBREAK_CRITERIA = ("points", "gd", "gf", "h2h_points", "h2h_gd")
+DEFAULT_TIEBREAK = ("points", "gd", "gf")
+_GOAL_CRITERIA = ("gd", "gf", "h2h_gd")
+
+# Poeng per utfall (0=H, 1=U, 2=B) for hjemme- og bortelaget
+_HOME_POINTS = np.array([3, 1, 0], dtype=np.int16)
+_AWAY_POINTS = np.array([0, 1, 3], dtype=np.int16)
+
+
+def league_tiebreak(league_name: str) -> tuple[str, ...]:
+    """Tiebreak-reglene for ligaen i config/leagues.py (ellers standard)."""
+    rules = tuple(LEAGUES.get(league_name, {}).get("tiebreak", DEFAULT_TIEBREAK))
+    unknown = [c for c in rules if c not in TIEBREAK_CRITERIA]
+    if unknown:
+        raise ValueError(f"Ukjente tiebreak-kriterier for {league_name}: {unknown}")
+    if not rules or rules[0] != "points":
+        raise ValueError(f"Tiebreak-reglene for {league_name} må starte med 'points'")
+    return rules
+
+
+def uses_head_to_head(rules: tuple[str, ...]) -> bool:
+    return any(c.startswith("h2h_") for c in rules)
+
+
+def available_rules(rules: tuple[str, ...], goals: bool) -> tuple[str, ...]:
+    """
+    Kriteriene som faktisk kan brukes: alle med mål, ellers bare de foran
+    det første målkriteriet (resten av rekkefølgen er ukjent uten mål).
+    """
+    if goals:
+        return tuple(rules)
+    out = []
+    for criterion in rules:
+        if criterion in _GOAL_CRITERIA:
+            break
+        out.append(criterion)
+    return tuple(out)
+
+
+def head_to_head_base(played: pd.DataFrame, teams: list[str]) -> dict:
+    """
+    Innbyrdes poeng og målforskjell fra spilte kamper i sesongen:
+    [i, j] er det lag i har tatt mot lag j (n_lag × n_lag, int16).
+    """
+    n = len(teams)
+    idx = {t: i for i, t in enumerate(teams)}
+    h = played["home_team"].map(idx).to_numpy(dtype=np.intp)
+    a = played["away_team"].map(idx).to_numpy(dtype=np.intp)
+    gh = played["gf_home"].fillna(0).to_numpy(dtype=np.int64)
+    ga = played["gf_away"].fillna(0).to_numpy(dtype=np.int64)
+    outcome = (gh <= ga).astype(np.intp) + (gh < ga)
+
+    points = np.zeros((n, n), dtype=np.int64)
+    gd = np.zeros((n, n), dtype=np.int64)
+    np.add.at(points, (h, a), _HOME_POINTS[outcome])
+    np.add.at(points, (a, h), _AWAY_POINTS[outcome])
+    np.add.at(gd, (h, a), gh - ga)
+    np.add.at(gd, (a, h), ga - gh)
+    return {"points": points.astype(np.int16), "gd": gd.astype(np.int16)}
+
+
+def _pair_sums(
+    home_values: np.ndarray,
+    away_values: np.ndarray,
+    home_idx: np.ndarray,
+    away_idx: np.ndarray,
+    n_teams: int,
+) -> np.ndarray:
+    """
+    Summerer per-kamp-verdier til innbyrdes-matriser (n_sims × n_lag × n_lag):
+    hjemmelagets verdi til [h, a], bortelagets til [a, h]. Scatter-add med
+    bincount på flate (simulering, lag, motstander)-indekser.
+    """
+    n_sims = home_values.shape[0]
+    cells = n_teams * n_teams
+    offset = (np.arange(n_sims, dtype=np.int64) * cells)[:, None]
+    home_slot = offset + home_idx * n_teams + away_idx
+    away_slot = offset + away_idx * n_teams + home_idx
+    size = n_sims * cells
+    totals = np.bincount(home_slot.ravel(), weights=home_values.ravel(), minlength=size)
+    totals += np.bincount(away_slot.ravel(), weights=away_values.ravel(), minlength=size)
+    return totals.reshape(n_sims, n_teams, n_teams).astype(np.int16)
+
+
+def tiebreak_keys(
+    context: dict,
+    points: np.ndarray,
+    outcomes: np.ndarray,
+    goals: tuple[np.ndarray, np.ndarray] | None = None,
+    totals: tuple[np.ndarray, np.ndarray] | None = None,
+) -> tuple[np.ndarray, ...]:
+    """
+    Nøklene etter poeng, i rekkefølge, til simulate._rank_teams.
+
+    Parametre:
+      - points:   sluttpoeng (n_sims × n_lag)
+      - outcomes: kamputfall 0/1/2 (n_sims × n_kamper)
+      - goals:    (mål hjemme, mål borte) per kamp, eller None uten mål
+      - totals:   (scorede, innslupne) totalt per lag, eller None uten mål
+
+    Reglene tas fra context["tiebreak"] (standard: målforskjell, scorede).
+    """
+    rules = available_rules(
+        context.get("tiebreak", DEFAULT_TIEBREAK),
+        goals is not None and totals is not None,
+    )
+
+    fixtures = context["fixtures"]
+    home_idx = fixtures["home_idx"].astype(np.int64)
+    away_idx = fixtures["away_idx"].astype(np.int64)
+    n_teams = points.shape[1]
+    h2h = {}
+    if "h2h_points" in rules:
+        h2h["h2h_points"] = context["h2h_points"] + _pair_sums(
+            _HOME_POINTS[outcomes], _AWAY_POINTS[outcomes], home_idx, away_idx, n_teams
+        )
+    if "h2h_gd" in rules:
+        diff = goals[0].astype(np.int16) - goals[1]
+        h2h["h2h_gd"] = context["h2h_gd"] + _pair_sums(
+            diff, -diff, home_idx, away_idx, n_teams
+        )
+
+    keys = []
+    # same[s, i, j]: lag i og j er likt på alle kriterier så langt
+    same = points[:, :, None] == points[:, None, :] if h2h else None
+    for criterion in rules[1:]:
+        if criterion == "gd":
+            key = totals[0] - totals[1]
+        elif criterion == "gf":
+            key = totals[0]
+        else:
+            key = (h2h[criterion] * same).sum(axis=2)
+        keys.append(key)
+        if same is not None:
+            same &= key[:, :, None] == key[:, None, :]
+    return tuple(keys)
@@ -1,25 +1,22 @@
 from sklearn.linear_model import PoissonRegressor
 from sklearn.preprocessing import StandardScaler
+import numpy as np
 import pandas as pd
 import os
 import joblib
 
+from src.models.fused import folded_linear_predictor
+from src.models.predict import model_sha256
 
-def train_poisson_model(
-    data: pd.DataFrame, features_home: list[str], features_away: list[str]
-) -> tuple[PoissonRegressor, StandardScaler]:
-    """
-    Train a single PoissonRegressor on both home and away goals,
-    using an `is_home` feature to distinguish home/away.
+ENSEMBLE_METHODS = ("laplace", "bootstrap")
 
-    Parameters:
-      - data: processed DataFrame with columns for home/away stats and targets
-      - features_home: list of column names for home features (e.g. 'xg_home', 'gf_home')
-      - features_away: list of column names for away features (e.g. 'xg_away', 'gf_away')
 
-    Returns:
-      - Trained PoissonRegressor
-      - Fitted StandardScaler
+def _design_matrix(
+    data: pd.DataFrame, features_home: list[str], features_away: list[str]
+) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Stack home and away perspectives into one unscaled design matrix
+    (features, `is_home` and team dummies) with goals as target.
     """
     # Only drop rows where we know the goal outcome
     df_home = data[data["gf_home"].notna()].copy()
@@ -56,6 +53,26 @@ def train_poisson_model(
     to_drop = counts[counts < MIN_COUNT].index.tolist()
     if to_drop:
         X_all = X_all.drop(columns=to_drop)
+    return X_all, y_all
+
+
+def train_poisson_model(
+    data: pd.DataFrame, features_home: list[str], features_away: list[str]
+) -> tuple[PoissonRegressor, StandardScaler]:
+    """
+    Train a single PoissonRegressor on both home and away goals,
+    using an `is_home` feature to distinguish home/away.
+
+    Parameters:
+      - data: processed DataFrame with columns for home/away stats and targets
+      - features_home: list of column names for home features (e.g. 'xg_home', 'gf_home')
+      - features_away: list of column names for away features (e.g. 'xg_away', 'gf_away')
+
+    Returns:
+      - Trained PoissonRegressor
+      - Fitted StandardScaler
+    """
+    X_all, y_all = _design_matrix(data, features_home, features_away)
 
     # Scale features
     scaler = StandardScaler().fit(X_all)
@@ -84,16 +101,102 @@ def _add_team_dummies(df_home, df_away):
     return Xh.align(Xa, join="outer", axis=1, fill_value=0)
 
 
+def coefficient_ensemble(
+    model: PoissonRegressor,
+    X_scaled: np.ndarray,
+    y: np.ndarray,
+    n_draws: int = 200,
+    method: str = "laplace",
+    seed: int | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Draw plausible coefficient vectors around a fitted PoissonRegressor.
+
+    Methods:
+      - "laplace":   multivariate normal around the fit, with covariance from
+                     the inverse Hessian of the penalised log-likelihood
+                     (X' diag(mu) X + n * alpha on the coefficients)
+      - "bootstrap": refit on rows resampled with replacement (slower)
+
+    Returns dict with `intercept` (n_draws,) and `coef` (n_draws × n_features)
+    on the scaled feature space of `X_scaled`.
+    """
+    if method not in ENSEMBLE_METHODS:
+        raise ValueError(f"Unknown ensemble method: {method}")
+    rng = np.random.default_rng(seed)
+    X_scaled = np.asarray(X_scaled, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n_rows, n_features = X_scaled.shape
+
+    if method == "laplace":
+        X1 = np.column_stack([np.ones(n_rows), X_scaled])
+        mu = model.predict(X_scaled)
+        hessian = X1.T @ (mu[:, None] * X1)
+        penalty = np.full(n_features + 1, n_rows * model.alpha)
+        penalty[0] = 0.0
+        hessian[np.diag_indices_from(hessian)] += penalty
+        mean = np.concatenate([[model.intercept_], model.coef_])
+        draws = rng.multivariate_normal(mean, np.linalg.pinv(hessian), n_draws)
+        return {"intercept": draws[:, 0], "coef": draws[:, 1:]}
+
+    intercept = np.empty(n_draws)
+    coef = np.empty((n_draws, n_features))
+    for d in range(n_draws):
+        rows = rng.integers(0, n_rows, n_rows)
+        fit = PoissonRegressor(alpha=model.alpha, max_iter=model.max_iter).fit(
+            X_scaled[rows], y[rows]
+        )
+        intercept[d], coef[d] = fit.intercept_, fit.coef_
+    return {"intercept": intercept, "coef": coef}
+
+
+def fused_predictor(model: PoissonRegressor, scaler: StandardScaler) -> dict:
+    """
+    Fold the scaler into the model so lambdas can be computed on unscaled
+    inputs as exp(intercept + X @ w), without sklearn (see src/models/fused.py).
+
+    The fold itself is fused.folded_linear_predictor. The weights are split
+    into feature weights, the `is_home` weight and attack/defence weights per
+    team (teams whose dummies were dropped as rare get 0).
+    """
+    names = list(scaler.feature_names_in_)
+    w, intercept = folded_linear_predictor(model, scaler)
+
+    weight = dict(zip(names, w))
+    features = [
+        c for c in names if c != "is_home" and not c.startswith(("att_", "def_"))
+    ]
+    teams = sorted({c[4:] for c in names if c.startswith(("att_", "def_"))})
+    return {
+        "intercept": np.float64(intercept),
+        "features": np.array(features, dtype=str),
+        "weights": np.array([weight[c] for c in features], dtype=float),
+        "home_weight": np.float64(weight.get("is_home", 0.0)),
+        "teams": np.array(teams, dtype=str),
+        "att": np.array([weight.get(f"att_{t}", 0.0) for t in teams]),
+        "def": np.array([weight.get(f"def_{t}", 0.0) for t in teams]),
+    }
+
+
 def train_league(
     league_name: str,
     data_dir: str,
     models_dir: str,
     features_home: list[str],
     features_away: list[str],
+    n_ensemble: int = 0,
+    ensemble_method: str = "laplace",
+    seed: int | None = None,
 ) -> None:
     """
     Read processed data for the given league, train a single Poisson model,
-    and save both model and scaler to disk.
+    and save both model and scaler to disk, plus the fused linear predictor
+    ({league}_fused.npz, see fused_predictor).
+
+    With `n_ensemble > 0` a coefficient ensemble (see coefficient_ensemble)
+    is saved as well, as {league}_ensemble.npz, for simulations that account
+    for parameter uncertainty. It stores the sha256 of the model and scaler
+    files (model_hash), so a stale ensemble is refused on load.
     """
     key = league_name.lower().replace(" ", "_")
     processed_file = os.path.join(data_dir, "processed", f"{key}_processed.csv")
@@ -111,5 +214,29 @@ def train_league(
     # Save model and scaler
     joblib.dump(model, os.path.join(models_dir, f"{key}_model.joblib"))
     joblib.dump(scaler, os.path.join(models_dir, f"{key}_scaler.joblib"))
+    # Fused linear artifact for sklearn-free serving (src/models/fused.py)
+    np.savez(
+        os.path.join(models_dir, f"{key}_fused.npz"),
+        model_hash=model_sha256(league_name, models_dir),
+        **fused_predictor(model, scaler),
+    )
+
+    if n_ensemble > 0:
+        X_all, y_all = _design_matrix(df, features_home, features_away)
+        ensemble = coefficient_ensemble(
+            model,
+            scaler.transform(X_all),
+            y_all.to_numpy(),
+            n_draws=n_ensemble,
+            method=ensemble_method,
+            seed=seed,
+        )
+        # Tie the draws to the model files just written (checked on load)
+        np.savez(
+            os.path.join(models_dir, f"{key}_ensemble.npz"),
+            method=ensemble_method,
+            model_hash=model_sha256(league_name, models_dir),
+            **ensemble,
+        )
 
     print(f"[INFO] Trained and saved model for {league_name}")
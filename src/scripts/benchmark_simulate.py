@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Ytelsestest for simuleringsmotoren (src/models/simulate.py) på syntetiske
+ligaer: 18–24 lag, en tilfeldig andel av dobbel serie gjenstår, og hver
+gjenstående kamp får tilfeldige 1X2-sannsynligheter og lambdas.
+
+For hver kombinasjon av liga, motor og antall simuleringer måles det
+run_simulations gjør etter prepare_season (simulate_counts + season_result,
+inkl. clinch-analysen), som simuleringer per sekund (beste av --repeat) og
+høyeste minnebruk (tracemalloc, i en egen kjøring siden sporingen koster tid).
+Innlesing av data og modellprediksjon er holdt utenfor.
+
+    python -m src.scripts.benchmark_simulate --n-sims 1000 10000 --out bench.json
+    python -m src.scripts.benchmark_simulate --compare bench.json
+    python -m src.scripts.benchmark_simulate --check-controlled
+
+Resultatene lagres som JSON med commit og versjoner, slik at kjøringer fra
+ulike commits kan sammenlignes med --compare.
+
+--check-controlled måler hva CRN og antitetiske par koster relativt til
+standardtrekningen i samme modus, og avslutter med feilkode hvis noen av dem
+bruker mer enn MAX_CONTROLLED_COST ganger så lang tid.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.models.simulate import (
+    _cum_probs_from_lambdas,
+    _current_goals,
+    _current_points,
+    _fixture_arrays,
+    _fixture_keys,
+    season_result,
+    simulate_counts,
+)
+from src.models.tiebreak import DEFAULT_TIEBREAK, head_to_head_base
+
+SEASON = "2025-2026"
+H2H_TIEBREAK = ("points", "h2h_points", "h2h_gd", "gd", "gf")
+
+# Motor → innstillinger for simulate_counts (og syntetisk kontekst)
+ENGINES = {
+    "result": {"mode": "result"},
+    "scoreline": {"mode": "scoreline"},
+    "scoreline_h2h": {"mode": "scoreline", "tiebreak": H2H_TIEBREAK},
+    "crn": {"mode": "result", "crn": True},
+    "antithetic": {"mode": "scoreline", "antithetic": True},
+    "ensemble": {"mode": "result", "n_draws": 50},
+}
+
+# Høyeste tillatte tid for CRN/antitetisk relativt til standardtrekningen
+MAX_CONTROLLED_COST = 2.0
+
+
+def synthetic_context(
+    n_teams: int,
+    remaining_frac: float = 0.5,
+    seed: int = 0,
+    tiebreak: tuple[str, ...] = DEFAULT_TIEBREAK,
+    n_draws: int = 0,
+) -> dict:
+    """
+    Kontekst som fra prepare_season for en tilfeldig liga: dobbel serie der
+    `remaining_frac` av kampene gjenstår. Spilte kamper trekkes fra
+    Poisson(1.4)/Poisson(1.1); gjenstående får Dirichlet-sannsynligheter og
+    lambdas fra Gamma. Med `n_draws` legges det til ensemble-trekk av
+    lambdas (se prepare_season(ensemble=True)).
+    """
+    rng = np.random.default_rng(seed)
+    teams = [f"Lag {i + 1:02d}" for i in range(n_teams)]
+    pairs = [(h, a) for h in teams for a in teams if h != a]
+    pairs = [pairs[i] for i in rng.permutation(len(pairs))]
+    n_remaining = int(round(remaining_frac * len(pairs)))
+    played_pairs, remaining_pairs = pairs[n_remaining:], pairs[:n_remaining]
+
+    played = pd.DataFrame(played_pairs, columns=["home_team", "away_team"])
+    played["gf_home"] = rng.poisson(1.4, len(played)).astype(float)
+    played["gf_away"] = rng.poisson(1.1, len(played)).astype(float)
+    played["ga_home"] = played["gf_away"]
+    played["result_home"] = np.sign(played["gf_home"] - played["gf_away"])
+
+    preds = pd.DataFrame(remaining_pairs, columns=["home_team", "away_team"])
+    probs = rng.dirichlet([4.5, 2.7, 2.8], len(preds))
+    preds["prob_home"], preds["prob_draw"], preds["prob_away"] = probs.T
+    preds["lambda_home"] = rng.gamma(6.0, 1.4 / 6.0, len(preds))
+    preds["lambda_away"] = rng.gamma(6.0, 1.1 / 6.0, len(preds))
+
+    fixtures = _fixture_arrays(preds, teams)
+    fixtures["keys"] = _fixture_keys(SEASON, preds)
+    if n_draws:
+        noise = rng.lognormal(0.0, 0.1, (len(preds), n_draws, 2))
+        fixtures["lam_home_draws"] = fixtures["lam_home"][:, None] * noise[..., 0]
+        fixtures["lam_away_draws"] = fixtures["lam_away"][:, None] * noise[..., 1]
+        fixtures["cum_probs_draws"] = _cum_probs_from_lambdas(
+            fixtures["lam_home_draws"], fixtures["lam_away_draws"]
+        )
+
+    goals = _current_goals(played).reindex(teams).fillna(0)
+    h2h = head_to_head_base(played, teams)
+    return {
+        "league": f"Syntetisk {n_teams}",
+        "season": SEASON,
+        "teams": teams,
+        "fixtures": fixtures,
+        "base_points": _current_points(played)
+        .reindex(teams)
+        .fillna(0)
+        .to_numpy(dtype=np.int64),
+        "base_gf": goals["gf"].to_numpy(dtype=np.int16),
+        "base_ga": goals["ga"].to_numpy(dtype=np.int16),
+        "tiebreak": tuple(tiebreak),
+        "h2h_points": h2h["points"],
+        "h2h_gd": h2h["gd"],
+    }
+
+
+def _run(context: dict, engine: dict, n_sims: int, seed: int) -> dict:
+    # Det run_simulations gjør etter prepare_season
+    counts = simulate_counts(
+        context,
+        n_sims,
+        seed=seed,
+        mode=engine["mode"],
+        crn_seed=seed if engine.get("crn") else None,
+        antithetic=engine.get("antithetic", False),
+    )
+    return season_result(context, counts)
+
+
+def benchmark(
+    context: dict, engine: dict, n_sims: int, repeat: int = 3, seed: int = 0
+) -> dict:
+    """Beste tid av `repeat` kjøringer og høyeste minnebruk for én motor."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(context, engine, n_sims, seed)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        _run(context, engine, n_sims, seed)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "seconds": round(best, 4),
+        "sims_per_sec": round(n_sims / best, 1),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def controlled_cost(
+    n_teams: int = 20, n_sims: int = 5000, repeat: int = 3, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Tid for CRN og antitetiske par delt på tiden for standardtrekningen,
+    per modus (result/scoreline), målt med simulate_counts alene.
+    """
+    context = synthetic_context(n_teams, seed=seed)
+
+    def best(mode: str, **kwargs) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            simulate_counts(context, n_sims, seed=seed, mode=mode, **kwargs)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    rows = []
+    for mode in ("result", "scoreline"):
+        default = best(mode)
+        for name, kwargs in (
+            ("crn", {"crn_seed": seed}),
+            ("antithetic", {"antithetic": True}),
+        ):
+            rows.append(
+                {
+                    "mode": mode,
+                    "engine": name,
+                    "ratio": round(best(mode, **kwargs) / default, 2),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_benchmarks(
+    n_teams: list[int],
+    n_sims: list[int],
+    engines: list[str],
+    remaining_frac: float = 0.5,
+    repeat: int = 3,
+    seed: int = 0,
+) -> dict:
+    results = []
+    for teams in n_teams:
+        for name in engines:
+            engine = ENGINES[name]
+            context = synthetic_context(
+                teams,
+                remaining_frac,
+                seed=seed,
+                tiebreak=engine.get("tiebreak", DEFAULT_TIEBREAK),
+                n_draws=engine.get("n_draws", 0),
+            )
+            for n in n_sims:
+                row = {
+                    "n_teams": teams,
+                    "n_fixtures": len(context["fixtures"]["home_idx"]),
+                    "engine": name,
+                    "n_sims": n,
+                    **benchmark(context, engine, n, repeat, seed),
+                }
+                print(
+                    f"[BENCH] {teams} lag, {name:<14} {n:>7} sims: "
+                    f"{row['sims_per_sec']:>10.0f} sims/s, {row['peak_mb']:.1f} MB"
+                )
+                results.append(row)
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "remaining_frac": remaining_frac,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict) -> pd.DataFrame:
+    """sims/s og minne i `new` relativt til `old`, per (lag, motor, n_sims)."""
+    keys = ["n_teams", "engine", "n_sims"]
+    merged = pd.DataFrame(old["results"]).merge(
+        pd.DataFrame(new["results"]), on=keys, suffixes=("_old", "_new")
+    )
+    speedup = merged["sims_per_sec_new"] / merged["sims_per_sec_old"]
+    merged["speedup"] = speedup.round(2)
+    merged["memory"] = (merged["peak_mb_new"] / merged["peak_mb_old"]).round(2)
+    return merged[keys + ["sims_per_sec_old", "sims_per_sec_new", "speedup", "memory"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the season simulator")
+    parser.add_argument(
+        "--teams", type=int, nargs="+", default=[18, 20, 24], help="Antall lag"
+    )
+    parser.add_argument(
+        "--n-sims",
+        type=int,
+        nargs="+",
+        default=[1000, 10_000],
+        help="Antall simuleringer",
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=list(ENGINES),
+        default=list(ENGINES),
+        help="Motorer som måles",
+    )
+    parser.add_argument(
+        "--remaining",
+        type=float,
+        default=0.5,
+        help="Andel av sesongen som gjenstår (default 0.5)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Gjentak per måling")
+    parser.add_argument("--seed", type=int, default=0, help="Frø for ligaene")
+    parser.add_argument("--out", default=None, help="Lagre resultatene som JSON")
+    parser.add_argument(
+        "--compare", default=None, help="Sammenlign med en tidligere JSON"
+    )
+    parser.add_argument(
+        "--check-controlled",
+        action="store_true",
+        help=f"Feil hvis CRN/antitetisk koster over {MAX_CONTROLLED_COST}× standard",
+    )
+    args = parser.parse_args()
+
+    if args.check_controlled:
+        costs = controlled_cost(repeat=args.repeat, seed=args.seed)
+        print(costs.to_string(index=False))
+        if (costs["ratio"] > MAX_CONTROLLED_COST).any():
+            raise SystemExit(
+                f"[BENCH] CRN/antitetisk koster over {MAX_CONTROLLED_COST}× standard"
+            )
+        return
+
+    report = run_benchmarks(
+        args.teams, args.n_sims, args.engines, args.remaining, args.repeat, args.seed
+    )
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] → {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(json.load(f), report).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
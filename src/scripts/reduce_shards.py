@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Slår sammen shard-artefakter fra flere maskiner (simulate_all --shard-out
+eller run_simulations(shard_out=...)) til de vanlige filene i
+data/processed/simulations ({liga}_sim.csv, _positions, _expected, _clinch).
+
+    python -m src.scripts.reduce_shards shards/*.npz
+
+Shardene grupperes per liga. Shards bygget fra ulike processed-data eller
+modeller (ulike fingerprints), med ulik modus eller med samme RNG-strøm
+avvises, og ligaen skrives ikke.
+"""
+import argparse
+import sys
+from collections import defaultdict
+
+from src.models.simulate import (
+    load_shard,
+    merge_shards,
+    save_season_result,
+    season_result,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reduce simulation shards")
+    parser.add_argument("shards", nargs="+", help="Shard-filer (.npz)")
+    parser.add_argument("--top-n", type=int, default=5, help="Topp-N terskel")
+    parser.add_argument(
+        "--relegation-spots", type=int, default=3, help="Antall nedrykksplasser"
+    )
+    args = parser.parse_args()
+
+    by_league = defaultdict(list)
+    for path in args.shards:
+        by_league[load_shard(path)[1]["league"]].append(path)
+
+    failed = False
+    for league, paths in by_league.items():
+        try:
+            context, counts, _ = merge_shards(paths)
+        except ValueError as e:
+            print(f"[REDUCE][ERROR] {league}: {e}")
+            failed = True
+            continue
+        res = season_result(
+            context, counts, top_n=args.top_n, relegation_spots=args.relegation_spots
+        )
+        print(f"[REDUCE] {league}: {len(paths)} shards, {res['n_sims']} simuleringer")
+        written = save_season_result(league, res)
+        print(f"[REDUCE] {league} ({res['season']}) → {', '.join(written)}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,34 @@
 import os
 import argparse
 import pandas as pd
-from datetime import datetime, timezone
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from multiprocessing import resource_tracker
 from config.leagues import LEAGUES
 from config.settings import DATA_PATH
-from src.models.simulate import run_simulations
+from src.models.simulate import (
+    prepare_season,
+    create_outcome_store,
+    simulate_counts,
+    simulate_adaptive,
+    merge_counts,
+    season_result,
+    shard_seeds,
+    shard_sizes,
+    simulate_shard,
+    save_shard,
+    share_context,
+    release_shared,
+    call_with_shared_context,
+    save_simulation,
+    save_season_result,
+    SIM_MODES,
+)
+from src.models.sim_query import load_outcomes, match_leverage, match_importance
 
 
 def _processed_path(league: str) -> str:
@@ -25,22 +49,176 @@ def _latest_season_from_file(league: str) -> str:
     return sorted(df["season"].dropna().unique(), key=keyfunc)[-1]
 
 
-def _save_simulation(
-    league: str, season: str, n_sims: int, df_out: pd.DataFrame
-) -> str:
-    out_dir = f"{DATA_PATH}/processed/simulations"
-    os.makedirs(out_dir, exist_ok=True)
+def _prepare(league: str, mode: str = "result", ensemble: bool = False) -> dict:
+    season = _latest_season_from_file(league)
+    return prepare_season(
+        league,
+        season=season,
+        models_dir=f"{DATA_PATH}/models",
+        dynamic=mode == "dynamic",
+        ensemble=ensemble,
+    )
+
+
+def _save_league(league: str, res: dict) -> None:
+    paths = save_season_result(league, res)
+    print(f"[SIM] {league} ({res['season']}) → {', '.join(paths)}")
+
+
+def _save_importance(league: str, res: dict, args: argparse.Namespace) -> None:
+    # Viktigste gjenstående kamper for tittel og nedrykk, fra lagrede utfall
+    n_teams = len(res["positions"])
+    zones = {
+        "vinne": (1, 1),
+        "nedrykk": (n_teams - args.relegation_spots + 1, n_teams),
+    }
+    ranked = match_importance(match_leverage(load_outcomes(league), zones))
+    path = save_simulation(
+        league, res["season"], res["n_sims"], ranked, suffix="importance"
+    )
+    print(f"[SIM] {league} viktigste kamper → {path}")
+
+
+def _shard_path(shard_dir: str, league: str, shard_index: int) -> str:
     key = league.lower().replace(" ", "_")
-    out_path = f"{out_dir}/{key}_sim.csv"
-    df_save = df_out.copy()
-    df_save.insert(0, "League", league)
-    df_save.insert(1, "Season", season)
-    df_save.insert(2, "N_sims", n_sims)
-    df_save.insert(
-        3, "GeneratedAtUTC", datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return os.path.join(shard_dir, f"{key}_shard{shard_index}.npz")
+
+
+def _save_shard(league: str, ctx: dict, fut: Future, args: argparse.Namespace) -> None:
+    counts, meta = fut.result()
+    path = save_shard(
+        _shard_path(args.shard_out, league, args.shard_index), ctx, counts, meta
     )
-    df_save.to_csv(out_path, index=False)
-    return out_path
+    print(f"[SIM] {league} shard {args.shard_index}/{args.n_shards} → {path}")
+
+
+def _executor(workers: int) -> Executor:
+    # Én worker: kjør i samme prosess (samme kodevei, ingen pickling)
+    if workers <= 1:
+        return ThreadPoolExecutor(max_workers=1)
+    # Start resource tracker før workers, slik at de deler den med denne
+    # prosessen og ikke frigir shared_memory-blokkene når de avslutter
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _submit(ex: Executor, func, ctx: dict, shared: dict | None, *args, **kwargs):
+    # Med delt kontekst sendes bare navnene på shared_memory-blokkene
+    if shared is None:
+        return ex.submit(func, ctx, *args, **kwargs)
+    return ex.submit(call_with_shared_context, func, shared, *args, **kwargs)
+
+
+def _submit_league(
+    ex: Executor,
+    league: str,
+    ctx: dict,
+    args: argparse.Namespace,
+    sizes: list[int],
+    shared: dict | None = None,
+) -> list[Future]:
+    crn_seed = (args.seed if args.seed is not None else 0) if args.crn else None
+    store = None
+    if args.store_outcomes:
+        n_rows = args.max_sims if args.target_se is not None else sum(sizes)
+        store = create_outcome_store(
+            ctx, n_rows, mode=args.mode, crn_seed=crn_seed, antithetic=args.antithetic
+        )
+
+    if args.target_se is not None:
+        return [
+            _submit(
+                ex,
+                simulate_adaptive,
+                ctx,
+                shared,
+                args.target_se,
+                top_n=args.top_n,
+                relegation_spots=args.relegation_spots,
+                seed=shard_seeds(league, args.seed, 1)[0],
+                mode=args.mode,
+                max_sims=args.max_sims,
+                store=store,
+                crn_seed=crn_seed,
+                antithetic=args.antithetic,
+            )
+        ]
+
+    # Hver shard skriver til sin egen del av den lagrede tensoren
+    seeds = shard_seeds(league, args.seed, len(sizes))
+    offsets = [sum(sizes[:i]) for i in range(len(sizes))]
+    return [
+        _submit(
+            ex,
+            simulate_counts,
+            ctx,
+            shared,
+            n,
+            seed=ss,
+            mode=args.mode,
+            store=store,
+            sim_offset=offset,
+            crn_seed=crn_seed,
+            antithetic=args.antithetic,
+        )
+        for n, ss, offset in zip(sizes, seeds, offsets)
+    ]
+
+
+def _simulate_leagues(
+    ex: Executor,
+    contexts: dict,
+    shared: dict,
+    args: argparse.Namespace,
+    sizes: list[int],
+) -> None:
+    if args.shard_out:
+        # Én shard per liga; sammenslåing skjer i src.scripts.reduce_shards
+        shards = {
+            league: _submit(
+                ex,
+                simulate_shard,
+                ctx,
+                shared.get(league),
+                args.n_sims,
+                shard_index=args.shard_index,
+                n_shards=args.n_shards,
+                seed=args.seed,
+                mode=args.mode,
+                crn=args.crn,
+                antithetic=args.antithetic,
+            )
+            for league, ctx in contexts.items()
+        }
+        for league, fut in shards.items():
+            try:
+                _save_shard(league, contexts[league], fut, args)
+            except Exception as e:
+                print(f"[SIM][WARN] Skipped {league}: {e}")
+        return
+
+    # 2) Simuler alle (liga, shard)-par; hver shard har fast frø.
+    #    Med --target-se simuleres hver liga adaptivt som én oppgave.
+    tasks = {
+        league: _submit_league(ex, league, ctx, args, sizes, shared.get(league))
+        for league, ctx in contexts.items()
+    }
+
+    # 3) Summer tellematrisene per liga og lagre
+    for league, futs in tasks.items():
+        try:
+            counts = merge_counts(f.result() for f in futs)
+            res = season_result(
+                contexts[league],
+                counts,
+                top_n=args.top_n,
+                relegation_spots=args.relegation_spots,
+            )
+            _save_league(league, res)
+            if args.store_outcomes:
+                _save_importance(league, res, args)
+        except Exception as e:
+            print(f"[SIM][WARN] Skipped {league}: {e}")
 
 
 def main():
@@ -57,23 +235,113 @@ def main():
     parser.add_argument(
         "--relegation-spots", type=int, default=3, help="Antall nedrykksplasser"
     )
+    parser.add_argument(
+        "--mode",
+        choices=list(SIM_MODES),
+        default="result",
+        help="result: trekk H/U/B; scoreline: trekk mål og bruk målforskjell ved poenglikhet; "
+        "dynamic: som scoreline, med form oppdatert runde for runde",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Antall prosesser som simulerer ligaer/shards parallelt (default 1)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Del hver ligas simuleringer i N shards med egne RNG-strømmer",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Frø for reproduserbare resultater (uavhengig av --workers)",
+    )
+    parser.add_argument(
+        "--target-se",
+        type=float,
+        default=None,
+        help="Adaptiv stopp: maks standardfeil (prosentpoeng) på rapporterte sannsynligheter. "
+        "Overstyrer --n-sims/--shards",
+    )
+    parser.add_argument(
+        "--max-sims",
+        type=int,
+        default=100_000,
+        help="Øvre grense for simuleringer per liga med --target-se (default 100000)",
+    )
+    parser.add_argument(
+        "--store-outcomes",
+        action="store_true",
+        help="Lagre sluttplass/-poeng per simulering som .npy (for src.models.sim_query) "
+        "og skriv de viktigste gjenstående kampene",
+    )
+    parser.add_argument(
+        "--crn",
+        action="store_true",
+        help="Felles tilfeldige tall per kamp (frø fra --seed), for sammenlignbare kjøringer",
+    )
+    parser.add_argument(
+        "--antithetic",
+        action="store_true",
+        help="Antitetiske par (u, 1 - u) for lavere varians",
+    )
+    parser.add_argument(
+        "--ensemble",
+        action="store_true",
+        help="Ta med usikkerhet i modellkoeffisientene (krever {liga}_ensemble.npz, "
+        "se update_all --ensemble-draws)",
+    )
+    parser.add_argument(
+        "--shard-out",
+        default=None,
+        help="Kjør bare shard --shard-index av --n-shards (hver på --n-sims) og lagre "
+        "aggregatene som {liga}_shard{i}.npz i denne mappen, for reduce_shards",
+    )
+    parser.add_argument(
+        "--shard-index", type=int, default=0, help="Shard-nummer med --shard-out"
+    )
+    parser.add_argument(
+        "--n-shards",
+        type=int,
+        default=1,
+        help="Totalt antall shards på tvers av maskiner med --shard-out",
+    )
     args = parser.parse_args()
+    if args.shard_out and (args.target_se is not None or args.store_outcomes):
+        parser.error("--shard-out kan ikke kombineres med --target-se/--store-outcomes")
+    if not 0 <= args.shard_index < args.n_shards:
+        parser.error("--shard-index må være i [0, --n-shards)")
+
+    sizes = shard_sizes(args.n_sims, args.shards)
 
-    for league in LEAGUES.keys():
+    with _executor(args.workers) as ex:
+        # 1) Forbered alle ligaer (les data + prediker gjenstående kamper)
+        prepared = {
+            league: ex.submit(_prepare, league, args.mode, args.ensemble)
+            for league in LEAGUES
+        }
+        contexts = {}
+        for league, fut in prepared.items():
+            try:
+                contexts[league] = fut.result()
+            except Exception as e:
+                print(f"[SIM][WARN] Skipped {league}: {e}")
+
+        # Med flere prosesser legges kontekstene (kamparrays, lambdas,
+        # startpoeng) i delt minne én gang i stedet for å pickles per oppgave
+        shared, blocks = {}, []
         try:
-            season = _latest_season_from_file(league)
-            res = run_simulations(
-                league_name=league,
-                n_sims=args.n_sims,
-                season=season,
-                top_n=args.top_n,
-                relegation_spots=args.relegation_spots,
-                models_dir=f"{DATA_PATH}/models",
-            )
-            out_path = _save_simulation(league, season, args.n_sims, res)
-            print(f"[SIM] {league} ({season}) → {out_path}")
-        except Exception as e:
-            print(f"[SIM][WARN] Skipped {league}: {e}")
+            if args.workers > 1:
+                for league, ctx in contexts.items():
+                    shared[league], league_blocks = share_context(ctx)
+                    blocks.extend(league_blocks)
+            _simulate_leagues(ex, contexts, shared, args, sizes)
+        finally:
+            release_shared(blocks)
 
 
 if __name__ == "__main__":
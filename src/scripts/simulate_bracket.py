@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Simulerer en cup-/sluttspillbrakett fra en JSON-definisjon
+(se src/models/bracket.py) og skriver sannsynligheten for å nå hver runde.
+
+    python -m src.scripts.simulate_bracket brackets/cup.json --n-sims 20000
+"""
+import argparse
+import os
+
+from src.models.bracket import load_bracket, simulate_bracket
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a knockout bracket")
+    parser.add_argument("bracket", help="Sti til brakettdefinisjon (JSON)")
+    parser.add_argument(
+        "--n-sims", type=int, default=10_000, help="Antall simuleringer"
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Frø")
+    parser.add_argument("--out", default=None, help="Lagre tabellen som CSV")
+    args = parser.parse_args()
+
+    bracket = load_bracket(args.bracket)
+    table = simulate_bracket(bracket, n_sims=args.n_sims, seed=args.seed)
+    print(table.to_string(index=False))
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        table.to_csv(args.out, index=False)
+        print(f"[BRACKET] → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
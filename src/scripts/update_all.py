@@ -3,6 +3,7 @@
 Script to fetch raw data for the current season, merge with the previous season's raw data,
 process matches and train Poisson models for all leagues.
 """
+import argparse
 import os
 import pandas as pd
 import time
@@ -17,6 +18,18 @@ def log(msg):
     print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Fetch, process and train models for all leagues"
+    )
+    parser.add_argument(
+        "--ensemble-draws",
+        type=int,
+        default=0,
+        help="Antall trekk i koeffisient-ensemblet per liga (for simulate_all "
+        "--ensemble); 0 = ikke tren ensemble (default)",
+    )
+    args = parser.parse_args()
+
     log("Starter update_all_daily pipeline")
     
     # 1) Finn og hent inneværende sesong
@@ -78,6 +91,7 @@ def main():
             models_dir=models_dir,
             features_home=features_home,
             features_away=features_away,
+            n_ensemble=args.ensemble_draws,
         )
 
     print("\n=== All leagues processed and models trained ===")
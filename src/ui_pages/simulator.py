@@ -6,9 +6,9 @@ from config.leagues import LEAGUES
 from config.settings import DATA_PATH
 
 
-def _sim_path(league: str) -> str:
+def _sim_path(league: str, suffix: str = "sim") -> str:
     key = league.lower().replace(" ", "_")
-    return f"{DATA_PATH}/processed/simulations/{key}_sim.csv"
+    return f"{DATA_PATH}/processed/simulations/{key}_{suffix}.csv"
 
 
 def show_simulator_page_cached():
@@ -72,3 +72,11 @@ def show_simulator_page_cached():
         display_df[c] = (display_df[c] * 100).round(1).astype(str) + "%"
 
     st.dataframe(display_df, hide_index=True, use_container_width=True)
+
+    # Forventet sluttabell med 5/50/95 %-bånd (hvis simulate_all har skrevet den)
+    expected_path = _sim_path(league, "expected")
+    if os.path.exists(expected_path):
+        expected = pd.read_csv(expected_path)
+        cols = [c for c in expected.columns if c not in drop_cols]
+        st.markdown("**Forventet sluttabell**")
+        st.dataframe(expected[cols], hide_index=True, use_container_width=True)
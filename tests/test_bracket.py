@@ -0,0 +1,146 @@
+# File: tests/test_bracket.py
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models import bracket as br_mod
+from src.models.bracket import (
+    bracket_lambdas,
+    bracket_teams,
+    load_bracket,
+    simulate_bracket,
+)
+
+# ----------------------------
+# Pytest fixtures
+# ----------------------------
+
+
+@pytest.fixture
+def bracket():
+    """Fire lag: semifinaler over to kamper og finale på nøytral bane."""
+    return {
+        "league": "Test League",
+        "rounds": [
+            {"name": "Semifinale", "legs": 2, "ties": [["A", "B"], ["C", "D"]]},
+            {"name": "Finale", "legs": 1, "neutral": True},
+        ],
+    }
+
+
+def _lambdas(strength: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    """Lambda for lag i mot j = styrke i (likt hjemme og borte)."""
+    s = np.array(strength, dtype=float)
+    lam = np.repeat(s[:, None], len(s), axis=1)
+    np.fill_diagonal(lam, 0.0)
+    return lam, lam.T.copy()
+
+
+# ----------------------------
+# Tester for brakettdefinisjon
+# ----------------------------
+
+
+def test_load_bracket_validates_shape(tmp_path, monkeypatch, bracket):
+    monkeypatch.setitem(br_mod.LEAGUES, "Test League", {})
+    path = tmp_path / "cup.json"
+    path.write_text(json.dumps(bracket), encoding="utf-8")
+    assert bracket_teams(load_bracket(str(path))) == ["A", "B", "C", "D"]
+
+    bracket["rounds"].append({"name": "Ekstra"})
+    path.write_text(json.dumps(bracket), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_bracket(str(path))
+
+
+def test_load_bracket_rejects_unknown_league(tmp_path, bracket):
+    path = tmp_path / "cup.json"
+    for league in ("Ukjent liga", None):
+        bracket["league"] = league
+        path.write_text(json.dumps(bracket), encoding="utf-8")
+        with pytest.raises(ValueError, match="'league'"):
+            load_bracket(str(path))
+
+
+# ----------------------------
+# Tester for simulering
+# ----------------------------
+
+
+def test_equal_teams_have_equal_chances(bracket):
+    out = simulate_bracket(bracket, 40_000, seed=1, lambdas=_lambdas([1.3] * 4))
+    assert list(out.columns) == ["Team", "P(Finale)", "P(vinne)"]
+    np.testing.assert_allclose(out["P(Finale)"], 50.0, atol=1.5)
+    np.testing.assert_allclose(out["P(vinne)"], 25.0, atol=1.5)
+    assert out["P(vinne)"].sum() == pytest.approx(100.0, abs=0.5)
+
+
+def test_stronger_team_wins_more_often(bracket):
+    out = simulate_bracket(bracket, 20_000, seed=2, lambdas=_lambdas([3, 1, 1, 1]))
+    out = out.set_index("Team")
+    assert out.index[0] == "A"
+    assert out.loc["A", "P(Finale)"] > 80.0
+    # A møter aldri C/D før finalen
+    assert out.loc["B", "P(Finale)"] == pytest.approx(100 - out.loc["A", "P(Finale)"])
+
+
+def test_goalless_ties_go_to_penalties(bracket):
+    zero = (np.zeros((4, 4)), np.zeros((4, 4)))
+    bracket["penalty_home_prob"] = 1.0
+    out = simulate_bracket(bracket, 5000, seed=3, lambdas=zero).set_index("Team")
+    # Laget med hjemmebane i returkampen vinner alltid straffene
+    assert out.loc[["B", "D"], "P(Finale)"].tolist() == [100.0, 100.0]
+    # Finalen er på nøytral bane: straffene er 50/50
+    assert out.loc["B", "P(vinne)"] == pytest.approx(50.0, abs=2.0)
+
+
+def test_extra_time_scales_lambdas(bracket):
+    # Ett oppgjør over én kamp: bare ekstraomgangene kan avgjøre før straffer
+    single = {
+        "league": "Test League",
+        "extra_time_factor": 0.0,
+        "penalty_home_prob": 1.0,
+        "rounds": [{"name": "Finale", "legs": 1, "ties": [["A", "B"]]}],
+    }
+    lam = _lambdas([1.0, 1.0])
+    out = simulate_bracket(single, 20_000, seed=4, lambdas=lam).set_index("Team")
+    # Uten ekstraomganger går alle uavgjorte (P ≈ 0.31) til hjemmelaget A
+    assert out.loc["A", "P(vinne)"] == pytest.approx(100 * (0.5 + 0.31 / 2), abs=1.5)
+
+
+# ----------------------------
+# Tester for lambdas fra ligaens modell
+# ----------------------------
+
+
+def test_bracket_lambdas_build_matchups_from_team_features(tmp_path, monkeypatch):
+    proc = tmp_path / "processed"
+    proc.mkdir()
+    pd.DataFrame(
+        {
+            "date": ["2025-08-01", "2025-08-08", "2025-08-15"],
+            "home_team": ["A", "B", "C"],
+            "away_team": ["B", "C", "A"],
+            "result_home": [1.0, 0.0, None],
+            "xg_home_roll5": [1.0, 2.0, 3.0],
+            "xg_away_roll5": [4.0, 5.0, 6.0],
+        }
+    ).to_csv(proc / "test_league_processed.csv", index=False)
+    monkeypatch.setattr(br_mod, "DATA_PATH", str(tmp_path))
+
+    def fake_predict(df, **kwargs):
+        # Lambda = eget lags xg_roll5, slik at vi ser hvilken profil som ble brukt
+        out = df[["home_team", "away_team"]].copy()
+        out["lambda_home"] = df["xg_home_roll5"]
+        out["lambda_away"] = df["xg_away_roll5"]
+        return out
+
+    monkeypatch.setattr(br_mod, "predict_poisson_from_models", fake_predict)
+    lam_home, lam_away = bracket_lambdas("Test League", ["A", "B", "C"])
+
+    # A: uspilt bortekamp (6.0); B: siste spilte kamp hjemme (2.0); C: uspilt (3.0)
+    assert lam_home[0, 1] == 6.0 and lam_away[0, 1] == 2.0
+    assert lam_home[2, 0] == 3.0 and lam_away[2, 0] == 6.0
+    assert lam_home[1, 1] == 0.0
@@ -0,0 +1,170 @@
+# File: tests/test_clinch.py
+import numpy as np
+import pytest
+
+from src.models import simulate as sim_mod
+from src.models.clinch import (
+    position_bounds,
+    zone_status,
+    magic_numbers,
+    clinch_table,
+    decided_mask,
+)
+
+# ----------------------------
+# Hjelpefunksjoner
+# ----------------------------
+
+
+def _context(points: dict[str, int], fixtures: list[tuple[str, str]]) -> dict:
+    """
+    Minimal sesongkontekst (som fra prepare_season) med gitte poeng og
+    gjenstående kamper. Alle kamper har 1X2 = 0.5/0.3/0.2.
+    """
+    teams = list(points)
+    idx = {t: i for i, t in enumerate(teams)}
+    n = len(fixtures)
+    context = {
+        "league": "Test League",
+        "season": "2024-2025",
+        "teams": teams,
+        "fixtures": {
+            "home_idx": np.array([idx[h] for h, _ in fixtures], dtype=np.intp),
+            "away_idx": np.array([idx[a] for _, a in fixtures], dtype=np.intp),
+            "cum_probs": np.tile([0.5, 0.8], (n, 1)),
+            "keys": np.arange(n, dtype=np.uint64),
+        },
+        "base_points": np.array(list(points.values()), dtype=np.int64),
+    }
+    context["decided_places"] = sim_mod._decided_places(position_bounds(context))
+    return context
+
+
+# ----------------------------
+# Tester for plassgrenser
+# ----------------------------
+
+
+def test_position_bounds_pairwise():
+    # A kan ikke tas igjen, B kan ikke nå A, C/D kan nå B
+    ctx = _context({"A": 6, "B": 2, "C": 1, "D": 1}, [("A", "B"), ("C", "D")])
+    bounds = position_bounds(ctx)
+
+    assert bounds.loc["A", "Maks poeng"] == 9
+    assert (bounds.loc["A", ["Beste plass", "Dårligste plass"]] == [1, 1]).all()
+    assert (bounds.loc["B", ["Beste plass", "Dårligste plass"]] == [2, 4]).all()
+    assert (bounds.loc["C", ["Beste plass", "Dårligste plass"]] == [2, 4]).all()
+
+
+def test_max_flow_detects_title_elimination():
+    # T er ferdig med 10 poeng. X, Y, Z har 9 og spiller mot hverandre:
+    # kampene deler ut minst 6 poeng, så én av dem passerer alltid T.
+    ctx = _context(
+        {"T": 10, "X": 9, "Y": 9, "Z": 9},
+        [("X", "Y"), ("Y", "Z"), ("Z", "X")],
+    )
+    bounds = position_bounds(ctx)
+    assert bounds.loc["T", "Beste plass"] == 2
+
+    # Med bare én kamp igjen kan T fortsatt dele førsteplassen
+    ctx = _context({"T": 10, "X": 9, "Y": 9, "Z": 9}, [("X", "Y")])
+    assert position_bounds(ctx).loc["T", "Beste plass"] == 1
+
+
+def test_zone_status_and_decided_mask():
+    ctx = _context({"A": 6, "B": 2, "C": 1, "D": 1}, [("A", "B"), ("C", "D")])
+    bounds = position_bounds(ctx)
+
+    status = zone_status(bounds, 1, 1)
+    assert status["A"] == "sikret"
+    assert (status[["B", "C", "D"]] == "ute").all()
+    assert zone_status(bounds, 3, 4)["B"] == "åpen"
+
+    mask = decided_mask(bounds, {"vinne": (1, 1), "nedrykk": (4, 4)})
+    np.testing.assert_array_equal(mask[:, 0], [True] * 4)
+    np.testing.assert_array_equal(mask[:, 1], [True, False, False, False])
+
+
+def test_magic_numbers():
+    ctx = _context({"A": 6, "B": 2, "C": 1, "D": 1}, [("A", "B"), ("C", "D")])
+    magic = magic_numbers(ctx, 1)
+    assert magic["A"] == 0
+    # B må forbi A sitt maks (9): 9 - 2 + 1
+    assert magic["B"] == 8
+    # Topp 3 for C: tredje beste maks blant de andre er D sine 4
+    assert magic_numbers(ctx, 3)["C"] == 4
+    assert (magic_numbers(ctx, 4) == 0).all()
+
+
+def test_clinch_table_columns():
+    ctx = _context({"A": 6, "B": 2, "C": 1, "D": 1}, [("A", "B"), ("C", "D")])
+    table = clinch_table(ctx, {"vinne": (1, 1), "nedrykk": (4, 4)})
+    assert list(table.columns) == [
+        "Team",
+        "Poeng nå",
+        "Kamper igjen",
+        "Maks poeng",
+        "Beste plass",
+        "Dårligste plass",
+        "Status(vinne)",
+        "Status(nedrykk)",
+        "Magisk tall(vinne)",
+        "Magisk tall(unngå nedrykk)",
+    ]
+
+
+# ----------------------------
+# Tester for kortslutning i simulatoren
+# ----------------------------
+
+
+def test_simulate_season_skips_monte_carlo_when_decided(monkeypatch):
+    ctx = _context({"X": 9, "Y": 5, "Z": 1}, [("Y", "Z")])
+    monkeypatch.setattr(sim_mod, "prepare_season", lambda *a, **k: ctx)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("simulate_counts skal ikke kalles")
+
+    monkeypatch.setattr(sim_mod, "simulate_counts", fail)
+
+    res = sim_mod.simulate_season(
+        "Test League", n_sims=500, top_n=1, relegation_spots=1
+    )
+    table = res["table"].set_index("Team")
+    assert table.loc["X", "P(vinne)"] == 100.0
+    assert table.loc["Z", "P(nedrykk)"] == 100.0
+    # Poengsnitt er eksakt: Y har 5 + 3·0.5 + 1·0.3
+    assert res["points"].loc["Y", "mean"] == pytest.approx(6.8)
+    assert (res["clinch"]["Status(vinne)"] != "åpen").all()
+
+
+def test_simulate_season_pins_decided_teams(monkeypatch):
+    # A er sikret seieren, B/C/D kjemper om plass 2–4
+    ctx = _context(
+        {"A": 12, "B": 4, "C": 3, "D": 0}, [("B", "C"), ("C", "D"), ("D", "B")]
+    )
+    assert list(ctx["decided_places"]) == [0, -1, -1, -1]
+    monkeypatch.setattr(sim_mod, "prepare_season", lambda *a, **k: ctx)
+
+    ranked_widths = []
+    rank_teams = sim_mod._rank_teams
+
+    def spy(points, rng, tiebreakers=()):
+        ranked_widths.append(points.shape[1])
+        return rank_teams(points, rng, tiebreakers)
+
+    monkeypatch.setattr(sim_mod, "_rank_teams", spy)
+
+    res = sim_mod.simulate_season(
+        "Test League", n_sims=500, seed=1, top_n=2, relegation_spots=1
+    )
+    # Bare de tre åpne lagene rangeres
+    assert ranked_widths and set(ranked_widths) == {3}
+    positions = res["positions"]
+    assert positions.loc["A", 1] == 500
+    assert (positions.drop(index="A")[1] == 0).all()
+    assert (positions.sum(axis=0) == 500).all()
+    table = res["table"].set_index("Team")
+    assert table.loc["A", "P(vinne)"] == 100.0
+    assert table.loc["A", "P(nedrykk)"] == 0.0
+    assert 0.0 < table.loc["D", "P(nedrykk)"] < 100.0
@@ -0,0 +1,135 @@
+# File: tests/test_form.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import PoissonRegressor
+from sklearn.preprocessing import StandardScaler
+
+from src.models.form import (
+    FORM_STATS,
+    folded_linear_predictor,
+    prepare_form,
+    simulate_form_scorelines,
+    _team_history,
+    _init_state,
+    _push,
+    _form_means,
+)
+from src.models.simulate import simulate_counts
+
+FEATURES = ["gf_roll2", "ga_roll2", "is_home"]
+
+# ----------------------------
+# Pytest fixtures
+# ----------------------------
+
+
+@pytest.fixture
+def fitted():
+    """Liten Poisson-modell på features med samme navn som i pipeline."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0, 3, size=(400, 3)), columns=FEATURES)
+    X["is_home"] = rng.integers(0, 2, 400)
+    y = rng.poisson(np.exp(0.1 + 0.3 * X["gf_roll2"] - 0.1 * X["ga_roll2"]))
+    scaler = StandardScaler().fit(X)
+    model = PoissonRegressor(alpha=0.0).fit(scaler.transform(X), y)
+    return model, scaler, X
+
+
+@pytest.fixture
+def played():
+    """To spilte kamper mellom A og B (A scorer 2 og 3)."""
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(["2025-08-01", "2025-08-08"]),
+            "home_team": ["A", "B"],
+            "away_team": ["B", "A"],
+            "gf_home": [2.0, 0.0],
+            "gf_away": [1.0, 3.0],
+            "xg_home": [1.5, 0.5],
+            "xg_away": [0.8, 2.0],
+        }
+    )
+
+
+# ----------------------------
+# Tester
+# ----------------------------
+
+
+def test_folded_predictor_matches_model(fitted):
+    model, scaler, X = fitted
+    w, b = folded_linear_predictor(model, scaler)
+    np.testing.assert_allclose(
+        np.exp(b + X.to_numpy() @ w), model.predict(scaler.transform(X))
+    )
+
+
+def test_team_history_is_oldest_first_and_padded(played):
+    hist = _team_history(played, ["A", "B", "C"], size=3)
+    assert hist.shape == (3, len(FORM_STATS), 3)
+    gf = FORM_STATS.index("gf")
+    np.testing.assert_array_equal(hist[0, gf], [np.nan, 2.0, 3.0])
+    # Lag uten kamper har bare NaN
+    assert np.isnan(hist[2]).all()
+
+
+def test_ring_buffer_running_means(played):
+    hist = _team_history(played, ["A", "B"], size=3)
+    state = _init_state(hist, n_sims=2, windows={2, 3})
+    gf = FORM_STATS.index("gf")
+
+    # Historikk A: [NaN, 2, 3] → snitt siste 3 hopper over NaN
+    assert _form_means(state, np.array([0]), gf, 3)[0, 0] == pytest.approx(2.5)
+
+    # Ny kamp for A: gf 4 i sim 0, 0 i sim 1
+    values = np.zeros((1, len(FORM_STATS), 2))
+    values[0, gf] = [4.0, 0.0]
+    _push(state, np.array([0]), values)
+    a = np.array([0])
+    np.testing.assert_allclose(_form_means(state, a, gf, 2)[:, 0], [3.5, 1.5])
+    np.testing.assert_allclose(_form_means(state, a, gf, 3)[:, 0], [3.0, 5 / 3])
+
+
+def test_dynamic_scorelines_react_to_form(fitted, played):
+    model, scaler, _ = fitted
+    remaining = pd.DataFrame(
+        {
+            "round": [3, 4, 5],
+            "home_team": ["A", "B", "A"],
+            "away_team": ["B", "A", "B"],
+            "gf_home_roll2": [2.5, 0.5, 2.5],
+            "gf_away_roll2": [0.5, 2.5, 0.5],
+            "ga_home_roll2": [0.5, 2.5, 0.5],
+            "ga_away_roll2": [2.5, 0.5, 2.5],
+        }
+    )
+    preds = pd.DataFrame(
+        {"lambda_home": [1.5, 1.0, 1.5], "lambda_away": [1.0, 1.5, 1.0]}
+    )
+    form = prepare_form(played, remaining, preds, ["A", "B"], model, scaler)
+    np.testing.assert_array_equal(form["rounds"], [0, 1, 2])
+
+    home_idx, away_idx = np.array([0, 1, 0]), np.array([1, 0, 1])
+    rng = np.random.default_rng(1)
+    g_h, g_a = simulate_form_scorelines(form, home_idx, away_idx, 20000, rng)
+
+    # Første runde bruker dagens form: samme snitt som statisk prediksjon
+    assert g_h[:, 0].mean() == pytest.approx(1.5, abs=0.05)
+    # Mål i runde 1 løfter A sin form (gf har positiv vekt) → flere mål i runde 3
+    many = g_h[:, 0] >= 3
+    assert g_h[many, 2].mean() > g_h[~many, 2].mean()
+
+
+def test_simulate_counts_requires_form_for_dynamic():
+    context = {
+        "teams": ["A", "B"],
+        "fixtures": {
+            "home_idx": np.array([0]),
+            "away_idx": np.array([1]),
+            "cum_probs": np.array([[0.5, 0.8]]),
+        },
+        "base_points": np.zeros(2, dtype=np.int64),
+    }
+    with pytest.raises(ValueError):
+        simulate_counts(context, 10, mode="dynamic")
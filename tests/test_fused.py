@@ -0,0 +1,226 @@
+# File: tests/test_fused.py
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sklearn.linear_model import PoissonRegressor
+
+from src.models.fused import (
+    fused_lambdas,
+    lambdas_from_arrays,
+    load_fused_predictor,
+    poisson_pmf,
+    predict_fused,
+    team_indices,
+)
+from src.models.predict import (
+    load_fused_for_league,
+    load_models_for_league,
+    model_sha256,
+    predict_poisson_from_models,
+)
+from src.models.train import train_league
+
+FEATURES_HOME = ["xg_home_roll5", "ga_home_roll5"]
+FEATURES_AWAY = ["xg_away_roll5", "ga_away_roll5"]
+
+# ----------------------------
+# Pytest fixtures
+# ----------------------------
+
+
+def _matches(rng, n, teams):
+    home = rng.choice(teams, n)
+    away = np.array([rng.choice([t for t in teams if t != h]) for h in home])
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2025-01-01", periods=n),
+            "time": "15:00",
+            "home_team": home,
+            "away_team": away,
+            "gf_home": rng.poisson(1.5, n),
+            "gf_away": rng.poisson(1.1, n),
+        }
+    )
+    for col in FEATURES_HOME + FEATURES_AWAY:
+        df[col] = rng.uniform(0.3, 2.5, n)
+    return df
+
+
+@pytest.fixture
+def trained(tmp_path):
+    """Trener en ekte modell med train_league; returnerer (models_dir, df)."""
+    rng = np.random.default_rng(0)
+    df = _matches(rng, 200, ["A", "B", "C", "D"])
+    (tmp_path / "processed").mkdir()
+    df.to_csv(tmp_path / "processed" / "test_league_processed.csv", index=False)
+    models_dir = str(tmp_path / "models")
+    train_league("Test League", str(tmp_path), models_dir, FEATURES_HOME, FEATURES_AWAY)
+    return models_dir, df
+
+
+# ----------------------------
+# Tester for fused prediktor
+# ----------------------------
+
+
+def test_predict_fused_matches_sklearn_pipeline(trained):
+    models_dir, df = trained
+    predictor = load_fused_predictor("Test League", models_dir)
+    upcoming = df.tail(20).copy()
+    upcoming.loc[upcoming.index[0], "xg_home_roll5"] = np.nan
+
+    expected = predict_poisson_from_models(
+        upcoming, FEATURES_HOME, FEATURES_AWAY, "Test League", models_dir, fused=False
+    )
+    out = predict_fused(predictor, upcoming, FEATURES_HOME, FEATURES_AWAY)
+    pd.testing.assert_frame_equal(out, expected, rtol=1e-9)
+
+
+def test_unseen_team_gets_zero_team_weights(trained):
+    models_dir, df = trained
+    predictor = load_fused_predictor("Test League", models_dir)
+    row = df.tail(1).copy()
+    row["home_team"] = "Nyopprykket"
+
+    expected = predict_poisson_from_models(
+        row,
+        FEATURES_HOME,
+        FEATURES_AWAY,
+        "Test League",
+        models_dir,
+        boost=False,
+        fused=False,
+    )
+    lam_h, lam_a = fused_lambdas(predictor, row, FEATURES_HOME, FEATURES_AWAY)
+    np.testing.assert_allclose(lam_h, expected["lambda_home"])
+    np.testing.assert_allclose(lam_a, expected["lambda_away"])
+
+
+def test_lambdas_from_arrays_is_exp_linear(trained):
+    models_dir, _ = trained
+    p = load_fused_predictor("Test League", models_dir)
+    X = np.ones((1, len(p["features"])))
+    home, away = team_indices(p, ["A"]), team_indices(p, ["B"])
+    lam_h, lam_a = lambdas_from_arrays(p, X, 2 * X, home, away)
+
+    a, b = p["team_index"]["A"], p["team_index"]["B"]
+    eta_h = p["intercept"] + p["weights"].sum() + p["home_weight"]
+    eta_h += p["att"][a] + p["def"][b]
+    eta_a = p["intercept"] + 2 * p["weights"].sum() + p["att"][b] + p["def"][a]
+    np.testing.assert_allclose([lam_h[0], lam_a[0]], np.exp([eta_h, eta_a]))
+
+
+def test_load_fused_predictor_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_fused_predictor("Test League", str(tmp_path))
+
+
+def test_fused_artifact_stores_model_hash(trained):
+    models_dir, _ = trained
+    predictor = load_fused_predictor("Test League", models_dir)
+    assert predictor["model_hash"] == model_sha256("Test League", models_dir)
+
+
+# ----------------------------
+# Tester for bruk i predict.py
+# ----------------------------
+
+
+def test_poisson_pmf_matches_scipy():
+    from scipy.stats import poisson
+
+    lam = np.array([0.0, 0.3, 1.4, 3.2])
+    expected = poisson.pmf(np.arange(11), lam[:, None])
+    np.testing.assert_allclose(poisson_pmf(lam, 10), expected, rtol=1e-12, atol=0)
+
+
+def test_load_models_for_league_keeps_sklearn_pair(trained):
+    # Kontrakten er uendret selv om fused.npz finnes
+    models_dir, _ = trained
+    model, scaler = load_models_for_league("Test League", models_dir)
+    assert isinstance(model, PoissonRegressor)
+    assert hasattr(scaler, "transform") and hasattr(scaler, "mean_")
+
+
+def test_predict_poisson_uses_fused_predictor(trained, monkeypatch):
+    models_dir, df = trained
+    upcoming = df.tail(10).copy()
+    expected = predict_poisson_from_models(
+        upcoming, FEATURES_HOME, FEATURES_AWAY, "Test League", models_dir, fused=False
+    )
+
+    def no_pickle(*args, **kwargs):
+        raise AssertionError("pickle lastet selv om fused.npz finnes")
+
+    monkeypatch.setattr("src.models.predict.load_models_for_league", no_pickle)
+    out = predict_poisson_from_models(
+        upcoming, FEATURES_HOME, FEATURES_AWAY, "Test League", models_dir
+    )
+    pd.testing.assert_frame_equal(out, expected, rtol=1e-9)
+
+
+def test_fused_artifact_serves_without_joblib_files(trained):
+    models_dir, df = trained
+    expected = predict_poisson_from_models(
+        df.tail(5), FEATURES_HOME, FEATURES_AWAY, "Test League", models_dir
+    )
+    for name in ("test_league_model.joblib", "test_league_scaler.joblib"):
+        os.remove(os.path.join(models_dir, name))
+
+    assert load_fused_for_league("Test League", models_dir) is not None
+    out = predict_poisson_from_models(
+        df.tail(5), FEATURES_HOME, FEATURES_AWAY, "Test League", models_dir
+    )
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_fused_serving_needs_no_sklearn_scipy_or_joblib(trained, tmp_path):
+    models_dir, df = trained
+    for name in ("test_league_model.joblib", "test_league_scaler.joblib"):
+        os.remove(os.path.join(models_dir, name))
+    csv = tmp_path / "upcoming.csv"
+    df.tail(5).to_csv(csv, index=False)
+
+    # None i sys.modules gjør at import av pakkene feiler
+    script = f"""
+import sys
+for name in ("sklearn", "scipy", "joblib"):
+    sys.modules[name] = None
+import pandas as pd
+from src.models.predict import predict_poisson_from_models
+df = pd.read_csv({str(csv)!r}, parse_dates=["date"])
+out = predict_poisson_from_models(
+    df, {FEATURES_HOME!r}, {FEATURES_AWAY!r}, "Test League", {models_dir!r}
+)
+assert out["prob_home"].between(0, 1).all()
+"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=root, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_falls_back_to_pickle_without_fused(trained):
+    models_dir, df = trained
+    os.remove(os.path.join(models_dir, "test_league_fused.npz"))
+    assert load_fused_for_league("Test League", models_dir) is None
+    out = predict_poisson_from_models(
+        df.tail(5), FEATURES_HOME, FEATURES_AWAY, "Test League", models_dir
+    )
+    assert np.isfinite(out["lambda_home"]).all()
+
+
+def test_falls_back_to_pickle_when_fused_is_stale(trained):
+    models_dir, _ = trained
+    path = os.path.join(models_dir, "test_league_fused.npz")
+    with np.load(path) as data:
+        arrays = dict(data)
+    arrays["model_hash"] = "0" * 64
+    np.savez(path, **arrays)
+    assert load_fused_for_league("Test League", models_dir) is None
@@ -10,6 +10,7 @@ from src.models.odds import (
     calculate_hub_odds,
     calculate_btts_odds,
     calculate_over_under_odds,
+    price_markets,
 )
 
 # Vi bruker compute_match_outcome_probabilities fra predict-modulen i odds,
@@ -326,3 +327,139 @@ def test_calculate_over_under_odds(
     for o in out["Fair odds"]:
         whole, dec = o.split(".")
         assert len(dec) == 2
+
+
+# ---------- Tester for price_markets ----------
+
+
+class LinearModel:
+    """Poisson-aktig modell for vilkårlig mange rader: exp(0.02 * sum(X))."""
+
+    def predict(self, X):
+        return np.exp(0.02 * np.asarray(X, dtype=float).sum(axis=1))
+
+
+@pytest.fixture
+def two_matches(minimal_df):
+    second = minimal_df.copy()
+    second["home_team"], second["away_team"] = "Team B", "Team A"
+    second["xg_home_roll5"] = 2.5
+    return pd.concat([minimal_df, second], ignore_index=True)
+
+
+@pytest.fixture
+def patched_linear(monkeypatch, minimal_df, minimal_features):
+    features_home, features_away = minimal_features
+    scaler = FakeScaler(
+        build_feature_space_for_scaler(minimal_df, features_home, features_away)
+    )
+    model = LinearModel()
+    monkeypatch.setattr(
+        "src.models.odds.load_models_for_league",
+        lambda league, models_dir: (model, scaler),
+        raising=True,
+    )
+    return model
+
+
+def test_price_markets_long_format(two_matches, minimal_features, patched_linear):
+    features_home, features_away = minimal_features
+    out = price_markets(
+        two_matches,
+        "Premier League",
+        features_home=features_home,
+        features_away=features_away,
+        models_dir="data/models",
+        lines=(1.5, 2.5),
+    )
+
+    assert list(out.columns) == [
+        "date",
+        "time",
+        "home_team",
+        "away_team",
+        "market",
+        "selection",
+        "line",
+        "probability",
+        "fair_odds",
+    ]
+    # Kampene holdes samlet og i input-rekkefølge
+    assert list(out["home_team"].drop_duplicates()) == ["Team A", "Team B"]
+    sizes = out.groupby(["home_team", "market"]).size().unstack()
+    assert sizes.loc["Team A"].to_dict() == {
+        "1x2": 3,
+        "btts": 2,
+        "correct_score": 37,
+        "double_chance": 3,
+        "over_under": 4,
+    }
+    # Hvert marked summerer til 1 (double chance til 2, over/under per linje)
+    sums = out.groupby(["home_team", "market", "line"], dropna=False)[
+        "probability"
+    ].sum()
+    expected = sums.index.get_level_values("market").map(
+        {"double_chance": 2.0}
+    ).fillna(1.0)
+    np.testing.assert_allclose(sums.to_numpy(), expected, atol=1e-4)
+    np.testing.assert_allclose(out["fair_odds"], 1 / out["probability"])
+
+
+def test_price_markets_matches_single_market_functions(
+    two_matches, minimal_features, patched_linear
+):
+    features_home, features_away = minimal_features
+    kwargs = dict(
+        features_home=features_home,
+        features_away=features_away,
+        league="Premier League",
+        models_dir="data/models",
+    )
+    out = price_markets(two_matches, **kwargs, lines=(2.5,))
+
+    for i in range(len(two_matches)):
+        match = two_matches.iloc[[i]]
+        rows = out[out["home_team"] == match["home_team"].iloc[0]]
+        btts = calculate_btts_odds(match, **kwargs)
+        yes = rows[(rows["market"] == "btts") & (rows["selection"] == "Ja")]
+        assert parse_percent_string(btts["Sannsynlighet"].iloc[0]) == pytest.approx(
+            yes["probability"].iloc[0], abs=1e-3
+        )
+        ou = calculate_over_under_odds(match, **kwargs, threshold=2.5)
+        over = rows[(rows["market"] == "over_under") & (rows["selection"] == "Over")]
+        assert parse_percent_string(ou["Sannsynlighet"].iloc[1]) == pytest.approx(
+            over["probability"].iloc[0], abs=1e-3
+        )
+        # 1X2 med boost er det samme som calculate_hub_odds viser
+        boosted = price_markets(match, **kwargs, markets=("1x2",), boost=True)
+        hub = calculate_hub_odds(match, **kwargs)
+        np.testing.assert_allclose(
+            [parse_percent_string(p) for p in hub["Sannsynlighet"]],
+            boosted["probability"],
+            atol=1e-3,
+        )
+
+
+def test_price_markets_unknown_market(minimal_df, patched_linear):
+    with pytest.raises(ValueError):
+        price_markets(minimal_df, "Premier League", markets=("asian_handicap",))
+
+
+@pytest.mark.parametrize("line", [2.0, 2.25])
+def test_price_markets_rejects_non_half_lines(minimal_df, patched_linear, line):
+    # Hel linje: total == 2 er push, ikke Under
+    with pytest.raises(ValueError, match="halve mål"):
+        price_markets(minimal_df, "Premier League", lines=(1.5, line))
+
+
+@pytest.mark.parametrize("line", [20.5, 21.5, -0.5])
+def test_price_markets_rejects_lines_outside_grid(minimal_df, patched_linear, line):
+    # max_goals=10 gir totaler 0..20; 19.5 er største linje med Over-masse
+    with pytest.raises(ValueError, match="mellom 0.5 og 19.5"):
+        price_markets(minimal_df, "Premier League", lines=(line,), max_goals=10)
+
+
+def test_price_markets_accepts_largest_line(minimal_df, patched_linear):
+    out = price_markets(minimal_df, "Premier League", lines=(19.5,), max_goals=10)
+    ou = out[out["market"] == "over_under"]
+    assert ou["probability"].sum() == pytest.approx(1.0, abs=1e-6)
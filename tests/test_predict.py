@@ -5,12 +5,20 @@ import joblib
 import numpy as np
 import pandas as pd
 import pytest
+from scipy.stats import poisson
 
 # Importer funksjoner fra predict.py
+from src.models import predict as predict_mod
 from src.models.predict import (
     _add_team_dummies,
+    clear_model_cache,
     load_models_for_league,
+    load_coefficient_ensemble,
+    model_sha256,
+    ensemble_lambdas,
     compute_match_outcome_probabilities,
+    score_matrices,
+    outcome_probabilities,
     predict_poisson_from_models,
 )
 
@@ -160,6 +168,30 @@ def test_compute_match_outcome_probabilities_basic_properties():
     assert (1.0 - s) < 1e-5
 
 
+def test_score_matrices_match_scalar_pmf():
+    lam_h = np.array([0.4, 1.5, 3.2])
+    lam_a = np.array([2.1, 1.0, 0.7])
+    scores = score_matrices(lam_h, lam_a, max_goals=6)
+    assert scores.shape == (3, 7, 7)
+    for m in range(3):
+        for i, j in [(0, 0), (2, 1), (6, 3)]:
+            expected = poisson.pmf(i, lam_h[m]) * poisson.pmf(j, lam_a[m])
+            assert scores[m, i, j] == pytest.approx(expected)
+
+
+def test_outcome_probabilities_batched_equals_single_match():
+    lam_h = np.linspace(0.3, 3.0, 50)
+    lam_a = lam_h[::-1]
+    p_h, p_d, p_a = outcome_probabilities(score_matrices(lam_h, lam_a))
+    np.testing.assert_allclose(p_h + p_d + p_a, 1.0, atol=1e-3)
+    for m in (0, 17, 49):
+        single = compute_match_outcome_probabilities(lam_h[m], lam_a[m])
+        np.testing.assert_allclose([p_h[m], p_d[m], p_a[m]], single)
+    # Like lag: like sjanser for hjemme- og borteseier
+    p_h, _, p_a = outcome_probabilities(score_matrices([1.2], [1.2]))
+    assert p_h[0] == pytest.approx(p_a[0])
+
+
 def test_add_team_dummies_alignment(minimal_df):
     # For én rad skal vi få att_homeTeam/def_awayTeam for home,
     # og att_awayTeam/def_homeTeam for away, og align’e kolonner.
@@ -185,6 +217,66 @@ def test_load_models_for_league_missing(tmp_path, league_name):
         load_models_for_league(league_name, models_dir=str(tmp_path))
 
 
+def test_load_models_for_league_is_cached(models_dir, league_name):
+    clear_model_cache()
+    model, scaler = load_models_for_league(league_name, models_dir)
+    again, _ = load_models_for_league(league_name, models_dir)
+    assert again is model
+
+
+def test_load_models_for_league_reloads_changed_files(models_dir, league_name):
+    clear_model_cache()
+    model, _ = load_models_for_league(league_name, models_dir)
+
+    # Ny trening skriver nye filer: neste kall laster dem på nytt
+    path = os.path.join(models_dir, "premier_league_model.joblib")
+    joblib.dump(DummyModel(base=2.0), path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded, _ = load_models_for_league(league_name, models_dir)
+    assert reloaded is not model
+    assert reloaded.base == 2.0
+
+
+def test_model_cache_retries_when_file_changes_during_load(tmp_path):
+    clear_model_cache()
+    path = str(tmp_path / "artifact.bin")
+    with open(path, "wb") as f:
+        f.write(b"old")
+    loads = []
+
+    def loader():
+        # Første lasting leser gammelt innhold, men filen skrives om underveis
+        content = open(path, "rb").read()
+        if not loads:
+            with open(path, "wb") as f:
+                f.write(b"new model")
+        loads.append(content)
+        return content
+
+    assert predict_mod._cached_load((path,), loader) == b"new model"
+    assert loads == [b"old", b"new model"]
+    # Den nye verdien er lagret under filens nye stempel
+    assert predict_mod._cached_load((path,), loader) == b"new model"
+    assert len(loads) == 2
+
+
+def test_model_cache_evicts_least_recently_used(
+    tmp_path, models_dir, league_name, monkeypatch
+):
+    clear_model_cache()
+    monkeypatch.setattr(predict_mod, "MODEL_CACHE_SIZE", 1)
+    other = tmp_path / "other"
+    other.mkdir()
+    for name in ("premier_league_model.joblib", "premier_league_scaler.joblib"):
+        (other / name).write_bytes(open(os.path.join(models_dir, name), "rb").read())
+
+    first, _ = load_models_for_league(league_name, models_dir)
+    load_models_for_league(league_name, str(other))
+    assert len(predict_mod._MODEL_CACHE) == 1
+    assert load_models_for_league(league_name, models_dir)[0] is not first
+
+
 def test_predict_poisson_from_models_single_row(
     models_dir, league_name, features_home, features_away
 ):
@@ -271,3 +363,78 @@ def test_predict_poisson_from_models_two_rows(
         assert 0 <= row["prob_away"] <= 1
         assert row["lambda_home"] > 0
         assert row["lambda_away"] > 0
+
+
+def test_predict_poisson_from_models_columns_match_single_match(
+    models_dir, league_name, minimal_df, features_home, features_away
+):
+    # Ikke-standard indeks: resultatet følger radrekkefølgen i df
+    df = minimal_df.set_axis([10, 3])
+    out = predict_poisson_from_models(
+        df=df,
+        features_home=features_home,
+        features_away=features_away,
+        league_name=league_name,
+        models_dir=models_dir,
+        boost=False,
+    )
+    assert list(out.index) == [0, 1]
+    assert list(out["home_team"]) == list(df["home_team"])
+    for _, row in out.iterrows():
+        expected = compute_match_outcome_probabilities(
+            row["lambda_home"], row["lambda_away"]
+        )
+        np.testing.assert_allclose(
+            row[["prob_home", "prob_draw", "prob_away"]].to_numpy(float), expected
+        )
+
+
+def test_ensemble_lambdas_one_column_per_draw(
+    models_dir, league_name, minimal_df, features_home, features_away
+):
+    # To trekk: hjemmefordel log(2) i trekk 0, ingen i trekk 1
+    coef = np.zeros((2, 7))
+    coef[0, 2] = np.log(2.0)  # is_home
+    path = os.path.join(models_dir, "premier_league_ensemble.npz")
+    np.savez(
+        path,
+        intercept=np.zeros(2),
+        coef=coef,
+        method="laplace",
+        model_hash=model_sha256(league_name, models_dir),
+    )
+
+    lam_h, lam_a = ensemble_lambdas(
+        minimal_df, features_home, features_away, league_name, models_dir
+    )
+    assert lam_h.shape == (len(minimal_df), 2)
+    np.testing.assert_allclose(lam_h, [[2.0, 1.0]] * len(minimal_df))
+    np.testing.assert_allclose(lam_a, 1.0)
+
+
+def test_load_coefficient_ensemble_rejects_other_model(models_dir, league_name):
+    path = os.path.join(models_dir, "premier_league_ensemble.npz")
+    np.savez(path, intercept=np.zeros(2), coef=np.zeros((2, 7)), method="laplace")
+    # Uten model_hash (eldre format) kan ikke opphavet kontrolleres
+    with pytest.raises(ValueError):
+        load_coefficient_ensemble(league_name, models_dir)
+
+    np.savez(
+        path,
+        intercept=np.zeros(2),
+        coef=np.zeros((2, 7)),
+        method="laplace",
+        model_hash=model_sha256(league_name, models_dir),
+    )
+    assert load_coefficient_ensemble(league_name, models_dir)["coef"].shape == (2, 7)
+
+    # Modellen trenes på nytt uten at ensemblet skrives: trekkene er foreldet
+    model_path = os.path.join(models_dir, "premier_league_model.joblib")
+    joblib.dump(DummyModel(base=2.0, bump=0.2), model_path)
+    with pytest.raises(ValueError):
+        load_coefficient_ensemble(league_name, models_dir)
+
+
+def test_load_coefficient_ensemble_missing(tmp_path, league_name):
+    with pytest.raises(FileNotFoundError):
+        load_coefficient_ensemble(league_name, models_dir=str(tmp_path))
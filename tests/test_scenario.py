@@ -0,0 +1,286 @@
+# File: tests/test_scenario.py
+import numpy as np
+import pytest
+
+from src.models import scenario as scen_mod
+from src.models.scenario import pin_results, what_if
+from src.models.simulate import (
+    create_outcome_store,
+    simulate_counts,
+    write_outcome_meta,
+)
+
+# ----------------------------
+# Pytest fixtures
+# ----------------------------
+
+
+@pytest.fixture
+def context():
+    """
+    Fire lag: A 6 poeng, B 2, C 1, D 1. Gjenstår A–B og C–D, begge med
+    1X2 = 0.5/0.3/0.2.
+    """
+    return {
+        "league": "Test League",
+        "season": "2025-2026",
+        "teams": ["Team A", "Team B", "Team C", "Team D"],
+        "fixtures": {
+            "home_idx": np.array([0, 2], dtype=np.intp),
+            "away_idx": np.array([1, 3], dtype=np.intp),
+            "cum_probs": np.array([[0.5, 0.8], [0.5, 0.8]]),
+            "keys": np.array([1, 2], dtype=np.uint64),
+        },
+        "base_points": np.array([6, 2, 1, 1], dtype=np.int64),
+    }
+
+
+@pytest.fixture
+def sim_dir(tmp_path, context):
+    """Lagrer 4000 simuleringer med kamputfall for Test League."""
+    path = str(tmp_path / "sims")
+    store = create_outcome_store(context, 4000, sim_dir=path)
+    simulate_counts(context, 4000, seed=1, store=store)
+    write_outcome_meta(store, context, 4000)
+    return path
+
+
+# ----------------------------
+# Tester
+# ----------------------------
+
+
+def test_pin_results_moves_fixture_into_base_points(context):
+    pinned = pin_results(context, {("Team A", "Team B"): "B"})
+    np.testing.assert_array_equal(pinned["base_points"], [6, 5, 1, 1])
+    np.testing.assert_array_equal(pinned["fixtures"]["home_idx"], [2])
+    # Originalen er urørt
+    np.testing.assert_array_equal(context["base_points"], [6, 2, 1, 1])
+
+    with pytest.raises(KeyError):
+        pin_results(context, {("Team B", "Team A"): "H"})
+    with pytest.raises(ValueError):
+        pin_results(context, {("Team A", "Team B"): "X"})
+
+
+def test_pin_results_rejects_modes_with_goals(context):
+    # Et låst H/U/B har ingen mål å legge til målforskjell og scorede
+    with pytest.raises(ValueError, match="tiebreak"):
+        pin_results(context, {("Team A", "Team B"): "H"}, mode="scoreline")
+
+
+def test_pin_results_updates_head_to_head(context):
+    context = dict(context, h2h_points=np.zeros((4, 4), dtype=np.int16))
+    pinned = pin_results(context, {("Team A", "Team B"): "U"})
+    assert pinned["h2h_points"][0, 1] == 1 and pinned["h2h_points"][1, 0] == 1
+    assert (context["h2h_points"] == 0).all()
+
+
+def test_what_if_conditions_on_stored_outcomes(sim_dir):
+    res = what_if(
+        "Test League",
+        {("Team C", "Team D"): "H"},
+        top_n=2,
+        min_samples=100,
+        sim_dir=sim_dir,
+    )
+    assert res["method"] == "betinget"
+    # Omtrent halvparten av simuleringene har hjemmeseier i C–D
+    assert 1800 < res["n_sims"] < 2200
+
+    table = res["table"].set_index("Team")
+    assert table.loc["Team A", "P(vinne)"] == 100.0
+    # B er bare topp 2 når B slår A (0.2); ellers er C nummer to
+    assert table.loc["Team B", "P(topp 2)"] == pytest.approx(20.0, abs=3.0)
+
+
+def test_what_if_reweights_rare_scenarios(sim_dir):
+    pinned = {("Team C", "Team D"): "H", ("Team A", "Team B"): "B"}
+    res = what_if(
+        "Test League", pinned, top_n=2, min_samples=10_000, sim_dir=sim_dir, seed=3
+    )
+
+    assert res["method"] == "omvektet"
+    assert res["n_sims"] == 4000
+    table = res["table"].set_index("Team")
+    # A 6, B 5, C 4, D 1: tabellen er låst
+    assert table.loc["Team A", "P(vinne)"] == 100.0
+    assert table.loc["Team B", "P(topp 2)"] == 100.0
+    assert table.loc["Team D", "P(nedrykk)"] == 100.0
+
+
+def test_what_if_agrees_between_methods(sim_dir):
+    pinned = {("Team C", "Team D"): "H"}
+    direct = what_if("Test League", pinned, top_n=2, min_samples=100, sim_dir=sim_dir)
+    rescored = what_if(
+        "Test League", pinned, top_n=2, min_samples=10_000, sim_dir=sim_dir, seed=4
+    )
+    a = direct["table"].set_index("Team")
+    b = rescored["table"].set_index("Team").loc[a.index]
+    np.testing.assert_allclose(a.to_numpy(), b.to_numpy(), atol=4.0)
+
+
+def test_what_if_resimulates_without_store(tmp_path, monkeypatch, context):
+    monkeypatch.setattr(scen_mod, "prepare_season", lambda *a, **k: context)
+    res = what_if(
+        "Test League",
+        {("Team A", "Team B"): "B"},
+        top_n=2,
+        sim_dir=str(tmp_path / "empty"),
+        n_sims=500,
+        seed=5,
+    )
+    assert res["method"] == "resimulert"
+    assert res["n_sims"] == 500
+    assert res["table"].set_index("Team").loc["Team A", "P(vinne)"] == 100.0
+
+
+def test_what_if_resimulates_with_stored_settings(tmp_path, monkeypatch, context):
+    path = str(tmp_path / "sims")
+    store = create_outcome_store(
+        context, 200, sim_dir=path, crn_seed=7, antithetic=True
+    )
+    simulate_counts(context, 200, seed=1, store=store)
+
+    calls = {}
+
+    def fake_prepare(league_name, **kwargs):
+        calls["prepare"] = kwargs
+        return context
+
+    def fake_counts(ctx, n_sims, **kwargs):
+        calls["simulate"] = kwargs
+        return simulate_counts(ctx, n_sims, seed=kwargs["seed"])
+
+    monkeypatch.setattr(scen_mod, "prepare_season", fake_prepare)
+    monkeypatch.setattr(scen_mod, "simulate_counts", fake_counts)
+    # Tving resimulering; et result-lager ville ellers blitt omvektet
+    monkeypatch.setattr(scen_mod, "_from_store", lambda *a: None)
+
+    res = what_if(
+        "Test League",
+        {("Team A", "Team B"): "B"},
+        min_samples=10_000,
+        sim_dir=path,
+        n_sims=300,
+        seed=2,
+    )
+    assert res["method"] == "resimulert"
+    assert calls["prepare"]["season"] == "2025-2026"
+    assert calls["simulate"]["mode"] == "result"
+    assert calls["simulate"]["crn_seed"] == 7
+    assert calls["simulate"]["antithetic"] is True
+
+
+def test_what_if_scoreline_store_conditions_but_never_resimulates(
+    tmp_path, monkeypatch, context
+):
+    context = dict(
+        context,
+        fixtures={
+            **context["fixtures"],
+            "lam_home": np.array([1.6, 1.6]),
+            "lam_away": np.array([0.9, 0.9]),
+        },
+        base_gf=np.zeros(4, dtype=np.int16),
+        base_ga=np.zeros(4, dtype=np.int16),
+    )
+    path = str(tmp_path / "sims")
+    store = create_outcome_store(context, 2000, sim_dir=path, mode="scoreline")
+    simulate_counts(context, 2000, seed=1, mode="scoreline", store=store)
+    write_outcome_meta(store, context, 2000, mode="scoreline")
+    monkeypatch.setattr(scen_mod, "prepare_season", lambda *a, **k: context)
+
+    # Betinging på H/U/B er eksakt også når målene teller
+    pinned = {("Team C", "Team D"): "H"}
+    res = what_if("Test League", pinned, min_samples=100, sim_dir=path)
+    assert res["method"] == "betinget"
+    # For få treff: resimulering uten mål for de låste kampene avvises
+    with pytest.raises(ValueError, match="min_samples"):
+        what_if("Test League", pinned, min_samples=10_000, sim_dir=path)
+
+
+def test_what_if_does_not_reweight_ensemble_store(tmp_path, monkeypatch, context):
+    # Kampene i samme ENSEMBLE_BLOCK deler koeffisienttrekk: ikke uavhengige
+    draws = np.array([[[0.9, 0.95], [0.1, 0.2]], [[0.5, 0.8], [0.5, 0.8]]])
+    lam = np.full((2, 2), 1.3)
+    context = dict(
+        context,
+        fixtures={
+            **context["fixtures"],
+            "cum_probs_draws": draws,
+            "lam_home_draws": lam,
+            "lam_away_draws": lam,
+        },
+    )
+    path = str(tmp_path / "sims")
+    store = create_outcome_store(context, 1000, sim_dir=path)
+    simulate_counts(context, 1000, seed=1, store=store)
+    write_outcome_meta(store, context, 1000)
+    monkeypatch.setattr(scen_mod, "prepare_season", lambda *a, **k: context)
+
+    res = what_if(
+        "Test League",
+        {("Team A", "Team B"): "B"},
+        min_samples=10_000,
+        sim_dir=path,
+        n_sims=500,
+        seed=3,
+    )
+    assert res["method"] == "resimulert"
+
+
+@pytest.mark.parametrize(
+    "rules, method",
+    [
+        # Målforskjell før innbyrdes: result-modus rangerer tilfeldig
+        (("points", "gd", "gf", "h2h_points"), "omvektet"),
+        # Innbyrdes rett etter poeng kan ikke regnes fra lageret
+        (("points", "h2h_points", "h2h_gd", "gd", "gf"), "resimulert"),
+    ],
+)
+def test_what_if_reweights_only_without_result_mode_h2h(
+    tmp_path, monkeypatch, context, rules, method
+):
+    context = dict(
+        context,
+        tiebreak=rules,
+        h2h_points=np.zeros((4, 4), dtype=np.int16),
+        h2h_gd=np.zeros((4, 4), dtype=np.int16),
+    )
+    path = str(tmp_path / "sims")
+    store = create_outcome_store(context, 1000, sim_dir=path)
+    simulate_counts(context, 1000, seed=1, store=store)
+    write_outcome_meta(store, context, 1000)
+    monkeypatch.setattr(scen_mod, "prepare_season", lambda *a, **k: context)
+
+    res = what_if(
+        "Test League",
+        {("Team A", "Team B"): "B"},
+        min_samples=10_000,
+        sim_dir=path,
+        n_sims=500,
+        seed=3,
+    )
+    assert res["method"] == method
+
+
+def test_what_if_rejects_other_season(sim_dir):
+    with pytest.raises(ValueError, match="2024-2025"):
+        what_if(
+            "Test League",
+            {("Team C", "Team D"): "H"},
+            sim_dir=sim_dir,
+            season="2024-2025",
+        )
+
+
+def test_what_if_rejects_stale_store(tmp_path, context):
+    # Lageret ble skrevet med andre data enn det som finnes nå
+    context = dict(context, fingerprints={"processed": "gammel", "model": None})
+    path = str(tmp_path / "sims")
+    store = create_outcome_store(context, 100, sim_dir=path)
+    simulate_counts(context, 100, seed=1, store=store)
+
+    with pytest.raises(ValueError, match="utdatert"):
+        what_if("Test League", {("Team C", "Team D"): "H"}, sim_dir=path)
@@ -0,0 +1,170 @@
+# File: tests/test_tiebreak.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models import tiebreak as tb_mod
+from src.models.simulate import _rank_teams
+from src.models.tiebreak import (
+    DEFAULT_TIEBREAK,
+    available_rules,
+    head_to_head_base,
+    league_tiebreak,
+    tiebreak_keys,
+)
+
+H2H_RULES = ("points", "h2h_points", "h2h_gd", "gd", "gf")
+
+# ----------------------------
+# Hjelpefunksjoner
+# ----------------------------
+
+
+def _context(rules, fixtures, n_teams=3):
+    return {
+        "teams": [f"T{i}" for i in range(n_teams)],
+        "fixtures": {
+            "home_idx": np.array([h for h, _ in fixtures], dtype=np.intp),
+            "away_idx": np.array([a for _, a in fixtures], dtype=np.intp),
+        },
+        "tiebreak": rules,
+        "h2h_points": np.zeros((n_teams, n_teams), dtype=np.int16),
+        "h2h_gd": np.zeros((n_teams, n_teams), dtype=np.int16),
+    }
+
+
+def _season(goals_home, goals_away, fixtures, base_points, n_teams=3):
+    """Poeng, utfall og målsummer for én simulering med gitte resultater."""
+    gh = np.array([goals_home], dtype=np.int8)
+    ga = np.array([goals_away], dtype=np.int8)
+    outcomes = (gh <= ga).astype(np.int8) + (gh < ga)
+    points = np.array([base_points], dtype=np.int64)
+    gf = np.zeros((1, n_teams), dtype=np.int64)
+    gc = np.zeros((1, n_teams), dtype=np.int64)
+    for j, (h, a) in enumerate(fixtures):
+        points[0, h] += (3, 1, 0)[outcomes[0, j]]
+        points[0, a] += (0, 1, 3)[outcomes[0, j]]
+        gf[0, h] += gh[0, j]
+        gf[0, a] += ga[0, j]
+        gc[0, h] += ga[0, j]
+        gc[0, a] += gh[0, j]
+    return points, outcomes, (gh, ga), (gf, gc)
+
+
+# A–B 0-1, A–C 5-0, B–C 0-0 og A starter med 1 poeng:
+# A og B har 4 poeng, A har best målforskjell, B vant innbyrdes
+FIXTURES = [(0, 1), (0, 2), (1, 2)]
+SEASON = ([0, 5, 0], [1, 0, 0], FIXTURES, [1, 0, 0])
+
+
+# ----------------------------
+# Tester for konfigurasjon og historikk
+# ----------------------------
+
+
+def test_league_tiebreak_from_config(monkeypatch):
+    assert league_tiebreak("La Liga")[:2] == ("points", "h2h_points")
+    assert league_tiebreak("Ukjent liga") == DEFAULT_TIEBREAK
+
+    monkeypatch.setitem(tb_mod.LEAGUES, "Test", {"tiebreak": ("points", "away")})
+    with pytest.raises(ValueError):
+        league_tiebreak("Test")
+    monkeypatch.setitem(tb_mod.LEAGUES, "Test", {"tiebreak": ("gd", "points")})
+    with pytest.raises(ValueError):
+        league_tiebreak("Test")
+
+
+def test_head_to_head_base_from_played_matches():
+    played = pd.DataFrame(
+        {
+            "home_team": ["A", "B", "A"],
+            "away_team": ["B", "A", "C"],
+            "gf_home": [2.0, 1.0, 0.0],
+            "gf_away": [0.0, 1.0, 0.0],
+        }
+    )
+    h2h = head_to_head_base(played, ["A", "B", "C"])
+    # A–B 2-0 og B–A 1-1: A 4 poeng og +2 mot B
+    assert h2h["points"][0, 1] == 4 and h2h["points"][1, 0] == 1
+    assert h2h["gd"][0, 1] == 2 and h2h["gd"][1, 0] == -2
+    assert h2h["points"][0, 2] == 1 and h2h["points"][2, 0] == 1
+
+
+# ----------------------------
+# Tester for rangering
+# ----------------------------
+
+
+def test_head_to_head_overrides_goal_difference():
+    points, outcomes, goals, totals = _season(*SEASON)
+    rng = np.random.default_rng(0)
+
+    default = _context(DEFAULT_TIEBREAK, FIXTURES)
+    keys = tiebreak_keys(default, points, outcomes, goals, totals)
+    assert list(_rank_teams(points, rng, keys)[0]) == [0, 1, 2]
+
+    h2h = _context(H2H_RULES, FIXTURES)
+    keys = tiebreak_keys(h2h, points, outcomes, goals, totals)
+    assert list(_rank_teams(points, rng, keys)[0]) == [1, 0, 2]
+    # Minitabellen teller bare kamper mellom lagene som står likt (A og B)
+    np.testing.assert_array_equal(keys[0][0, :2], [0, 3])
+
+
+def test_head_to_head_after_goal_difference_only_splits_remaining_ties():
+    points, outcomes, goals, totals = _season(*SEASON)
+    ctx = _context(("points", "gd", "h2h_points"), FIXTURES)
+    gd, h2h = tiebreak_keys(ctx, points, outcomes, goals, totals)
+    # A og B skilles allerede på målforskjell: ingen innbyrdes gruppe
+    assert (h2h == 0).all()
+
+
+def test_result_mode_skips_goal_criteria():
+    points, outcomes, _, _ = _season(*SEASON)
+    ctx = _context(H2H_RULES, FIXTURES)
+    keys = tiebreak_keys(ctx, points, outcomes)
+    assert len(keys) == 1
+    order = _rank_teams(points, np.random.default_rng(0), keys)
+    assert list(order[0]) == [1, 0, 2]
+
+
+def test_result_mode_ranks_goal_first_league_randomly():
+    # Premier League-regler: målforskjell før innbyrdes. Uten mål er
+    # rekkefølgen mellom A og B ukjent, så innbyrdes seier (B) skal ikke
+    # avgjøre; lagene på likt rangeres tilfeldig som før innbyrdes fantes
+    rules = ("points", "gd", "gf", "h2h_points")
+    assert available_rules(rules, goals=False) == ("points",)
+    assert available_rules(rules, goals=True) == rules
+
+    points, outcomes, _, _ = _season(*SEASON)
+    n_sims = 2000
+    points = np.repeat(points, n_sims, axis=0)
+    outcomes = np.repeat(outcomes, n_sims, axis=0)
+    keys = tiebreak_keys(_context(rules, FIXTURES), points, outcomes)
+    assert keys == ()
+
+    order = _rank_teams(points, np.random.default_rng(0), keys)
+    assert (order[:, 2] == 2).all()
+    share_a_first = (order[:, 0] == 0).mean()
+    assert 0.45 < share_a_first < 0.55
+
+
+def test_vectorized_mini_league_matches_loop():
+    rng = np.random.default_rng(3)
+    n_teams, n_sims = 6, 200
+    fixtures = [(h, a) for h in range(n_teams) for a in range(n_teams) if h != a]
+    ctx = _context(("points", "h2h_points"), fixtures, n_teams)
+    ctx["h2h_points"] = rng.integers(0, 4, (n_teams, n_teams)).astype(np.int16)
+    np.fill_diagonal(ctx["h2h_points"], 0)
+
+    outcomes = rng.integers(0, 3, (n_sims, len(fixtures))).astype(np.int8)
+    points = rng.integers(0, 3, (n_sims, n_teams))
+    (key,) = tiebreak_keys(ctx, points, outcomes)
+
+    for s in range(n_sims):
+        table = ctx["h2h_points"].astype(int).copy()
+        for (h, a), o in zip(fixtures, outcomes[s]):
+            table[h, a] += (3, 1, 0)[o]
+            table[a, h] += (0, 1, 3)[o]
+        for i in range(n_teams):
+            tied = points[s] == points[s, i]
+            assert key[s, i] == table[i, tied].sum()
@@ -6,7 +6,14 @@ import joblib
 from sklearn.linear_model import PoissonRegressor
 from sklearn.preprocessing import StandardScaler
 
-from src.models.train import train_poisson_model, _add_team_dummies, train_league
+from src.models.train import (
+    train_poisson_model,
+    _add_team_dummies,
+    train_league,
+    coefficient_ensemble,
+    fused_predictor,
+)
+from src.models.predict import model_sha256
 
 # --- Tests for _add_team_dummies ---
 
@@ -89,6 +96,72 @@ def test_train_poisson_model_basic():
     assert lam[0] >= 0
 
 
+# --- Tests for coefficient_ensemble ---
+
+
+@pytest.fixture
+def fitted_poisson():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 3))
+    y = rng.poisson(np.exp(0.2 + X @ np.array([0.4, -0.2, 0.0])))
+    model = PoissonRegressor(alpha=0.01, max_iter=300).fit(X, y)
+    return model, X, y
+
+
+def test_coefficient_ensemble_laplace_centres_on_fit(fitted_poisson):
+    model, X, y = fitted_poisson
+    ens = coefficient_ensemble(model, X, y, n_draws=2000, seed=1)
+    assert ens["intercept"].shape == (2000,)
+    assert ens["coef"].shape == (2000, 3)
+    np.testing.assert_allclose(ens["coef"].mean(axis=0), model.coef_, atol=0.01)
+    # 500 observations: standard error of order 1/sqrt(n * mu)
+    assert 0.01 < ens["coef"][:, 0].std() < 0.1
+
+
+def test_coefficient_ensemble_bootstrap_and_unknown_method(fitted_poisson):
+    model, X, y = fitted_poisson
+    ens = coefficient_ensemble(model, X, y, n_draws=5, method="bootstrap", seed=1)
+    assert ens["coef"].shape == (5, 3)
+    assert ens["coef"].std(axis=0).min() > 0
+    with pytest.raises(ValueError):
+        coefficient_ensemble(model, X, y, method="jackknife")
+
+
+# --- Tests for fused_predictor ---
+
+
+def test_fused_predictor_folds_scaler_into_weights():
+    rng = np.random.default_rng(2)
+    n = 60
+    data = pd.DataFrame(
+        {
+            "home_team": rng.choice(["A", "B", "C"], n),
+            "away_team": rng.choice(["X", "Y"], n),
+            "gf_home": rng.poisson(1.5, n),
+            "gf_away": rng.poisson(1.0, n),
+            "xg_home": rng.uniform(0.5, 2.0, n),
+            "xg_away": rng.uniform(0.5, 2.0, n),
+        }
+    )
+    model, scaler = train_poisson_model(data, ["xg_home"], ["xg_away"])
+    fused = fused_predictor(model, scaler)
+    assert list(fused["features"]) == ["xg"]
+
+    # exp(intercept + X @ w) on unscaled input equals model.predict(scaled)
+    X = pd.DataFrame(
+        rng.uniform(0, 2, (5, len(scaler.feature_names_in_))),
+        columns=scaler.feature_names_in_,
+    )
+    expected = model.predict(scaler.transform(X))
+    weights = dict(zip(fused["features"], fused["weights"]))
+    weights["is_home"] = fused["home_weight"]
+    for team, att, def_ in zip(fused["teams"], fused["att"], fused["def"]):
+        weights[f"att_{team}"] = att
+        weights[f"def_{team}"] = def_
+    w = np.array([weights.get(c, 0.0) for c in scaler.feature_names_in_])
+    np.testing.assert_allclose(np.exp(fused["intercept"] + X.to_numpy() @ w), expected)
+
+
 # --- Tests for train_league ---
 
 
@@ -148,3 +221,44 @@ def test_train_league_saves_model_and_scaler(tmp_path):
     loaded_scaler = joblib.load(scaler_path)
     assert isinstance(loaded_model, PoissonRegressor)
     assert isinstance(loaded_scaler, StandardScaler)
+    # Fused linear artifact for serving without sklearn
+    with np.load(models_dir / f"{key}_fused.npz") as fused:
+        assert list(fused["features"]) == ["xg", "ga"]
+        assert set(fused["teams"]) <= {"A", "X"}
+
+
+def test_train_league_saves_coefficient_ensemble(tmp_path):
+    data_dir = tmp_path / "data"
+    proc_dir = data_dir / "processed"
+    proc_dir.mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    n = 40
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2025-01-01", periods=n).astype(str),
+            "home_team": rng.choice(["A", "B"], n),
+            "away_team": rng.choice(["X", "Y"], n),
+            "gf_home": rng.poisson(1.5, n),
+            "gf_away": rng.poisson(1.0, n),
+            "xg_home": rng.uniform(0.5, 2.0, n),
+            "xg_away": rng.uniform(0.5, 2.0, n),
+        }
+    )
+    df.to_csv(proc_dir / "test_processed.csv", index=False)
+
+    models_dir = tmp_path / "models"
+    train_league(
+        league_name="TEST",
+        data_dir=str(data_dir),
+        models_dir=str(models_dir),
+        features_home=["xg_home"],
+        features_away=["xg_away"],
+        n_ensemble=10,
+        seed=0,
+    )
+    scaler = joblib.load(models_dir / "test_scaler.joblib")
+    with np.load(models_dir / "test_ensemble.npz") as ens:
+        assert ens["coef"].shape == (10, len(scaler.feature_names_in_))
+        assert ens["intercept"].shape == (10,)
+        assert str(ens["method"]) == "laplace"
+        assert str(ens["model_hash"]) == model_sha256("TEST", str(models_dir))